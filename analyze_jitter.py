@@ -0,0 +1,287 @@
+"""
+Streaming analysis of fishing physics logs (fishing_phy_log_*.txt); the Python port of
+Scripts/AnalyzeJitter.ps1.
+
+The log is memory-mapped and scanned chunk by chunk, so memory stays constant however large the log
+is. By default only the flip fields (LineLen unless --flips is given) are read, each with its own
+literal-prefixed regex; for them we count direction flips the way AnalyzeJitter.ps1 does and keep
+running statistics. --field adds statistics for named fields, and --all-fields for every numeric
+`Name:value` pair, with one generic regex that is several times slower than the flips-only scan.
+
+    python analyze_jitter.py fishing_phy_log_20260309_200524.txt
+    python analyze_jitter.py --flips LineLen --flips Tension --json logs/*.txt
+    python analyze_jitter.py --all-fields big_log.txt
+
+Differences from AnalyzeJitter.ps1, whose pattern is `LineLen:([\\d\\.]+)` matched once per line:
+  * `Name=value` is read as well as `Name:value`, with optional spaces or tabs after the separator;
+  * values may be negative or use an exponent (the script drops the sign and reads -0.5 as 0.5);
+  * every match on a line counts, not just the first one;
+  * names match as whole words, so MaxLineLen: is not read as LineLen:.
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import math
+import mmap
+import time
+import argparse
+import operator
+from itertools import groupby
+from operator import itemgetter
+
+# Name:value / Name=value, the name starting with a letter so timestamps like 20:05:24 are skipped
+NUMBER = rb"[:=][ \t]*(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+FIELD_RE = re.compile(rb"([A-Za-z_][A-Za-z0-9_]*)" + NUMBER)
+DEFAULT_FLIP_FIELDS = ("LineLen",)
+FLIP_EPSILON = 1e-6   # smaller changes are not a direction (same threshold as the PowerShell script)
+LOG_PATTERN = "fishing_phy_log_*.txt"
+CHUNK_SIZE = 4 * 1024 * 1024  # bytes scanned per regex call; bounds the memory for the match lists
+
+class FieldStats:
+    """
+    Running count/mean/min/max/rms of one field; O(1) memory. Sums are kept relative to the first value,
+    so timestamps and positions (large mean, tiny jitter) don't lose their variance to cancellation.
+    """
+    __slots__ = ("count", "shift", "total", "total_sq", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.shift = None
+        self.total = 0.0     # sum of (value - shift)
+        self.total_sq = 0.0  # sum of (value - shift)**2
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        if not values:
+            return
+        if self.shift is None:
+            self.shift = values[0]
+        deltas = list(map(self.shift.__rsub__, values))
+        self.count += len(values)
+        self.total += sum(deltas)
+        self.total_sq += sum(map(operator.mul, deltas, deltas))
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+
+    @property
+    def mean(self):
+        return self.shift + self.total / self.count if self.count else 0.0
+
+    @property
+    def rms(self):
+        if not self.count:
+            return 0.0
+        # sum(x**2) = sum(d**2) + 2*shift*sum(d) + n*shift**2 with d = x - shift
+        total_sq = self.total_sq + 2 * self.shift * self.total + self.count * self.shift ** 2
+        return math.sqrt(max(0.0, total_sq / self.count))
+
+    @property
+    def std(self):
+        if not self.count:
+            return 0.0
+        offset = self.total / self.count
+        return math.sqrt(max(0.0, self.total_sq / self.count - offset ** 2))
+
+    @property
+    def p2p(self):
+        return self.max - self.min if self.count else 0.0
+
+    def to_json(self):
+        return {"count": self.count, "mean": self.mean, "min": self.min if self.count else None,
+                "max": self.max if self.count else None, "p2p": self.p2p, "rms": self.rms, "std": self.std}
+
+class FlipCounter:
+    """Counts sign changes of successive differences, ignoring steps below FLIP_EPSILON."""
+    __slots__ = ("points", "flips", "last_value", "last_sign")
+
+    def __init__(self):
+        self.points = 0
+        self.flips = 0
+        self.last_value = None
+        self.last_sign = 0
+
+    def update(self, values):
+        last_value, last_sign, flips = self.last_value, self.last_sign, self.flips
+        for value in values:
+            if last_value is not None:
+                diff = value - last_value
+                if diff > FLIP_EPSILON:
+                    if last_sign < 0:
+                        flips += 1
+                    last_sign = 1
+                elif diff < -FLIP_EPSILON:
+                    if last_sign > 0:
+                        flips += 1
+                    last_sign = -1
+            last_value = value
+        self.last_value, self.last_sign, self.flips = last_value, last_sign, flips
+        self.points += len(values)
+
+    @property
+    def severity(self):
+        """Flips per hundred data points."""
+        return self.flips / self.points * 100 if self.points else 0.0
+
+    def to_json(self):
+        return {"points": self.points, "flips": self.flips, "severity": self.severity}
+
+class LogAnalysis:
+    def __init__(self, path, flip_fields=DEFAULT_FLIP_FIELDS):
+        self.path = path
+        self.size = 0
+        self.seconds = 0.0
+        self.stats = {}   # field name -> FieldStats, in order of first appearance
+        self.flips = {name: FlipCounter() for name in flip_fields}
+
+    def to_json(self):
+        return {"path": self.path, "bytes": self.size, "seconds": self.seconds,
+                "flips": {name: counter.to_json() for name, counter in self.flips.items()},
+                "fields": {name: stats.to_json() for name, stats in self.stats.items()}}
+
+def field_pattern(name):
+    """Regex for one named field. The literal name comes first so the regex engine can skip ahead with a
+    substring search; the lookbehind after it rejects longer names that merely end in `name`."""
+    raw = re.escape(name.encode('ascii'))
+    return re.compile(raw + rb"(?<![A-Za-z0-9_]" + raw + rb")" + NUMBER)
+
+def iter_chunks(buffer):
+    """(start, end) offsets of CHUNK_SIZE pieces of `buffer`, cut on line boundaries. A line longer
+    than CHUNK_SIZE makes its chunk longer rather than being cut, so no field is split."""
+    size = len(buffer)
+    start = 0
+    while start < size:
+        end = min(start + CHUNK_SIZE, size)
+        if end < size:
+            newline = buffer.rfind(b"\n", start, end)
+            if newline < 0:
+                newline = buffer.find(b"\n", end)
+            end = newline + 1 if newline >= 0 else size
+        yield start, end
+        start = end
+
+def scan(buffer, analysis, fields=()):
+    """
+    Feeds the numeric fields in `buffer` (bytes or mmap) into `analysis`, one chunk at a time. Per chunk
+    the regex, the grouping by field name and the float conversion all run in C; only the flip counting
+    walks the values in Python.
+
+    Only `fields` and the flip fields are collected, each with its own literal-prefixed regex; with
+    `fields=None` one regex matches every `Name:value` pair instead, which is several times slower.
+    """
+    stats = {}  # raw field name -> FieldStats, in order of first appearance
+    flip_counters = {name.encode('ascii'): counter for name, counter in analysis.flips.items()}
+    if fields is not None:
+        patterns = {name.encode('ascii'): field_pattern(name)
+                    for name in dict.fromkeys(list(fields) + list(analysis.flips))}
+
+    for start, end in iter_chunks(buffer):
+        if fields is not None:
+            groups = [(name, pattern.findall(buffer, start, end)) for name, pattern in patterns.items()]
+        else:
+            pairs = FIELD_RE.findall(buffer, start, end)
+            if not pairs:
+                continue
+            names = list(map(itemgetter(0), pairs))
+            for name in dict.fromkeys(names):
+                stats.setdefault(name, None)
+            # A stable sort keeps each field's values in log order
+            pairs.sort(key=itemgetter(0))
+            groups = [(name, list(map(itemgetter(1), group))) for name, group in groupby(pairs, key=itemgetter(0))]
+
+        for name, raws in groups:
+            if not raws:
+                continue
+            values = list(map(float, raws))
+            field = stats.get(name)
+            if field is None:
+                field = stats[name] = FieldStats()
+            field.update(values)
+            counter = flip_counters.get(name)
+            if counter is not None:
+                counter.update(values)
+
+    for name, field in stats.items():
+        if field is not None:
+            analysis.stats[name.decode('ascii')] = field
+
+def analyze_log(path, flip_fields=DEFAULT_FLIP_FIELDS, fields=()):
+    """Analyzes one log. Statistics cover the flip fields plus `fields`; None collects every numeric field."""
+    analysis = LogAnalysis(path, flip_fields)
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        analysis.size = os.fstat(f.fileno()).st_size
+        if analysis.size:
+            # The OS pages the file in and out as the regex walks it; nothing is loaded up front
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                scan(buffer, analysis, fields)
+    analysis.seconds = time.perf_counter() - started
+    return analysis
+
+def format_number(value):
+    # Matches PowerShell's rendering of [Math]::Round(x, 2): 12.5, 10, 0.07
+    return format(round(value, 2), "g")
+
+def print_report(analysis):
+    print(f"Analyzing {analysis.path} ({analysis.size / 1048576:.1f} MB) in {analysis.seconds:.2f}s")
+    for name, counter in analysis.flips.items():
+        print(f"----------------Result: {name}----------------")
+        print(f"Total Data Points: {counter.points}")
+        print(f"Direction Flips: {counter.flips}")
+        if counter.points > 0:
+            print(f"Jitter Severity: {format_number(counter.severity)}%")
+    if analysis.stats:
+        print("----------------Fields----------------")
+        width = max(len(name) for name in analysis.stats)
+        for name, stats in analysis.stats.items():
+            print(f"{name:<{width}}  count={stats.count} mean={stats.mean:.4f} min={stats.min:.4f} "
+                  f"max={stats.max:.4f} p2p={stats.p2p:.4f} rms={stats.rms:.4f} std={stats.std:.4f}")
+
+def expand_paths(patterns):
+    """Shell-style globs are expanded here too, since cmd.exe and PowerShell pass them through."""
+    if not patterns:
+        latest = sorted(glob.glob(LOG_PATTERN), key=os.path.getmtime)
+        return latest[-1:]
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches or [pattern])
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Direction flips, jitter severity and field statistics of physics logs.")
+    parser.add_argument("logs", nargs="*", help=f"log files or globs (default: newest {LOG_PATTERN} here)")
+    parser.add_argument("--flips", action="append", metavar="FIELD",
+                        help="field to count direction flips on; repeatable (default: LineLen)")
+    parser.add_argument("--field", action="append", metavar="FIELD",
+                        help="also collect statistics for this field; repeatable (default: the flip fields only)")
+    parser.add_argument("--all-fields", action="store_true",
+                        help="collect statistics for every numeric field (several times slower)")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per log instead")
+    args = parser.parse_args()
+
+    paths = expand_paths(args.logs)
+    if not paths:
+        print("File not found.")
+        sys.exit(1)
+
+    fields = None if args.all_fields else tuple(args.field or ())
+    failed = False
+    for path in paths:
+        try:
+            analysis = analyze_log(path, tuple(args.flips or DEFAULT_FLIP_FIELDS), fields)
+        except OSError as e:
+            print(f"File not found: {path} ({e.strerror})")
+            failed = True
+            continue
+        if args.json:
+            print(json.dumps(analysis.to_json()))
+        else:
+            print_report(analysis)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
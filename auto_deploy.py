@@ -4,21 +4,137 @@
 自动创建 GitHub 仓库 + 推送代码 + 启用 GitHub Pages
 """
 
+import io
 import os
 import sys
 import subprocess
 import json
-import urllib.request
-import urllib.error
 import time
 import base64
+import asyncio
+import hashlib
+import functools
+import argparse
+import threading
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import credentials
+import generate_dashboard
+from github_client import GitHubClient
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# 上一次成功部署时的构建清单快照，用来算出这次需要推送的文件
+DEPLOY_STATE_PATH = os.path.join(ROOT_DIR, ".deploy_state.json")
+# 就绪轮询：间隔从 0.25 秒起翻倍，最长 4 秒一次；各自有总时长上限
+POLL_INITIAL_SECONDS = 0.25
+POLL_MAX_INTERVAL = 4.0
+REPO_WAIT_SECONDS = 30
+PAGES_WAIT_SECONDS = 60  # 只有 --wait-pages 时才等 Pages 构建，默认部署在推送完成后就结束
+# Git Data API 发布时并发上传 blob 的线程数
+BLOB_UPLOAD_WORKERS = 8
+
+# 仓库（git 公共目录）-> 锁：批量部署里共用一个仓库的站点不能同时改 .git/config，否则会撞上 config.lock
+REPOSITORY_LOCKS = {}
+REPOSITORY_LOCKS_GUARD = threading.Lock()
+
+# 当前所在的部署步骤；asyncio.to_thread 和 gather 会复制上下文，所以线程里的调用也能归到正确的步骤
+CURRENT_STEP = contextvars.ContextVar("deploy_step", default="-")
+
+
+class DeployProfiler:
+    """
+    记录部署过程中的计时事件：步骤（step）、API 请求（api）、本地命令（command）。
+    每个事件是一个 dict，可以写成 JSON lines 文件，方便对比多次运行。
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.events = []
+        self.lock = threading.Lock()
+
+    def record(self, kind, name, duration, **fields):
+        event = {"t": round(time.perf_counter() - self.started - duration, 4), "kind": kind,
+                 "step": CURRENT_STEP.get(), "name": name, "duration": round(duration, 4)}
+        event.update(fields)
+        with self.lock:
+            self.events.append(event)
+        return event
+
+    def api_request(self, client, method, path, data=None, **kwargs):
+        """通过 client 发送一个 API 请求并记录为 api 事件，返回 GitHubResponse"""
+        started = time.perf_counter()
+        response = client.request(method, path, data, **kwargs)
+        self.record("api", method + " " + path, time.perf_counter() - started, status=response.status,
+                    bytes=response.sent + response.received, attempts=response.attempts,
+                    cached=response.from_cache)
+        return response
+
+    @contextlib.contextmanager
+    def step(self, name):
+        token = CURRENT_STEP.set(name)
+        started = time.perf_counter()
+        result = {"status": "ok"}
+        try:
+            yield result
+        except BaseException:
+            result["status"] = "error"
+            raise
+        finally:
+            CURRENT_STEP.reset(token)
+            self.record("step", name, time.perf_counter() - started, status=result["status"])
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": "run", "started_at": self.started_at,
+                                "duration": round(time.perf_counter() - self.started, 4)}) + "\n")
+            for event in sorted(self.events, key=lambda e: e["t"]):
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def print_breakdown(self):
+        """每个步骤的耗时，以及其中 API 请求和本地命令各占多少"""
+        rows = {}
+        for event in self.events:
+            row = rows.setdefault(event["step"] if event["kind"] != "step" else event["name"],
+                                  {"duration": None, "status": "", "api": [0, 0.0], "command": [0, 0.0], "bytes": 0})
+            if event["kind"] == "step":
+                row["duration"] = event["duration"]
+                row["status"] = event["status"]
+            else:
+                row[event["kind"]][0] += 1
+                row[event["kind"]][1] += event["duration"]
+                row["bytes"] += event.get("bytes", 0)
+
+        print("\n【耗时分析】")
+        print("  %-20s %9s %14s %16s %10s  %s" % ("步骤", "耗时(s)", "API 次数/耗时", "命令 次数/耗时", "字节", "状态"))
+        for name, row in rows.items():
+            duration = "-" if row["duration"] is None else "%.2f" % row["duration"]
+            print("  %-20s %9s %5d / %6.2fs %6d / %7.2fs %10d  %s" % (
+                name, duration, row["api"][0], row["api"][1], row["command"][0], row["command"][1],
+                row["bytes"], row["status"]))
+        print("  %-20s %9.2f" % ("合计", time.perf_counter() - self.started))
+
 
 class GitHubAutoDeployer:
-    def __init__(self, username, token, repo_name="qhphysics-docs"):
+    def __init__(self, username, token, repo_name="qhphysics-docs", incremental=False,
+                 api_url="https://api.github.com", api_push=False, profile_path=None,
+                 root_dir=ROOT_DIR, client=None, wait_pages=False):
         self.username = username
         self.token = token
         self.repo_name = repo_name
-        self.api_url = "https://api.github.com"
+        self.api_url = api_url
+        self.incremental = incremental
+        self.api_push = api_push
+        self.profile_path = profile_path  # 把计时事件写成 JSON lines 的文件
+        self.root_dir = root_dir          # 要发布的目录（批量模式下是各站点自己的目录）
+        self.profiler = DeployProfiler()
+        # 所有 API 调用共用一个客户端：连接、认证头和 ETag 缓存都只建一次（批量模式下所有站点共用）
+        self.client = client or GitHubClient(token, username=username, base_url=api_url)
+        self.token_info = None  # credentials.TokenInfo；批量模式下由 BatchDeployer 统一验证后填入
+        self.wait_pages = wait_pages  # 验证时等待本次推送的提交在 Pages 上构建完成
+        self.pushed_commit = None     # 推送到 main 的提交 sha，用来认出这次推送触发的 Pages 构建
 
     def log(self, message, level="INFO"):
         """打印日志"""
@@ -39,7 +155,10 @@ class GitHubAutoDeployer:
             self.log(description, "STEP")
 
         print("  执行: " + cmd + "\n")
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        started = time.perf_counter()
+        result = subprocess.run(cmd, shell=True, cwd=self.root_dir, capture_output=True, text=True)
+        self.profiler.record("command", cmd, time.perf_counter() - started, status=result.returncode,
+                             bytes=len(result.stdout) + len(result.stderr))
 
         if result.stdout:
             print(result.stdout)
@@ -50,52 +169,16 @@ class GitHubAutoDeployer:
 
         return result.returncode == 0, result.stdout, result.stderr
 
-    def make_github_request(self, method, path, data=None):
-        """使用 GitHub API - 仅用内置模块"""
-        url = self.api_url + path
-
-        # 创建 authorization header
-        auth_string = base64.b64encode((self.username + ":" + self.token).encode()).decode()
-
-        print("  " + method + " " + url)
-        if data:
+    def make_github_request(self, method, path, data=None, show_data=True, idempotent=None):
+        """使用 GitHub API - 通过复用连接的 GitHubClient 发送"""
+        print("  " + method + " " + self.api_url + path)
+        if data and show_data:
             print("  数据: " + json.dumps(data, indent=4) + "\n")
 
-        try:
-            if data:
-                req = urllib.request.Request(
-                    url,
-                    data=json.dumps(data).encode(),
-                    headers={
-                        "Authorization": "Basic " + auth_string,
-                        "Accept": "application/vnd.github.v3+json",
-                        "Content-Type": "application/json"
-                    },
-                    method=method
-                )
-            else:
-                req = urllib.request.Request(
-                    url,
-                    headers={
-                        "Authorization": "Basic " + auth_string,
-                        "Accept": "application/vnd.github.v3+json"
-                    },
-                    method=method
-                )
-
-            with urllib.request.urlopen(req, timeout=10) as response:
-                response_data = response.read().decode()
-                status_code = response.status
-                return status_code, json.loads(response_data) if response_data else {}
-        except urllib.error.HTTPError as e:
-            status_code = e.code
-            try:
-                response_data = e.read().decode()
-                return status_code, json.loads(response_data)
-            except:
-                return status_code, {"error": str(e)}
-        except Exception as e:
-            return 0, {"error": str(e)}
+        response = self.profiler.api_request(self.client, method, path, data, idempotent=idempotent)
+        if response.from_cache:
+            print("  (304 未修改，使用缓存)")
+        return response.status, response.data
 
     def create_repository(self):
         """使用 GitHub API 创建仓库"""
@@ -146,16 +229,19 @@ class GitHubAutoDeployer:
 
         remote_url = "https://github.com/" + self.username + "/" + self.repo_name + ".git"
 
-        # 检查 origin 是否存在
-        result = subprocess.run("git remote get-url origin", shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            print("  移除现有的 origin...")
-            subprocess.run("git remote remove origin", shell=True, capture_output=True)
-
-        success, _, _ = self.run_command(
-            'git remote add origin "' + remote_url + '"',
-            "添加远程仓库"
-        )
+        # origin 已存在时只改地址：删掉再添加会连带删除 refs/remotes/origin/main，
+        # 增量推送就没法和上次推送的提交比较了
+        exists, _, _ = self.git("remote", "get-url", "origin")
+        if exists:
+            success, _, _ = self.run_command(
+                'git remote set-url origin "' + remote_url + '"',
+                "更新远程仓库地址"
+            )
+        else:
+            success, _, _ = self.run_command(
+                'git remote add origin "' + remote_url + '"',
+                "添加远程仓库"
+            )
 
         if success:
             self.log("远程仓库: " + remote_url, "SUCCESS")
@@ -168,11 +254,11 @@ class GitHubAutoDeployer:
 
         # 添加文件
         print("  添加所有文件...")
-        subprocess.run("git add .", shell=True, capture_output=True)
+        self.git("add", ".")
 
         # 检查是否有待提交的更改
-        result = subprocess.run("git status --porcelain", shell=True, capture_output=True, text=True)
-        if result.stdout.strip():
+        _, status, _ = self.git("status", "--porcelain")
+        if status.strip():
             print("  创建提交...")
             success, _, _ = self.run_command(
                 'git commit -m "docs: Initial commit - QHPhysics documentation hub"',
@@ -185,7 +271,7 @@ class GitHubAutoDeployer:
 
         # 切换分支
         print("  切换分支到 main...")
-        subprocess.run("git branch -M main", shell=True, capture_output=True)
+        self.git("branch", "-M", "main")
 
         # 推送
         self.log("推送到 GitHub", "STEP")
@@ -198,11 +284,281 @@ class GitHubAutoDeployer:
 
         if success or "main -> main" in stdout:
             self.log("代码推送成功！", "SUCCESS")
+            self.record_pushed_commit()
             return True
         else:
             self.log("推送失败", "ERROR")
             return False
 
+    def git(self, *args, input=None):
+        """直接调用 git（不经过 shell），返回 (是否成功, stdout, stderr)"""
+        started = time.perf_counter()
+        result = subprocess.run(["git", *args], cwd=self.root_dir, input=input, capture_output=True)
+        self.profiler.record("command", "git " + args[0], time.perf_counter() - started, status=result.returncode,
+                             bytes=len(input or b"") + len(result.stdout) + len(result.stderr))
+        return (result.returncode == 0,
+                result.stdout.decode("utf-8", "replace"),
+                result.stderr.decode("utf-8", "replace"))
+
+    def record_pushed_commit(self):
+        ok, stdout, _ = self.git("rev-parse", "HEAD")
+        self.pushed_commit = stdout.strip() if ok else None
+
+    def get_changed_paths(self, manifest, last_manifest):
+        """
+        根据构建清单算出需要推送的路径。每个条目涉及的文件是它的全部产物（HTML、.gz、搜索索引分片，
+        见 generate_dashboard.get_entry_outputs）加上 Markdown 源文件；条目有任何变化（源文件哈希、产物、
+        搜索文档编号或分片；生成器、导航或预压缩设置变化时为全部条目）新旧两份产物都要处理，
+        还在磁盘上的更新，已经不在的删除。
+        重建索引（--force 等）会给页面重新编号，所以只要碰到搜索索引，就把整个搜索目录一起暂存，
+        远端的分片才不会指向错误的页面。
+        返回 (需要更新的路径, 需要删除的路径)。
+        """
+        output_prefix = os.path.relpath(generate_dashboard.OUTPUT_DIR, ROOT_DIR).replace(os.sep, "/") + "/"
+        search_prefix = os.path.relpath(generate_dashboard.SEARCH_DIR, ROOT_DIR).replace(os.sep, "/") + "/"
+
+        def paths(key, entry, precompress):
+            # 索引页、样式表等内部条目没有源文件
+            result = [output_prefix + p for p in generate_dashboard.get_entry_outputs(entry, precompress)]
+            if not key.startswith("__"):
+                result.append(key)
+            return result
+
+        pages = manifest["pages"]
+        old_pages = last_manifest["pages"] if last_manifest else {}
+        precompress = bool(manifest.get("precompress"))
+        old_precompress = bool(last_manifest.get("precompress")) if last_manifest else False
+        rebuilt = (not last_manifest or last_manifest.get("generator") != manifest.get("generator")
+                   or last_manifest.get("nav") != manifest.get("nav") or old_precompress != precompress)
+
+        touched = {}
+        for key in list(pages) + [k for k in old_pages if k not in pages]:
+            entry, old_entry = pages.get(key), old_pages.get(key)
+            new_paths = paths(key, entry, precompress) if entry else []
+            old_paths = paths(key, old_entry, old_precompress) if old_entry else []
+            if rebuilt or old_entry != entry or old_paths != new_paths:
+                touched.update(dict.fromkeys(new_paths + old_paths))
+
+        if any(p.startswith(search_prefix) for p in touched):
+            search_paths = [p for key, entry in pages.items() for p in paths(key, entry, precompress)]
+            search_paths += [p for key, entry in old_pages.items() for p in paths(key, entry, old_precompress)]
+            if os.path.isdir(generate_dashboard.SEARCH_DIR):
+                search_paths += [search_prefix + name for name in sorted(os.listdir(generate_dashboard.SEARCH_DIR))
+                                 if name.endswith(".json")]
+            touched.update(dict.fromkeys(p for p in search_paths if p.startswith(search_prefix)))
+
+        changed = [p for p in touched if os.path.exists(os.path.join(ROOT_DIR, p))]
+        removed = [p for p in touched if not os.path.exists(os.path.join(ROOT_DIR, p))]
+        return changed, removed
+
+    def count_push_objects(self, remote_ref):
+        """统计本次推送包含的对象数量和字节数（未压缩大小）"""
+        ok, _, _ = self.git("rev-parse", "--verify", "--quiet", remote_ref)
+        revisions = ["HEAD", "--not", remote_ref] if ok else ["HEAD"]
+        ok, objects, _ = self.git("rev-list", "--objects", *revisions)
+        if not ok:
+            return 0, 0
+        object_ids = [line.split(" ", 1)[0] for line in objects.splitlines() if line]
+        if not object_ids:
+            return 0, 0
+        # 一次批量查询所有对象大小
+        ok, sizes, _ = self.git("cat-file", "--batch-check=%(objectsize)",
+                                input=("\n".join(object_ids) + "\n").encode())
+        total = sum(int(size) for size in sizes.split()) if ok else 0
+        return len(object_ids), total
+
+    def push_changed(self):
+        """
+        增量推送：只暂存构建清单里变化的文件（一次 git update-index 批量调用），
+        而不是每次 git add 整个站点。
+        """
+        self.log("准备增量推送", "STEP")
+
+        if os.path.normcase(os.path.abspath(self.root_dir)) != os.path.normcase(ROOT_DIR):
+            self.log("增量推送只支持本仓库的构建清单，改为完整推送", "WARNING")
+            return self.push_code()
+
+        manifest = generate_dashboard.load_manifest()
+        if manifest is None:
+            self.log("没有找到构建清单，改为完整推送（先运行 generate_dashboard.py）", "WARNING")
+            return self.push_code()
+
+        try:
+            with open(DEPLOY_STATE_PATH, "r", encoding="utf-8") as f:
+                last_manifest = json.load(f)
+        except (OSError, ValueError):
+            last_manifest = None
+
+        changed, removed = self.get_changed_paths(manifest, last_manifest)
+        print("  变化的文件: " + str(len(changed)) + "，删除的文件: " + str(len(removed)))
+
+        if changed or removed:
+            # --remove 让已删除的路径从索引中移除；-z 路径以 NUL 分隔，避免中文文件名被转义
+            stdin = "".join(p + "\0" for p in changed + removed).encode("utf-8")
+            ok, _, stderr = self.git("update-index", "--add", "--remove", "-z", "--stdin", input=stdin)
+            if not ok:
+                self.log("暂存失败: " + stderr.strip(), "ERROR")
+                return False
+
+        ok, _, _ = self.git("diff", "--cached", "--quiet")
+        if ok:
+            self.log("没有待提交的更改", "WARNING")
+        else:
+            message = "docs: Update " + str(len(changed) + len(removed)) + " files"
+            ok, _, stderr = self.git("commit", "-q", "-m", message)
+            if not ok:
+                self.log("提交失败: " + stderr.strip(), "ERROR")
+                return False
+
+        objects, size = self.count_push_objects("refs/remotes/origin/main")
+
+        self.log("推送到 GitHub", "STEP")
+        ok, stdout, stderr = self.git("push", "-u", "origin", "HEAD:main")
+        if not ok:
+            print("错误: " + stderr)
+            self.log("推送失败", "ERROR")
+            return False
+
+        self.log("代码推送成功！推送了 " + str(objects) + " 个对象，共 " +
+                 "{:.1f}".format(size / 1024) + " KB（未压缩）", "SUCCESS")
+        self.record_pushed_commit()
+
+        with open(DEPLOY_STATE_PATH, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        return True
+
+    # ------------------------------------------------------------------
+    # 通过 Git Data API 发布（不需要 git 凭据）
+    # ------------------------------------------------------------------
+    def list_publish_files(self):
+        """要发布的文件：与 git add . 相同的范围（已跟踪 + 未被忽略的新文件）"""
+        ok, stdout, _ = self.git("ls-files", "-z", "--cached", "--others", "--exclude-standard")
+        if ok:
+            paths = sorted(set(p for p in stdout.split("\0") if p))
+        else:
+            # 不是 git 仓库（例如 CI 里解压出来的目录），直接遍历
+            paths = []
+            for root, dirs, files in os.walk(self.root_dir):
+                dirs[:] = [d for d in dirs if not d.startswith(".") and d != "__pycache__"]
+                for name in files:
+                    paths.append(os.path.relpath(os.path.join(root, name), self.root_dir).replace(os.sep, "/"))
+            paths.sort()
+        return [p for p in paths if os.path.isfile(os.path.join(self.root_dir, p))]
+
+    def hash_local_files(self):
+        """返回 {路径: (blob sha1, 文件模式)}；sha1 与 git hash-object 相同"""
+        entries = {}
+        for path in self.list_publish_files():
+            full_path = os.path.join(self.root_dir, path)
+            with open(full_path, "rb") as f:
+                data = f.read()
+            sha = hashlib.sha1(b"blob " + str(len(data)).encode() + b"\0" + data).hexdigest()
+            mode = "100755" if os.stat(full_path).st_mode & 0o111 else "100644"
+            entries[path] = (sha, mode)
+        return entries
+
+    def get_remote_tree(self, repo_path):
+        """返回 (分支头 commit sha, 根 tree sha, {路径: (blob sha, 模式)})；空仓库返回 (None, None, {})"""
+        status, ref = self.make_github_request("GET", repo_path + "/git/ref/heads/main")
+        if status != 200:
+            return None, None, {}
+        head = ref["object"]["sha"]
+        status, commit = self.make_github_request("GET", repo_path + "/git/commits/" + head)
+        if status != 200:
+            return head, None, {}
+        tree_sha = commit["tree"]["sha"]
+        status, tree = self.make_github_request("GET", repo_path + "/git/trees/" + tree_sha + "?recursive=1")
+        if status != 200:
+            return head, tree_sha, {}
+        if tree.get("truncated"):
+            self.log("远端目录树过大被截断，按全部缺失处理", "WARNING")
+            return head, tree_sha, {}
+        return head, tree_sha, {e["path"]: (e["sha"], e["mode"]) for e in tree["tree"] if e["type"] == "blob"}
+
+    def upload_blob(self, repo_path, path, sha):
+        with open(os.path.join(self.root_dir, path), "rb") as f:
+            content = base64.b64encode(f.read()).decode()
+        # blob 按内容寻址，重复上传得到同一个 sha，所以出错时可以放心重试
+        status, response = self.make_github_request(
+            "POST", repo_path + "/git/blobs", {"content": content, "encoding": "base64"}, show_data=False,
+            idempotent=True)
+        if status != 201 or response.get("sha") != sha:
+            return "上传 " + path + " 失败: " + str(status)
+        return None
+
+    def push_via_api(self):
+        """
+        纯 REST 发布：计算本地文件的 blob sha1，与远端 main 分支的目录树比较，
+        只把远端没有的 blob 用有上限的线程池并发上传，然后一次创建 tree + commit 并更新分支。
+        """
+        self.log("通过 Git Data API 发布", "STEP")
+        repo_path = "/repos/" + self.username + "/" + self.repo_name
+
+        local = self.hash_local_files()
+        head, _, remote = self.get_remote_tree(repo_path)
+        if local == remote:
+            self.pushed_commit = head
+            self.log("远端已是最新，没有需要发布的更改", "SUCCESS")
+            return True
+
+        if head is None:
+            # 完全空的仓库不接受 Git Data API 写入，先用 contents API 建一个初始提交
+            status, _ = self.make_github_request("PUT", repo_path + "/contents/.nojekyll",
+                                                 {"message": "Initial commit", "content": ""})
+            if status not in (200, 201):
+                self.log("初始化空仓库失败: " + str(status), "ERROR")
+                return False
+            head, _, remote = self.get_remote_tree(repo_path)
+
+        remote_shas = set(sha for sha, _ in remote.values())
+        missing = {}
+        for path, (sha, _) in local.items():
+            if sha not in remote_shas:
+                missing.setdefault(sha, path)  # 内容相同的文件只上传一次
+        removed = [p for p in remote if p not in local]
+        print("  本地文件: " + str(len(local)) + "，需要上传: " + str(len(missing)) +
+              "，删除: " + str(len(removed)) + "\n")
+
+        upload_size = sum(os.path.getsize(os.path.join(self.root_dir, p)) for p in missing.values())
+        # 线程池的线程不继承上下文（当前步骤、批量模式下的站点输出），每个任务在当前上下文的副本里运行
+        context = contextvars.copy_context()
+
+        def upload(item):
+            return context.copy().run(self.upload_blob, repo_path, item[1], item[0])
+
+        with ThreadPoolExecutor(max_workers=BLOB_UPLOAD_WORKERS) as pool:
+            errors = [e for e in pool.map(upload, missing.items()) if e]
+        if errors:
+            for error in errors:
+                self.log(error, "ERROR")
+            return False
+
+        # 不用 base_tree，直接给出完整目录树，删除的文件自然不在其中
+        tree = [{"path": path, "mode": mode, "type": "blob", "sha": sha}
+                for path, (sha, mode) in sorted(local.items())]
+        status, response = self.make_github_request("POST", repo_path + "/git/trees", {"tree": tree}, show_data=False)
+        if status != 201:
+            self.log("创建目录树失败: " + str(status), "ERROR")
+            return False
+
+        message = "docs: Update " + str(len(missing) + len(removed)) + " files"
+        status, response = self.make_github_request("POST", repo_path + "/git/commits", {
+            "message": message, "tree": response["sha"], "parents": [head]})
+        if status != 201:
+            self.log("创建提交失败: " + str(status), "ERROR")
+            return False
+
+        commit = response["sha"]
+        status, _ = self.make_github_request("PATCH", repo_path + "/git/refs/heads/main", {"sha": commit})
+        if status != 200:
+            self.log("更新分支失败: " + str(status), "ERROR")
+            return False
+        self.pushed_commit = commit
+
+        self.log("发布成功！上传了 " + str(len(missing)) + " 个 blob，共 " +
+                 "{:.1f}".format(upload_size / 1024) + " KB", "SUCCESS")
+        return True
+
     def enable_github_pages(self):
         """启用 GitHub Pages"""
         self.log("启用 GitHub Pages", "STEP")
@@ -228,26 +584,99 @@ class GitHubAutoDeployer:
             self.log("启用失败: " + str(status), "WARNING")
             return True  # 继续，不认为这是致命错误
 
-    def verify_deployment(self):
-        """验证部署"""
+    async def verify_deployment(self):
+        """
+        验证部署：确认仓库存在。--wait-pages 时再轮询最近一次 Pages 构建（有上限），
+        只有构建的提交就是这次推送的提交才算数；GET /pages 的 built 可能还是上一次构建的状态。
+        """
         self.log("验证部署", "STEP")
 
-        # 等一下让 GitHub 处理
-        print("  等待 GitHub 处理文件（3秒）...\n")
-        time.sleep(3)
-
-        # 检查仓库
-        path = "/repos/" + self.username + "/" + self.repo_name
-        status, response = self.make_github_request("GET", path)
-
-        if status == 200:
+        if await asyncio.to_thread(self.get_repository_status) == 200:
             self.log("仓库确认存在", "SUCCESS")
+
+        if not self.wait_pages:
+            print("  不等待 Pages 构建（需要确认时加 --wait-pages）")
+            return True
+        if not self.pushed_commit:
+            self.log("不知道推送的提交，无法确认 Pages 构建", "WARNING")
             return True
 
+        path = "/repos/" + self.username + "/" + self.repo_name + "/pages/builds/latest"
+
+        def build_finished():
+            status, response = self.make_github_request("GET", path)
+            if status != 200 or response.get("commit") != self.pushed_commit:
+                return None
+            if response.get("status") not in ("built", "errored"):
+                return None
+            return response["status"]
+
+        print("  等待提交 " + self.pushed_commit[:7] + " 的 Pages 构建（最多 " + str(PAGES_WAIT_SECONDS) + " 秒）...\n")
+        result = await self.poll("等待 Pages 构建", build_finished, PAGES_WAIT_SECONDS)
+        if result == "built":
+            self.log("GitHub Pages 构建完成", "SUCCESS")
+        elif result == "errored":
+            self.log("GitHub Pages 构建失败，请到仓库设置里查看", "WARNING")
         return True
 
+    def get_repository_status(self):
+        status, _ = self.make_github_request("GET", "/repos/" + self.username + "/" + self.repo_name)
+        return status
+
+    async def poll(self, description, check, timeout):
+        """
+        有界指数退避轮询：在线程里调用 check()，返回真值即就绪。
+        间隔从 POLL_INITIAL_SECONDS 开始翻倍，不超过 POLL_MAX_INTERVAL；超时返回 None
+        """
+        deadline = time.monotonic() + timeout
+        delay = POLL_INITIAL_SECONDS
+        while True:
+            result = await asyncio.to_thread(check)
+            if result:
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.log(description + "超时（" + str(timeout) + " 秒）", "WARNING")
+                return None
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX_INTERVAL)
+
+    async def prepare_repository(self):
+        """创建仓库，并轮询直到 API 能查到它"""
+        with self.profiler.step("create_repository") as step:
+            ready = await asyncio.to_thread(self.create_repository) and await self.poll(
+                "等待仓库就绪", lambda: self.get_repository_status() == 200, REPO_WAIT_SECONDS)
+            if not ready:
+                step["status"] = "failed"
+            return bool(ready)
+
+    def repository_lock(self):
+        """root_dir 所在仓库的锁（工作树共用主仓库的 config，按公共目录区分）"""
+        ok, stdout, _ = self.git("rev-parse", "--git-common-dir")
+        git_dir = os.path.join(self.root_dir, stdout.strip()) if ok else self.root_dir
+        key = os.path.normcase(os.path.realpath(git_dir))
+        with REPOSITORY_LOCKS_GUARD:
+            return REPOSITORY_LOCKS.setdefault(key, threading.Lock())
+
+    def prepare_local(self):
+        """配置 Git 和远程；两步都写 .git/config，只能先后执行，并且和共用仓库的其他站点错开"""
+        with self.profiler.step("setup_git") as step, self.repository_lock():
+            if not self.setup_git_config():
+                self.log("配置 Git 失败，中止部署", "ERROR")
+                step["status"] = "failed"
+                return False
+            if not self.setup_remote():
+                self.log("配置远程失败，中止部署", "ERROR")
+                step["status"] = "failed"
+                return False
+            return True
+
     def deploy(self):
         """执行完整部署流程"""
+        return asyncio.run(self.run())
+
+    async def run(self):
+        """部署并在结束时打印耗时分析（批量模式下由 BatchDeployer 在同一个事件循环里调用）"""
         print("=" * 70)
         print("  QHPhysics 文档自动部署系统")
         print("=" * 70)
@@ -256,36 +685,69 @@ class GitHubAutoDeployer:
         print("✓ Token: " + self.token[:20] + "..." + self.token[-10:])
         print()
 
-        # 步骤 1：创建仓库
-        if not self.create_repository():
-            self.log("创建仓库失败，中止部署", "ERROR")
+        try:
+            return await self.deploy_async()
+        finally:
+            credentials.record_rate_limit(self.username, self.token, self.client.rate_limit, self.api_url)
+            self.profiler.print_breakdown()
+            if self.profile_path:
+                self.profiler.write(self.profile_path)
+                print("\n计时事件已写入: " + self.profile_path)
+
+    async def run_step(self, name, func):
+        """在线程里运行一个同步步骤并计时；返回 False 的步骤记为 failed"""
+        with self.profiler.step(name) as step:
+            ok = await asyncio.to_thread(func)
+            if not ok:
+                step["status"] = "failed"
+            return ok
+
+    def check_credentials(self):
+        """在任何 git 操作之前验证 token（使用 credentials 缓存，一小时内不重复请求）"""
+        if self.token_info is None:
+            self.token_info = credentials.validate_token(
+                self.username, self.token, client=self.client, api_url=self.api_url,
+                request=functools.partial(self.profiler.api_request, self.client))
+        info = self.token_info
+        problem = info.problem()
+        if problem:
+            self.log(problem, "ERROR")
             return False
+        self.log("Token 有效（" + str(info.login) + (", 缓存结果" if info.from_cache else "") + "）", "SUCCESS")
+        return True
 
-        time.sleep(1)
-
-        # 步骤 2：配置 Git
-        if not self.setup_git_config():
-            self.log("配置 Git 失败，中止部署", "ERROR")
+    async def deploy_async(self):
+        if not await self.run_step("check_token", self.check_credentials):
+            self.log("Token 不可用，中止部署", "ERROR")
             return False
 
-        # 步骤 3：配置远程
-        if not self.setup_remote():
-            self.log("配置远程失败，中止部署", "ERROR")
+        # 步骤 1-3：远端建仓库与本地 Git 配置互不依赖，同时进行（API 发布不需要本地 Git 配置）
+        repo_ready, local_ready = await asyncio.gather(
+            self.prepare_repository(),
+            asyncio.to_thread(lambda: self.api_push or self.prepare_local()),
+        )
+        if not repo_ready:
+            self.log("创建仓库失败，中止部署", "ERROR")
+            return False
+        if not local_ready:
             return False
 
-        # 步骤 4：推送代码
-        if not self.push_code():
+        # 步骤 4：推送代码（增量模式只推送构建清单里变化的文件；API 模式只上传远端缺少的 blob）
+        if self.api_push:
+            push = self.push_via_api
+        else:
+            push = self.push_changed if self.incremental else self.push_code
+        if not await self.run_step("push", push):
             self.log("推送代码失败，中止部署", "ERROR")
             return False
 
-        time.sleep(2)
-
-        # 步骤 5：启用 GitHub Pages
-        if not self.enable_github_pages():
+        # 步骤 5：启用 GitHub Pages（push 返回时分支已经存在，不用再等）
+        if not await self.run_step("enable_pages", self.enable_github_pages):
             self.log("启用 GitHub Pages 失败，但代码已推送", "WARNING")
 
         # 步骤 6：验证
-        self.verify_deployment()
+        with self.profiler.step("verify"):
+            await self.verify_deployment()
 
         # 完成
         self.print_summary()
@@ -319,24 +781,206 @@ class GitHubAutoDeployer:
         print("2. 访问上面的网站地址")
         print("3. 享受你的文档！")
 
+        print("\n【API 调用】")
+        print("请求 " + str(self.client.request_count) + " 次，新建连接 " + str(self.client.connection_count) + " 个")
+        if "remaining" in self.client.rate_limit:
+            print("剩余配额: " + str(self.client.rate_limit["remaining"]) + "/" + str(self.client.rate_limit.get("limit", "?")))
+
+
+# 批量模式下每个站点的输出先写进自己的缓冲区，站点完成后整段打印，避免多个站点的日志交错
+SITE_OUTPUT = contextvars.ContextVar("site_output", default=None)
+
+
+class SiteStdout:
+    """替换 sys.stdout：当前上下文属于某个站点时写进它的缓冲区，否则写到原来的输出"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def target(self):
+        buffer = SITE_OUTPUT.get()
+        return buffer if buffer is not None else self.stream
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def isatty(self):
+        # 站点的输出先进缓冲区，不是终端
+        return self.target().isatty()
+
+    def fileno(self):
+        # 缓冲区没有文件描述符，io.UnsupportedOperation 和 StringIO 一致
+        return self.target().fileno()
+
+    @property
+    def encoding(self):
+        # 缓冲区的内容最后写到原来的输出，编码以它为准
+        return self.stream.encoding
+
+
+class BatchDeployer:
+    """
+    按清单并发部署多个站点。清单是一个 JSON 文件：
+      {"sites": [{"repo": "qhphysics-docs", "root": ".", "mode": "api", "wait_pages": false}, ...]}
+    root 相对于清单文件所在目录；mode 可以是 git（默认）、incremental 或 api；
+    wait_pages 省略时取命令行的 --wait-pages。
+    所有站点共用一个连接池客户端，token 只验证一次，同时运行的站点数不超过 max_parallel。
+    """
+
+    def __init__(self, username, token, manifest_path, max_parallel=3,
+                 api_url="https://api.github.com", profile_path=None, wait_pages=False):
+        self.username = username
+        self.token = token
+        self.max_parallel = max_parallel
+        self.api_url = api_url
+        self.profile_path = profile_path
+        self.client = GitHubClient(token, username=username, base_url=api_url,
+                                   pool_size=max_parallel * BLOB_UPLOAD_WORKERS)
+        self.profiler = DeployProfiler()  # 不属于任何站点的事件（token 验证）
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self.deployers = []
+        for site in manifest["sites"]:
+            mode = site.get("mode", "git")
+            if mode not in ("git", "incremental", "api"):
+                raise ValueError("未知的部署模式: " + mode + "（站点 " + site["repo"] + "）")
+            self.deployers.append(GitHubAutoDeployer(
+                username, token, repo_name=site["repo"], api_url=api_url,
+                incremental=(mode == "incremental"), api_push=(mode == "api"),
+                root_dir=os.path.normpath(os.path.join(base_dir, site.get("root", "."))),
+                client=self.client, wait_pages=site.get("wait_pages", wait_pages)))
+
+    def validate_token(self):
+        """所有站点共用一次 token 验证（同样走 credentials 缓存）"""
+        print("验证 token...")
+        with self.profiler.step("check_token"):
+            info = credentials.validate_token(
+                self.username, self.token, client=self.client, api_url=self.api_url,
+                request=functools.partial(self.profiler.api_request, self.client))
+        problem = info.problem()
+        if problem:
+            print("❌ " + problem)
+            return False
+        if info.login.lower() != self.username.lower():
+            print("⚠️  Token 属于 " + info.login + "，不是 " + self.username)
+        print("✓ Token 有效（" + info.login + (", 缓存结果" if info.from_cache else "") + "）")
+        for deployer in self.deployers:
+            deployer.token_info = info
+        return True
+
+    async def deploy_site(self, deployer, semaphore):
+        async with semaphore:
+            buffer = io.StringIO()
+            SITE_OUTPUT.set(buffer)
+            started = time.perf_counter()
+            try:
+                ok = await deployer.run()
+            except Exception as e:
+                print("❌ 部署出错: " + repr(e))
+                ok = False
+            duration = time.perf_counter() - started
+            SITE_OUTPUT.set(None)
+
+            print("\n" + "#" * 70)
+            print("# " + deployer.repo_name + "（" + deployer.root_dir + "）")
+            print("#" * 70)
+            sys.stdout.stream.write(buffer.getvalue())
+            return ok, duration
+
+    async def deploy_all(self):
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        # gather 为每个站点建一个任务，各自持有一份上下文副本
+        return await asyncio.gather(*(self.deploy_site(d, semaphore) for d in self.deployers))
+
+    def run(self):
+        started = time.perf_counter()
+        if not self.validate_token():
+            return False
+
+        real_stdout = sys.stdout
+        sys.stdout = SiteStdout(real_stdout)
+        try:
+            results = asyncio.run(self.deploy_all())
+        finally:
+            sys.stdout = real_stdout
+            self.client.close()
+
+        self.print_report(results, time.perf_counter() - started)
+        if self.profile_path:
+            self.write_profile()
+            print("\n计时事件已写入: " + self.profile_path)
+        return all(ok for ok, _ in results)
+
+    def print_report(self, results, total):
+        print("\n" + "=" * 70)
+        print("  批量部署报告")
+        print("=" * 70)
+        print("  %-28s %-12s %8s %6s %12s  %s" % ("仓库", "模式", "耗时(s)", "API", "字节", "结果"))
+        for deployer, (ok, duration) in zip(self.deployers, results):
+            mode = "api" if deployer.api_push else "incremental" if deployer.incremental else "git"
+            api_events = [e for e in deployer.profiler.events if e["kind"] == "api"]
+            size = sum(e.get("bytes", 0) for e in deployer.profiler.events if e["kind"] != "step")
+            print("  %-28s %-12s %8.2f %6d %12d  %s" % (deployer.repo_name, mode, duration, len(api_events),
+                                                       size, "✓ 成功" if ok else "❌ 失败"))
+        slowest = max((duration for _, duration in results), default=0)
+        print("\n  站点: " + str(len(results)) + "，成功: " + str(sum(1 for ok, _ in results if ok)) +
+              "，总耗时: " + "{:.2f}".format(total) + " 秒（最慢站点 " + "{:.2f}".format(slowest) + " 秒，" +
+              "并发上限 " + str(self.max_parallel) + "）")
+        print("  API 请求 " + str(self.client.request_count) + " 次，新建连接 " + str(self.client.connection_count) + " 个")
+
+    def write_profile(self):
+        """所有站点的事件写进一个文件，每个事件带上 site 字段（批量部署自己的事件 site 为 null）"""
+        with open(self.profile_path, "w", encoding="utf-8") as f:
+            runs = [(None, self.profiler)] + [(d.repo_name, d.profiler) for d in self.deployers]
+            for site, profiler in runs:
+                f.write(json.dumps({"kind": "run", "site": site,
+                                    "started_at": profiler.started_at}, ensure_ascii=False) + "\n")
+                for event in sorted(profiler.events, key=lambda e: e["t"]):
+                    f.write(json.dumps(dict(event, site=site), ensure_ascii=False) + "\n")
+
 
 def main():
-    if len(sys.argv) < 3:
-        print("使用方法：")
-        print("  python auto_deploy.py <username> <token>")
-        print("\n例如：")
-        print("  python auto_deploy.py wangxun111 github_pat_11BDJRTCQ0...")
-        sys.exit(1)
-
-    username = sys.argv[1]
-    token = sys.argv[2]
-
-    deployer = GitHubAutoDeployer(username, token)
-
-    if deployer.deploy():
-        sys.exit(0)
-    else:
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="自动创建 GitHub 仓库 + 推送代码 + 启用 GitHub Pages",
+        epilog="例如：python auto_deploy.py wangxun111 github_pat_11BDJRTCQ0..."
+    )
+    parser.add_argument("username", help="GitHub 用户名")
+    parser.add_argument("token", help="GitHub Personal Access Token")
+    parser.add_argument("--repo", default="qhphysics-docs", help="仓库名称（默认 qhphysics-docs）")
+    parser.add_argument("--batch", metavar="SITES_JSON",
+                        help="按清单并发部署多个站点（格式见 BatchDeployer）")
+    parser.add_argument("--max-parallel", type=int, default=3, help="批量模式下同时部署的站点数")
+    parser.add_argument("--incremental", action="store_true",
+                        help="只推送构建清单中自上次部署以来变化的文件")
+    parser.add_argument("--api-url", default="https://api.github.com",
+                        help="GitHub API 地址（测试时可指向 mock_github_server.py）")
+    parser.add_argument("--api-push", action="store_true",
+                        help="不用 git push，通过 Git Data API 只上传变化的文件（无需 git 凭据）")
+    parser.add_argument("--wait-pages", action="store_true",
+                        help="推送后等待这次提交的 GitHub Pages 构建完成（最多 " + str(PAGES_WAIT_SECONDS) + " 秒）")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="把每个步骤、API 请求和本地命令的计时事件写入 FILE（JSON lines）")
+    args = parser.parse_args()
+
+    if args.batch:
+        batch = BatchDeployer(args.username, args.token, args.batch, max_parallel=args.max_parallel,
+                              api_url=args.api_url, profile_path=args.profile, wait_pages=args.wait_pages)
+        sys.exit(0 if batch.run() else 1)
+
+    deployer = GitHubAutoDeployer(args.username, args.token, repo_name=args.repo, incremental=args.incremental,
+                                  api_url=args.api_url, api_push=args.api_push, profile_path=args.profile,
+                                  wait_pages=args.wait_pages)
+
+    try:
+        ok = deployer.deploy()
+    finally:
+        deployer.client.close()
+    sys.exit(0 if ok else 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+GitHub Token 验证结果缓存 - 仅使用 Python 内置模块
+通过 /user 验证一次 token，把登录名、作用域、过期时间和剩余配额按 token 指纹缓存在本地文件里，
+有效期内 verify_token.py、auto_deploy.py 和 deploy_github.py 直接复用，不再重复请求。
+缓存里不保存 token 本身。
+"""
+
+import os
+import json
+import time
+import hashlib
+import calendar
+import threading
+
+from github_client import GitHubClient
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.path.join(ROOT_DIR, ".credentials_cache.json")
+CACHE_VERSION = 1
+CACHE_TTL = 3600  # 秒
+DEFAULT_API_URL = "https://api.github.com"
+
+
+class TokenInfo:
+    """一次 token 验证的结果（可能来自缓存）"""
+
+    FIELDS = ("status", "message", "login", "name", "public_repos", "scopes",
+              "expires_at", "rate_limit", "checked_at")
+
+    def __init__(self, status, message="", login=None, name=None, public_repos=0, scopes=None,
+                 expires_at=None, rate_limit=None, checked_at=None, from_cache=False):
+        self.status = status              # /user 的 HTTP 状态码，0 表示网络错误
+        self.message = message
+        self.login = login
+        self.name = name
+        self.public_repos = public_repos
+        self.scopes = scopes              # 经典 token 的作用域列表；细粒度 token 没有这个信息，为 None
+        self.expires_at = expires_at      # token 过期时间（epoch 秒），没有过期时间为 None
+        self.rate_limit = rate_limit or {}
+        self.checked_at = checked_at or time.time()
+        self.from_cache = from_cache
+
+    @property
+    def valid(self):
+        return self.status == 200 and not self.expired
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+    def to_json(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def remaining_requests(self):
+        """缓存的剩余配额；配额已经重置时返回 None（表示不受限制）"""
+        if "remaining" not in self.rate_limit or self.rate_limit.get("reset", 0) <= time.time():
+            return None
+        return self.rate_limit["remaining"]
+
+    def problem(self, need_repo_scope=True):
+        """部署前检查：返回一条阻止部署的原因，没有问题返回 None"""
+        if self.status != 200:
+            return "Token 验证失败（" + str(self.status) + "）: " + (self.message or "")
+        if self.expired:
+            return "Token 已于 " + time.strftime("%Y-%m-%d %H:%M", time.localtime(self.expires_at)) + " 过期"
+        if need_repo_scope and self.scopes is not None and not {"repo", "public_repo"} & set(self.scopes):
+            return "Token 缺少 'repo' 或 'public_repo' 权限（当前: " + (", ".join(self.scopes) or "无") + "）"
+        if self.remaining_requests() == 0:
+            reset = time.strftime("%H:%M:%S", time.localtime(self.rate_limit["reset"]))
+            return "API 配额已用完，" + reset + " 重置"
+        return None
+
+
+def token_fingerprint(username, token, api_url=DEFAULT_API_URL):
+    return hashlib.sha256((api_url + "\0" + username.lower() + "\0" + token).encode()).hexdigest()[:32]
+
+
+def load_cache():
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("tokens", {})
+
+
+def save_cache(entries):
+    # 先写临时文件再替换，并发的部署进程不会读到写了一半的文件
+    temp_path = CACHE_PATH + ".tmp" + str(os.getpid()) + "." + str(threading.get_ident())
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "tokens": entries}, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, CACHE_PATH)
+
+
+def parse_expiration(value):
+    """GitHub-Authentication-Token-Expiration 头，例如 '2026-11-01 12:00:00 UTC'"""
+    if not value:
+        return None
+    for pattern in ("%Y-%m-%d %H:%M:%S UTC", "%Y-%m-%d %H:%M:%S %z"):
+        try:
+            parsed = time.strptime(value.strip(), pattern)
+        except ValueError:
+            continue
+        return calendar.timegm(parsed) - (parsed.tm_gmtoff or 0)
+    return None
+
+
+def validate_token(username, token, client=None, api_url=DEFAULT_API_URL, ttl=CACHE_TTL, refresh=False,
+                   request=None):
+    """
+    返回 TokenInfo。缓存未过期时不发请求；refresh=True 强制重新验证。
+    只缓存确定的结果（200 和 401），网络错误和限流不缓存。
+    request 用来代替 client.request 发送 /user 请求，例如部署时记录计时的包装。
+    """
+    key = token_fingerprint(username, token, api_url)
+    entries = load_cache()
+    entry = entries.get(key)
+    if entry and not refresh and time.time() - entry.get("checked_at", 0) < ttl:
+        return TokenInfo(from_cache=True, **entry)
+
+    own_client = client is None
+    if own_client:
+        client = GitHubClient(token, username=username, base_url=api_url)
+    try:
+        response = (request or client.request)("GET", "/user", cache=False)
+    finally:
+        if own_client:
+            client.close()
+
+    data = response.data if isinstance(response.data, dict) else {}
+    scopes = response.headers.get("x-oauth-scopes")
+    info = TokenInfo(
+        response.status,
+        message=data.get("message") or data.get("error", ""),
+        login=data.get("login"),
+        name=data.get("name"),
+        public_repos=data.get("public_repos", 0),
+        scopes=[s.strip() for s in scopes.split(",") if s.strip()] if scopes is not None else None,
+        expires_at=parse_expiration(response.headers.get("github-authentication-token-expiration")),
+        rate_limit=dict(client.rate_limit),
+    )
+
+    if info.status in (200, 401):
+        entries = {k: v for k, v in entries.items() if time.time() - v.get("checked_at", 0) < ttl}
+        entries[key] = info.to_json()
+        save_cache(entries)
+    return info
+
+
+def record_rate_limit(username, token, rate_limit, api_url=DEFAULT_API_URL):
+    """部署结束后把最新的配额写回缓存，下一次运行据此判断配额是否够用"""
+    if not rate_limit:
+        return
+    key = token_fingerprint(username, token, api_url)
+    entries = load_cache()
+    if key in entries:
+        entries[key]["rate_limit"] = dict(rate_limit)
+        save_cache(entries)
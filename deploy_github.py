@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 QHPhysics 文档自动部署到 GitHub Pages
-使用方法：python deploy_github.py wangxun111
+使用方法：python deploy_github.py wangxun111 [token]
+提供 token（参数或 GITHUB_TOKEN 环境变量）时，在任何 git 操作之前先验证它
 """
 
 import os
@@ -9,6 +10,8 @@ import sys
 import subprocess
 import json
 
+import credentials
+
 def run_command(cmd, description=""):
     """运行命令并显示结果"""
     if description:
@@ -29,10 +32,11 @@ def main():
     if len(sys.argv) < 2:
         print("❌ 错误：需要提供 GitHub 用户名")
         print("\n使用方法：")
-        print("  python deploy_github.py wangxun111")
+        print("  python deploy_github.py wangxun111 [token]")
         sys.exit(1)
 
     username = sys.argv[1]
+    token = sys.argv[2] if len(sys.argv) > 2 else os.environ.get("GITHUB_TOKEN")
     repo_name = "qhphysics-docs"
 
     print("=" * 60)
@@ -43,6 +47,18 @@ def main():
     print(f"✓ 远程 URL: https://github.com/{username}/{repo_name}.git")
     print()
 
+    # Step 0: 验证 Token（一小时内验证过的使用缓存结果，不再请求）
+    if token:
+        print("【Step 0】验证 Token")
+        info = credentials.validate_token(username, token)
+        problem = info.problem()
+        if problem:
+            print(f"❌ {problem}")
+            print("请运行 python verify_token.py <username> <token> 查看详情")
+            sys.exit(1)
+        cached = "（缓存结果）" if info.from_cache else ""
+        print(f"✓ Token 有效：{info.login}{cached}\n")
+
     # Step 1: 检查 Git
     print("【Step 1】检查 Git")
     result = subprocess.run("git --version", shell=True, capture_output=True, text=True)
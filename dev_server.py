@@ -0,0 +1,241 @@
+import os
+import json
+import asyncio
+import hashlib
+import argparse
+import mimetypes
+import traceback
+from urllib.parse import unquote, urlsplit
+
+import generate_dashboard
+import markdown_engine
+import watch_dashboard
+
+# Configuration
+OUTPUT_DIR = generate_dashboard.OUTPUT_DIR
+EVENTS_PATH = "/__livereload"
+HEARTBEAT_SECONDS = 15
+
+# Added to every HTML response (never to the files on disk)
+RELOAD_SNIPPET = f"""<script>
+(function () {{
+    var page = decodeURIComponent(location.pathname.split('/').pop()) || 'index.html';
+    var source = new EventSource('{EVENTS_PATH}');
+    source.onmessage = function (event) {{
+        var changed = JSON.parse(event.data);
+        if (changed.indexOf(page) >= 0 || changed.indexOf('{generate_dashboard.NAV_SCRIPT}') >= 0) {{
+            location.reload();
+        }}
+    }};
+}})();
+</script>
+"""
+
+class LiveReloadServer:
+    """
+    Serves OUTPUT_DIR and pushes reload events over Server-Sent Events. Everything runs on one
+    asyncio loop: each browser tab is a coroutine waiting on its own queue, the file watcher
+    blocks in a single executor thread, and builds run one at a time in the executor, so a
+    render never stalls the other requests or the event streams.
+    """
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.clients = set()     # one asyncio.Queue per open event stream
+        self.served_hashes = {}  # output file -> hash of the bytes last sent to a browser
+        self.build_lock = asyncio.Lock()  # the builder is not thread-safe
+
+    # ------------------------------------------------------------------
+    # Change notifications
+    # ------------------------------------------------------------------
+    def changed_outputs(self, written):
+        """Of the files just written, those whose bytes differ from what browsers last got."""
+        changed = []
+        for output_filename in written:
+            old_hash = self.served_hashes.get(output_filename)
+            if old_hash is None:
+                continue  # nobody has it open
+            try:
+                with open(os.path.join(OUTPUT_DIR, output_filename), 'rb') as f:
+                    new_hash = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                new_hash = None
+            if new_hash != old_hash:
+                changed.append(output_filename)
+        return changed
+
+    def broadcast(self, changed):
+        message = json.dumps(changed, ensure_ascii=False)
+        for queue in self.clients:
+            queue.put_nowait(message)
+
+    def notify(self, written):
+        changed = self.changed_outputs(written)
+        if changed:
+            print(f">> Reloading {len(self.clients)} client(s) for: {', '.join(changed)}")
+            self.broadcast(changed)
+
+    async def run_build(self, func, *args):
+        """Runs one builder call in the executor; calls never overlap."""
+        async with self.build_lock:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def watch(self):
+        loop = asyncio.get_running_loop()
+        watcher = watch_dashboard.create_watcher()
+        print(f"Using {watcher.name} watcher.")
+        try:
+            while True:
+                changes = await loop.run_in_executor(None, watcher.wait_for_changes)
+                for path, kind in sorted(changes.items()):
+                    print(f"[Change Detected] {watch_dashboard.describe_change(path, kind)}")
+                try:
+                    written = await self.run_build(watch_dashboard.rebuild, self.builder, changes)
+                except Exception:
+                    traceback.print_exc()
+                    continue
+                self.notify(written)
+        finally:
+            watcher.close()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            accepts_gzip = False  # Accept-Encoding is the only header that matters here
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode('latin-1').partition(":")
+                if name.strip().lower() == "accept-encoding" and "gzip" in value.lower():
+                    accepts_gzip = True
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2:
+                return
+            method, target = parts[0], parts[1]
+            if method not in ("GET", "HEAD"):
+                await self.respond(writer, 405, "text/plain", b"Method Not Allowed")
+                return
+
+            path = unquote(urlsplit(target).path)
+            if path == EVENTS_PATH:
+                await self.stream_events(writer)
+            else:
+                await self.serve_file(writer, path, head=(method == "HEAD"), accepts_gzip=accepts_gzip)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, content_type, body, head=False, encoding=None):
+        reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        extra = f"Content-Encoding: {encoding}\r\nVary: Accept-Encoding\r\n" if encoding else ""
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Cache-Control: no-cache\r\n"
+            f"{extra}"
+            f"Connection: close\r\n\r\n".encode('latin-1')
+        )
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    async def serve_file(self, writer, path, head=False, accepts_gzip=False):
+        output_filename = path.lstrip('/') or "index.html"
+        full_path = os.path.normpath(os.path.join(OUTPUT_DIR, output_filename))
+        if os.path.commonpath([full_path, OUTPUT_DIR]) != OUTPUT_DIR:
+            await self.respond(writer, 404, "text/plain", b"Not Found")
+            return
+
+        # Pages that were never built (or are stale) are rendered on the first request; other tabs
+        # still showing the old version are told to reload
+        if os.path.dirname(full_path) == OUTPUT_DIR:
+            try:
+                if await self.run_build(self.builder.ensure_output, output_filename):
+                    self.notify([output_filename])
+            except Exception:
+                traceback.print_exc()
+
+        try:
+            with open(full_path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            await self.respond(writer, 404, "text/plain", b"Not Found")
+            return
+
+        self.served_hashes[os.path.relpath(full_path, OUTPUT_DIR).replace(os.sep, '/')] = hashlib.sha1(body).hexdigest()
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        encoding = None
+        if content_type == "text/html":
+            body = body.replace(b"</body>", RELOAD_SNIPPET.encode('utf-8') + b"</body>", 1)
+            content_type = "text/html; charset=utf-8"
+        else:
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+            # Pages get the reload snippet spliced in, but other outputs can go out exactly as the
+            # build compressed them (--precompress), as long as the .gz isn't older than the file
+            packed_path = full_path + generate_dashboard.GZIP_SUFFIX
+            if accepts_gzip and os.path.exists(packed_path) and os.path.getmtime(packed_path) >= os.path.getmtime(full_path):
+                try:
+                    with open(packed_path, 'rb') as f:
+                        body = f.read()
+                    encoding = "gzip"
+                except OSError:
+                    pass
+        await self.respond(writer, 200, content_type, body, head, encoding)
+
+    async def stream_events(self, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+            b"retry: 1000\n\n"
+        )
+        await writer.drain()
+
+        queue = asyncio.Queue()
+        self.clients.add(queue)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                    writer.write(f"data: {message}\n\n".encode('utf-8'))
+                except asyncio.TimeoutError:
+                    # Comment line; lets us notice closed tabs
+                    writer.write(b": ping\n\n")
+                await writer.drain()
+        finally:
+            self.clients.discard(queue)
+
+async def serve(host, port, builder):
+    server = LiveReloadServer(builder)
+    http_server = await asyncio.start_server(server.handle, host, port)
+    print(f"Serving {OUTPUT_DIR} at http://{host}:{port}/")
+    async with http_server:
+        await asyncio.gather(http_server.serve_forever(), server.watch())
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard with live reload.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--markdown", choices=markdown_engine.ENGINES, default=generate_dashboard.DEFAULT_ENGINE,
+                        help="markdown flavour, as in generate_dashboard.py")
+    parser.add_argument("--shared-nav", action="store_true", help="as in generate_dashboard.py")
+    parser.add_argument("--minify", action="store_true", help="as in generate_dashboard.py")
+    parser.add_argument("--precompress", action="store_true", help="as in generate_dashboard.py")
+    args = parser.parse_args()
+
+    # Nothing is rendered up front; pages are built when first requested or when their source changes
+    builder = generate_dashboard.DashboardBuilder(engine=args.markdown, shared_nav=args.shared_nav,
+                                                 minify=args.minify, precompress=args.precompress)
+    builder.load()
+    try:
+        asyncio.run(serve(args.host, args.port, builder))
+    except KeyboardInterrupt:
+        print("\nServer stopped by user.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""
+Fight-session analysis engine: loads a recorded session (CSV/TSV with a header row) into NumPy
+columns and produces the fight_analysis_*.txt family of reports with vectorized operations.
+
+    python fight_analysis.py fight_session_174505.csv                      # fight_analysis_174505.txt
+    python fight_analysis.py session.csv --report drain --report ratio_band
+    python fight_analysis.py session.csv --report outlen_corr --window 2   # ..._outlen_corr_2s.txt
+    python fight_analysis.py session.csv --report all --stdout
+
+Definitions shared by all reports:
+  * a ratio flip is a row where `ratio > threshold` differs from the previous row (threshold 1.0);
+  * segments are maximal runs of rows with the same friction; a flip belongs to a segment only
+    when both of its rows do, and a segment lasts from its first to its last row's time;
+  * the dominant friction (used by outlen_corr and the per-friction part of drain_corr) is the
+    one covering the most rows, unless --friction is given.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+import output_writer
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("fight_analysis.py needs NumPy: pip install numpy") from None
+
+# Report column -> header names accepted for it, first match wins (override with --col)
+COLUMN_ALIASES = {
+    "time": ("time", "t", "timestamp", "realtimeSinceStartup"),
+    "smoothedForce": ("smoothedForce", "force"),
+    "ratio": ("ratio",),
+    "friction": ("friction",),
+    "lineDrainSpeed": ("lineDrainSpeed", "drainSpeed"),
+    "outLen": ("outLen", "out_len", "lineOutLength"),
+}
+REQUIRED_COLUMNS = ("time", "ratio", "friction")
+
+CACHE_SUFFIX = ".cols"               # parsed columns are cached as <session>.cols.npy + <session>.cols.json
+CACHE_VERSION = 1
+
+RATIO_THRESHOLD = 1.0
+NEAR_WINDOW = 0.2                    # seconds, "within 0.2s of a flip"
+BAND_EDGES = (0.02, 0.05, 0.10, 0.20, 0.50, 1.00, 2.00, 5.00)
+NEAR_BAND = 0.10
+QUANTILES = (10, 25, 50, 75, 90)
+TOP_WINDOWS = 5
+QUANTILE_SPLIT = 20                  # percent of windows on each side of the out_len split
+
+REPORTS = ("summary", "rate", "drain", "drain_corr", "outlen_corr", "ratio_band", "compare")
+
+class FightSession:
+    """One session's columns plus the derived arrays every report needs (computed once)."""
+
+    def __init__(self, columns, threshold=RATIO_THRESHOLD):
+        self.columns = columns
+        self.t = columns["time"]
+        self.ratio = columns["ratio"]
+        self.friction = columns["friction"]
+        self.rows = len(self.t)
+        self.duration = float(self.t[-1] - self.t[0]) if self.rows else 0.0
+        self.threshold = threshold
+        self.from_cache = False
+
+        # flip[i]: the ratio crossed the threshold between rows i-1 and i
+        above = self.ratio > threshold
+        self.flip = np.zeros(self.rows, dtype=bool)
+        self.flip[1:] = above[1:] != above[:-1]
+        self.flip_count = int(self.flip.sum())
+
+        # Segments of constant friction, as inclusive row ranges
+        change = np.ones(self.rows, dtype=bool)
+        change[1:] = self.friction[1:] != self.friction[:-1]
+        self.seg_starts = np.flatnonzero(change)
+        self.seg_ends = np.append(self.seg_starts[1:] - 1, self.rows - 1)
+        flips_before = np.cumsum(self.flip)
+        self.seg_flips = flips_before[self.seg_ends] - flips_before[self.seg_starts]
+        self.seg_durations = self.t[self.seg_ends] - self.t[self.seg_starts]
+
+    def column(self, name):
+        values = self.columns.get(name)
+        if values is None:
+            raise KeyError(f"the session has no {name} column (see --col)")
+        return values
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def per_second(self, count, duration):
+        return count / duration if duration > 0 else 0.0
+
+    def near_mask(self, event_times, window):
+        """Rows whose time is within `window` seconds of any event (a difference array, no loops)."""
+        lo = np.searchsorted(self.t, event_times - window, side='left')
+        hi = np.searchsorted(self.t, event_times + window, side='right')
+        depth = np.cumsum(np.bincount(lo, minlength=self.rows + 1) - np.bincount(hi, minlength=self.rows + 1))
+        return depth[:self.rows] > 0
+
+    def dominant_friction(self):
+        values, counts = np.unique(self.friction, return_counts=True)
+        return float(values[np.argmax(counts)])
+
+    def friction_rows(self, friction):
+        """Mask of the rows at `friction`, and of the flips whose two rows are both at it."""
+        rows = np.isclose(self.friction, friction)
+        flips = self.flip.copy()
+        flips[1:] &= rows[1:] & rows[:-1]
+        flips &= rows
+        return rows, flips
+
+    def friction_duration(self, friction):
+        """First to last row at `friction`, gaps between its segments included (as in the reports)."""
+        index = np.flatnonzero(np.isclose(self.friction, friction))
+        if not len(index):
+            raise KeyError(f"no rows at friction {friction:.4f}")
+        return float(self.t[index[-1]] - self.t[index[0]])
+
+    def forward_dt(self):
+        """Time each row lasts until the next one (the last row lasts 0)."""
+        dt = np.zeros(self.rows)
+        dt[:-1] = np.diff(self.t)
+        return dt
+
+    # ------------------------------------------------------------------
+    # Report sections
+    # ------------------------------------------------------------------
+    def segment_lines(self):
+        lines = ["segments:"]
+        for start, end, friction, duration, flips in zip(self.seg_starts, self.seg_ends, self.friction[self.seg_starts],
+                                                         self.seg_durations, self.seg_flips):
+            lines.append(f"  {start}-{end} friction={friction:.4f} duration={duration:.3f}s flips={flips} "
+                         f"flips_per_sec={self.per_second(flips, duration):.3f} samples={end - start + 1}")
+        return lines
+
+    def summary(self):
+        force = self.column("smoothedForce")
+        lines = [
+            f"rows={self.rows} duration={self.duration:.3f}s",
+            f"smoothedForce mean={force.mean():.4f} min={force.min():.4f} max={force.max():.4f} "
+            f"p2p={np.ptp(force):.4f} rms={np.sqrt(np.mean(force * force)):.4f}",
+            f"ratio flips @{self.threshold:.1f}={self.flip_count} "
+            f"flips_per_sec={self.per_second(self.flip_count, self.duration):.3f}",
+        ]
+        lines += self.segment_lines()
+        lines.append(f"ratio min={self.ratio.min():.4f} max={self.ratio.max():.4f}")
+        return lines
+
+    def rate(self):
+        lines = [f"rows={self.rows} duration={self.duration:.3f}s flips@{self.threshold:.1f}={self.flip_count} "
+                 f"flips_per_sec={self.per_second(self.flip_count, self.duration):.3f}"]
+        return lines + self.segment_lines()
+
+    def drain(self):
+        drain = self.column("lineDrainSpeed")
+        # Sign changes of the drain speed, zeros carrying the previous sign forward
+        sign = np.sign(drain)
+        last_nonzero = np.maximum.accumulate(np.where(sign != 0, np.arange(self.rows), 0))
+        held = sign[last_nonzero]
+        drain_flip = np.zeros(self.rows, dtype=bool)
+        drain_flip[1:] = (held[1:] != held[:-1]) & (held[1:] != 0) & (held[:-1] != 0)
+        drain_flips = int(drain_flip.sum())
+
+        flip_times = self.t[self.flip]
+        drain_times = self.t[drain_flip]
+        if len(drain_times) and len(flip_times):
+            pos = np.searchsorted(drain_times, flip_times)
+            before = np.abs(flip_times - drain_times[np.clip(pos - 1, 0, None)])
+            after = np.abs(drain_times[np.clip(pos, None, len(drain_times) - 1)] - flip_times)
+            near_drain = int((np.minimum(before, after) <= NEAR_WINDOW).sum())
+        else:
+            near_drain = 0
+        near = self.near_mask(flip_times, NEAR_WINDOW)
+        near_speed = np.abs(drain[near]).mean() if near.any() else 0.0
+
+        return [
+            f"rows={self.rows} duration={self.duration:.3f}s",
+            f"ratio_flips={self.flip_count} flips_per_sec={self.per_second(self.flip_count, self.duration):.3f}",
+            f"drain_sign_flips={drain_flips} flips_per_sec={self.per_second(drain_flips, self.duration):.3f}",
+            f"flip_within_{NEAR_WINDOW}s_of_drain_flip={near_drain} "
+            f"ratio={near_drain / self.flip_count if self.flip_count else 0.0:.3f}",
+            f"avg_abs_lineDrainSpeed_within_{NEAR_WINDOW}s_of_ratio_flip={near_speed:.4f}",
+        ]
+
+    def delta_correlation(self, rows, flips, indent=""):
+        """|Δ lineDrainSpeed| on flip rows vs the rest, restricted to `rows` (row 0 has no delta)."""
+        abs_delta = np.zeros(self.rows)
+        abs_delta[1:] = np.abs(np.diff(self.column("lineDrainSpeed")))
+        rows = rows.copy()
+        rows[0] = False
+        flip_delta = abs_delta[rows & flips]
+        other_delta = abs_delta[rows & ~flips]
+        flip_mean = flip_delta.mean() if len(flip_delta) else 0.0
+        other_mean = other_delta.mean() if len(other_delta) else 0.0
+        indicator = flips[rows].astype(float)
+        if indicator.std() > 0 and abs_delta[rows].std() > 0:
+            r = np.corrcoef(indicator, abs_delta[rows])[0, 1]
+        else:
+            r = 0.0
+        near = self.near_mask(self.t[flips], NEAR_WINDOW) & rows
+        near_mean = abs_delta[near].mean() if near.any() else 0.0
+        return [
+            f"{indent}abs_delta_mean_flip={flip_mean:.6f} abs_delta_mean_nonflip={other_mean:.6f} point_biserial_r={r:.4f}",
+            f"{indent}window_{NEAR_WINDOW}s_avg_abs_delta_around_flips={near_mean:.6f} nonflip_avg_abs_delta={other_mean:.6f}",
+        ]
+
+    def drain_corr(self, friction=None):
+        friction = self.dominant_friction() if friction is None else friction
+        lines = [f"rows={self.rows} duration={self.duration:.3f}s flip_count={self.flip_count} "
+                 f"flip_rate={self.per_second(self.flip_count, self.duration):.3f}/s"]
+        lines += self.delta_correlation(np.ones(self.rows, dtype=bool), self.flip)
+
+        rows, flips = self.friction_rows(friction)
+        duration = self.friction_duration(friction)
+        flip_count = int(flips.sum())
+        lines.append(f"friction={friction:.4f}:")
+        lines.append(f"  flip_count={flip_count} flip_rate={self.per_second(flip_count, duration):.3f}/s")
+        lines += self.delta_correlation(rows, flips, indent="  ")
+        return lines
+
+    def outlen_corr(self, window=1.0, friction=None):
+        friction = self.dominant_friction() if friction is None else friction
+        rows, flips = self.friction_rows(friction)
+        duration = self.friction_duration(friction)
+        index = np.flatnonzero(rows)
+        t = self.t[index]
+        out_len = self.column("outLen")[index]
+
+        # Windows are laid over the friction's first to last row; those falling between two of its
+        # segments hold no rows and are left out, as are outLen increments that span such a gap
+        span = int((t[-1] - t[0]) // window)
+        bin_of_row = ((t - t[0]) // window).astype(int)
+        valid = bin_of_row < span
+        occupied = np.bincount(bin_of_row[valid], minlength=span) > 0
+        bins = int(occupied.sum())
+        header = f"friction={friction:.4f} rows={len(index)} duration={duration:.3f}s window={float(window)}s bins={bins}"
+        if bins < 2:
+            return [header, "not enough windows"]
+
+        counts = np.bincount(bin_of_row[flips[index] & valid], minlength=span)
+        step = np.where(np.diff(index) == 1, np.diff(out_len), 0.0)
+        later = bin_of_row[1:]
+        paid = np.bincount(later[later < span], weights=step[later < span], minlength=span)
+        window_index = np.flatnonzero(occupied)
+        counts, paid = counts[occupied], paid[occupied]
+        rate = counts / window
+
+        lines = [
+            header,
+            f"flip_rate_mean={rate.mean():.4f}/s flip_rate_std={rate.std():.4f}",
+            f"out_len_mean={paid.mean():.6f} out_len_std={paid.std():.6f}",
+            f"corr_outLen_vs_flipRate={np.corrcoef(paid, rate)[0, 1] if paid.std() > 0 and rate.std() > 0 else 0.0:.4f}",
+        ]
+        # Same layout as the committed reports: the 1s report lists the top windows, other window
+        # sizes (the ..._outlen_corr_<w>s.txt files) the out_len quantile split instead
+        if window != 1.0:
+            low, high = np.percentile(paid, [QUANTILE_SPLIT, 100 - QUANTILE_SPLIT])
+            lines.append(f"quantile_split={QUANTILE_SPLIT}% low_flip_rate_mean={rate[paid <= low].mean():.4f}/s "
+                         f"high_flip_rate_mean={rate[paid >= high].mean():.4f}/s")
+            return lines
+
+        lines.append("top_windows_by_out_len:")
+        offset = t[0] - self.t[0]
+        for k in np.argsort(-paid, kind='stable')[:TOP_WINDOWS]:
+            start = offset + window_index[k] * window
+            lines.append(f"  {start:.3f}-{start + window:.3f}s flips={counts[k]} "
+                         f"flip_rate={rate[k]:.3f}/s out_len={paid[k]:.6f}")
+        return lines
+
+    def ratio_band(self):
+        distance = np.abs(self.ratio - 1.0)
+        quantiles = np.percentile(distance, QUANTILES)
+        lines = [
+            f"rows={self.rows} duration={self.duration:.3f}s",
+            "abs(ratio-1.0) quantiles: " + ", ".join(f"{q}%={v:.4f}" for q, v in zip(QUANTILES, quantiles)),
+            "distribution counts:",
+        ]
+        counts = np.bincount(np.searchsorted(BAND_EDGES, distance, side='left'), minlength=len(BAND_EDGES) + 1)
+        labels = ([f"<= {BAND_EDGES[0]:.2f}"]
+                  + [f"({lo:.2f},{hi:.2f}]" for lo, hi in zip(BAND_EDGES, BAND_EDGES[1:])]
+                  + [f"> {BAND_EDGES[-1]:.2f}"])
+        lines += [f"  {label}: {count}" for label, count in zip(labels, counts)]
+
+        # Time spent near 1.0, and the longest uninterrupted stay
+        dt = self.forward_dt()
+        band = distance <= NEAR_BAND
+        band_time = float(dt[band].sum())
+        run_id = np.cumsum(np.append(True, band[1:] != band[:-1]))
+        run_time = np.bincount(run_id[band], weights=dt[band]) if band.any() else np.zeros(1)
+        lines.append(f"near_band=|ratio-1|<= {NEAR_BAND:.2f}: time={band_time:.3f}s "
+                     f"({self.per_second(band_time, self.duration) * 100:.2f}%) max_continuous={run_time.max():.3f}s")
+        return lines
+
+    def compare(self):
+        drain = self.column("lineDrainSpeed")
+        return [
+            f"rows={self.rows} duration={self.duration:.3f}s flips={self.flip_count} "
+            f"flips_per_sec={self.per_second(self.flip_count, self.duration):.3f}",
+            f"lineDrainSpeed mean={drain.mean():.4f} mean_abs={np.abs(drain).mean():.4f} "
+            f"p95_abs={np.percentile(np.abs(drain), 95):.4f}",
+        ]
+
+def find_columns(header, overrides=None):
+    """Maps report column names to indexes in `header`; optional columns may be missing."""
+    positions = {name.strip(): i for i, name in enumerate(header)}
+    found = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        candidates = [overrides[name]] if overrides and name in overrides else aliases
+        for alias in candidates:
+            if alias in positions:
+                found[name] = positions[alias]
+                break
+    missing = [name for name in REQUIRED_COLUMNS if name not in found]
+    if missing:
+        raise KeyError(f"missing column(s) {', '.join(missing)}; header is: {', '.join(header)}")
+    return found
+
+def cache_paths(path):
+    """fight_session_174505.csv -> fight_session_174505.csv.cols.npy / .cols.json, next to the session."""
+    return path + CACHE_SUFFIX + ".npy", path + CACHE_SUFFIX + ".json"
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_cache(path, stat):
+    """
+    (header, memory-mapped columns) for `path` if the cache still describes the file, else None.
+    Size and mtime are trusted as-is; when only the mtime moved (a copy, a checkout) the content
+    hash decides. The array must also have the shape the header records for it.
+    """
+    data_path, header_path = cache_paths(path)
+    try:
+        with open(header_path, 'r', encoding='utf-8') as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != CACHE_VERSION or header.get("size") != stat.st_size:
+        return None
+    if header.get("mtime_ns") != stat.st_mtime_ns:
+        if header.get("sha256") != file_digest(path):
+            return None
+        header["mtime_ns"] = stat.st_mtime_ns
+        write_json(header_path, header)
+    try:
+        data = np.load(data_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if data.shape != (len(header.get("columns", ())), header.get("rows")):
+        return None
+    return header, data
+
+def write_json(path, value):
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, indent=1)
+    os.replace(temp_path, path)
+
+def write_cache(path, stat, header, delimiter, data, names):
+    """
+    Stores the parsed columns as one (columns, rows) float64 .npy so every column is contiguous and
+    can be memory-mapped; the JSON header is written last and is what makes the cache valid.
+    """
+    data_path, header_path = cache_paths(path)
+    # Drop the old header first: until the new one is written no header can describe the new array
+    if os.path.exists(header_path):
+        os.remove(header_path)
+    temp_path = f"{data_path}.tmp{os.getpid()}.npy"
+    np.save(temp_path, np.ascontiguousarray(data.T))
+    os.replace(temp_path, data_path)
+    write_json(header_path, {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                             "sha256": file_digest(path), "header": header, "delimiter": delimiter,
+                             "columns": names, "rows": len(data)})
+
+def load_session(path, overrides=None, threshold=RATIO_THRESHOLD, use_cache=True):
+    """
+    Reads the needed columns of a delimited session file into float arrays. With `use_cache` the
+    parsed columns are kept next to the session and later runs memory-map them instead of parsing
+    text; a cache missing some column is rebuilt with the union of old and new columns.
+    """
+    stat = os.stat(path)
+    cached, cached_data = (read_cache(path, stat) if use_cache else None) or (None, None)
+    if cached:
+        header, delimiter = cached["header"], cached["delimiter"]
+    else:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            header_line = f.readline()
+        delimiter = next((d for d in (',', '\t', ';') if d in header_line), None)
+        header = header_line.strip().split(delimiter)
+    found = find_columns(header, overrides)
+    wanted = {name: header[index] for name, index in found.items()}
+
+    if cached and set(wanted.values()) <= set(cached["columns"]):
+        data = cached_data
+        position = {column: i for i, column in enumerate(cached["columns"])}
+        columns = {name: data[position[column]] for name, column in wanted.items()}
+        session = FightSession(columns, threshold)
+        session.from_cache = True
+        return session
+
+    names = list(dict.fromkeys(list(wanted.values()) + (cached["columns"] if cached else [])))
+    data = np.loadtxt(path, delimiter=delimiter, skiprows=1, usecols=[header.index(n) for n in names],
+                      ndmin=2, encoding='utf-8-sig')
+    if not len(data):
+        raise ValueError("no data rows")
+    if use_cache:
+        try:
+            write_cache(path, stat, header, delimiter, data, names)
+        except OSError as e:
+            print(f"[Warning] could not write the column cache for {path}: {e.strerror}")
+    columns = {name: data[:, names.index(column)] for name, column in wanted.items()}
+    return FightSession(columns, threshold)
+
+def session_id(path):
+    """174505 for fight_session_174505.csv; the file stem when there is no time stamp in the name."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    stamps = re.findall(r"\d{6}", stem)
+    return stamps[-1] if stamps else stem
+
+def report_filename(report, ident, window=1.0):
+    if report == "ratio_band":
+        return f"fight_analysis_ratio_band_{ident}.txt"
+    if report == "compare":
+        return f"compare_{ident}.txt"
+    if report == "summary":
+        return f"fight_analysis_{ident}.txt"
+    if report == "outlen_corr" and window != 1.0:
+        return f"fight_analysis_{ident}_outlen_corr_{window:g}s.txt"
+    return f"fight_analysis_{ident}_{report}.txt"
+
+def build_report(session, report, window=1.0, friction=None):
+    if report == "outlen_corr":
+        return session.outlen_corr(window, friction)
+    if report == "drain_corr":
+        return session.drain_corr(friction)
+    return getattr(session, report)()
+
+def main():
+    parser = argparse.ArgumentParser(description="Produce fight_analysis_*.txt reports from recorded fight sessions.")
+    parser.add_argument("sessions", nargs="+", help="session files (CSV/TSV with a header row)")
+    parser.add_argument("--report", action="append", choices=REPORTS + ("all",),
+                        help="report to produce; repeatable (default: summary)")
+    parser.add_argument("--window", type=float, default=1.0, help="outlen_corr window in seconds")
+    parser.add_argument("--threshold", type=float, default=RATIO_THRESHOLD, help="ratio flip threshold")
+    parser.add_argument("--friction", type=float, help="friction for the per-friction reports (default: dominant)")
+    parser.add_argument("--col", action="append", default=[], metavar="NAME=HEADER",
+                        help=f"use HEADER for column NAME ({', '.join(COLUMN_ALIASES)})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"parse the session text even if a {CACHE_SUFFIX}.npy cache is up to date, and write none")
+    parser.add_argument("--out-dir", default=".", help="where to write the reports")
+    parser.add_argument("--stdout", action="store_true", help="print the reports instead of writing files")
+    args = parser.parse_args()
+
+    overrides = dict(item.split("=", 1) for item in args.col)
+    reports = args.report or ["summary"]
+    if "all" in reports:
+        reports = list(REPORTS)
+
+    failed = False
+    writer = output_writer.OutputWriter()
+    for path in args.sessions:
+        started = time.perf_counter()
+        try:
+            session = load_session(path, overrides, args.threshold, use_cache=not args.no_cache)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[Error] {path}: {e}")
+            failed = True
+            continue
+        loaded = time.perf_counter()
+
+        for report in reports:
+            try:
+                text = "\n".join(build_report(session, report, args.window, args.friction))
+            except KeyError as e:
+                print(f"[Skipped] {report} for {path}: {e.args[0]}")
+                continue
+            if args.stdout:
+                print(text)
+            else:
+                output = os.path.join(args.out_dir, report_filename(report, session_id(path), args.window))
+                if writer.write(output, text):
+                    print(f"Generated: {output}")
+                else:
+                    print(f"Unchanged: {output}")
+        print(f"{path}: {session.rows} rows, loaded in {(loaded - started) * 1000:.0f} ms"
+              f"{' (column cache)' if session.from_cache else ''}, "
+              f"analyzed in {(time.perf_counter() - loaded) * 1000:.0f} ms")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,42 @@
 import os
 import re
 import glob
+import gzip
+import json
 import shlex
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import markdown_engine
+import output_writer
+import search_index
 
 # Configuration
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(ROOT_DIR, "html")
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, ".build_manifest.json")
+SEARCH_DIR = os.path.join(OUTPUT_DIR, "search")
+MANIFEST_VERSION = 1
+INDEX_KEY = "__index__"
+NAV_KEY = "__nav__"
+NAV_SCRIPT = "nav.js"
+STYLESHEET_KEY = "__css__"
+# The old regex chain stays the default until the standard engine is faster than it on the
+# corpus as well as leaner (python markdown_engine.py --bench)
+DEFAULT_ENGINE = "legacy"
+GZIP_SUFFIX = ".gz"
+# Never searched for docs: output, VCS and third-party trees, caches and the test fixtures.
+# watch_dashboard.py ignores the same directories, so what it watches is exactly what gets built
+EXCLUDED_DIRS = {".git", "html", "Third", "__pycache__", "tests"}
+DEFAULT_JOBS = os.cpu_count() or 1
+# A page renders in about half a millisecond, while starting the worker processes takes tens of
+# milliseconds (far more where they are spawned, as on Windows): smaller batches render in-process
+POOL_MIN_TASKS = 64
+
+# Whitespace is significant inside these, so minify_html() copies them as they are
+PRESERVED_BLOCK_RE = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+WHITESPACE_RE = re.compile(r"\s+")
 
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
@@ -13,63 +44,22 @@ if not os.path.exists(OUTPUT_DIR):
 def get_html_filename(md_filename):
     return md_filename.replace('.md', '.html')
 
-def parse_markdown(text, current_filename):
-    html = text
-    # Headers
-    html = re.sub(r'^# (.*$)', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.*$)', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^### (.*$)', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^#### (.*$)', r'<h4>\1</h4>', html, flags=re.MULTILINE)
-    
-    # Bold
-    html = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', html)
-    
-    # Lists
-    # Simple list parsing
-    html = re.sub(r'^\* (.*$)', r'<ul><li>\1</li></ul>', html, flags=re.MULTILINE)
-    html = html.replace('</ul>\n<ul>', '')
-    
-    # Blockquotes
-    html = re.sub(r'^> (.*$)', r'<blockquote>\1</blockquote>', html, flags=re.MULTILINE)
-    html = html.replace('</blockquote>\n<blockquote>', '<br>')
-
-    # Links
-    def replace_link(match):
-        link_text = match.group(1)
-        link_url = match.group(2)
-        
-        # Check if it's a markdown file link
-        if link_url.endswith('.md'):
-            # If it's a local file, convert to HTML link
-            target_filename = os.path.basename(link_url)
-            return f'<a href="{get_html_filename(target_filename)}">{link_text}</a>'
-        
-        # Default behavior for external links
-        return f'<a href="{link_url}" target="_blank">{link_text}</a>'
-
-    html = re.sub(r'\[(.*?)\]\((.*?)\)', replace_link, html)
-    
-    # Code blocks
-    # Simple code block handler
-    html = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', html, flags=re.DOTALL)
-    
-    # Paragraphs (simple)
-    html = re.sub(r'\n\n', '<br><br>', html)
-    
-    return html
-
-def get_sidebar_html(md_files, current_file):
-    links = []
-    links.append(f'<li><a href="index.html" class="{"active" if current_file == "index.html" else ""}">Home</a></li>')
-    
+def parse_markdown(text, engine=DEFAULT_ENGINE):
+    return markdown_engine.render(text, engine)
+
+def get_page_title(md_filename):
+    return md_filename.replace('.md', '').replace('_', ' ')
+
+def get_nav_entries(md_files):
+    entries = [("index.html", "Home")]
     for filepath in md_files:
         filename = os.path.basename(filepath)
-        html_filename = get_html_filename(filename)
-        display_name = filename.replace('.md', '').replace('_', ' ')
-        
-        is_active = "active" if filename == current_file else ""
-        links.append(f'<li><a href="{html_filename}" class="{is_active}">{display_name}</a></li>')
-        
+        entries.append((get_html_filename(filename), get_page_title(filename)))
+    return entries
+
+def build_sidebar_html(md_files):
+    """The sidebar of a build, with no page marked active. Built once and shared by every page."""
+    links = [f'<li><a href="{href}" class="">{title}</a></li>' for href, title in get_nav_entries(md_files)]
     return f"""
     <div id="sidebar">
         <h2>Documentation</h2>
@@ -80,6 +70,90 @@ def get_sidebar_html(md_files, current_file):
     </div>
     """
 
+def mark_active_link(sidebar, current_html):
+    # Per-page work is a single string substitution instead of rebuilding the whole list
+    return sidebar.replace(f'<a href="{current_html}" class="">', f'<a href="{current_html}" class="active">')
+
+# With --shared-nav every page carries this same placeholder and nav.js fills in the links,
+# so adding or removing a document only rewrites nav.js and index.html
+SHARED_SIDEBAR_HTML = f"""
+    <div id="sidebar">
+        <h2>Documentation</h2>
+        <ul id="nav-list"></ul>
+        <div style="margin-top: 50px; font-size: 0.8em; color: #95a5a6;">
+            <p>Generated by AI Assistant</p>
+        </div>
+    </div>
+    <script src="{NAV_SCRIPT}"></script>
+    """
+
+def get_nav_script(md_files):
+    entries = [{"href": href, "title": title} for href, title in get_nav_entries(md_files)]
+    return f"""window.DASHBOARD_NAV = {json.dumps(entries, ensure_ascii=False)};
+(function () {{
+    var list = document.getElementById('nav-list');
+    if (!list) return;
+    var current = decodeURIComponent(location.pathname.split('/').pop()) || 'index.html';
+    window.DASHBOARD_NAV.forEach(function (entry) {{
+        var item = document.createElement('li');
+        var link = document.createElement('a');
+        link.href = entry.href;
+        link.textContent = entry.title;
+        if (entry.href === current) link.className = 'active';
+        item.appendChild(link);
+        list.appendChild(item);
+    }});
+}})();
+"""
+
+# Shared by every page through one stylesheet file instead of an inline <style> block
+SITE_CSS = """body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 0; display: flex; height: 100vh; background-color: #f4f4f9; }
+
+/* Sidebar Styles */
+#sidebar { width: 280px; background-color: #2c3e50; color: white; padding: 20px; overflow-y: auto; flex-shrink: 0; box-shadow: 2px 0 5px rgba(0,0,0,0.1); }
+#sidebar h2 { color: #ecf0f1; font-size: 1.4em; border-bottom: 1px solid #34495e; padding-bottom: 15px; margin-top: 0; }
+#sidebar ul { list-style: none; padding: 0; }
+#sidebar li { margin: 8px 0; }
+#sidebar a { color: #bdc3c7; text-decoration: none; transition: 0.2s; display: block; padding: 10px; border-radius: 6px; font-size: 0.95em; }
+#sidebar a:hover { color: white; background-color: #34495e; transform: translateX(5px); }
+#sidebar a.active { color: white; background-color: #3498db; font-weight: bold; }
+
+/* Content Styles */
+#content-wrapper { flex-grow: 1; overflow-y: auto; position: relative; }
+#content { max-width: 960px; margin: 40px auto; padding: 40px; background-color: white; box-shadow: 0 0 20px rgba(0,0,0,0.05); border-radius: 8px; min-height: 80vh; }
+
+/* Typography */
+h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 15px; font-size: 2.2em; margin-top: 0; }
+h2 { color: #34495e; margin-top: 40px; border-bottom: 1px solid #eee; padding-bottom: 8px; }
+h3 { color: #2980b9; margin-top: 30px; }
+h4 { color: #7f8c8d; margin-top: 20px; }
+p { line-height: 1.6; color: #333; }
+
+/* Elements */
+pre { background-color: #282c34; color: #abb2bf; padding: 20px; border-radius: 8px; overflow-x: auto; font-size: 0.9em; box-shadow: inset 0 0 10px rgba(0,0,0,0.2); }
+code { font-family: 'Consolas', 'Monaco', monospace; }
+a { color: #3498db; text-decoration: none; font-weight: 500; }
+a:hover { text-decoration: underline; }
+blockquote { border-left: 4px solid #3498db; margin: 20px 0; padding: 15px 20px; color: #555; background-color: #f8fbff; border-radius: 0 4px 4px 0; }
+ul, ol { padding-left: 25px; line-height: 1.6; }
+li { margin-bottom: 5px; }
+table { border-collapse: collapse; margin: 20px 0; }
+th, td { border: 1px solid #ddd; padding: 8px 12px; }
+th { background-color: #f8fbff; }
+
+/* Scrollbar */
+::-webkit-scrollbar { width: 8px; height: 8px; }
+::-webkit-scrollbar-track { background: #f1f1f1; }
+::-webkit-scrollbar-thumb { background: #bdc3c7; border-radius: 4px; }
+::-webkit-scrollbar-thumb:hover { background: #95a5a6; }
+"""
+
+def get_stylesheet_name(css=SITE_CSS):
+    # The name changes with the content, so browsers can keep a copy for as long as they like
+    return f"site.{hashlib.sha1(css.encode('utf-8')).hexdigest()[:10]}.css"
+
+STYLESHEET = get_stylesheet_name()
+
 def get_page_template(title, content, sidebar):
     return f"""
 <!DOCTYPE html>
@@ -88,46 +162,9 @@ def get_page_template(title, content, sidebar):
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title}</title>
+    <link rel="stylesheet" href="{STYLESHEET}">
     <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script>
     <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
-    <style>
-        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 0; display: flex; height: 100vh; background-color: #f4f4f9; }}
-        
-        /* Sidebar Styles */
-        #sidebar {{ width: 280px; background-color: #2c3e50; color: white; padding: 20px; overflow-y: auto; flex-shrink: 0; box-shadow: 2px 0 5px rgba(0,0,0,0.1); }}
-        #sidebar h2 {{ color: #ecf0f1; font-size: 1.4em; border-bottom: 1px solid #34495e; padding-bottom: 15px; margin-top: 0; }}
-        #sidebar ul {{ list-style: none; padding: 0; }}
-        #sidebar li {{ margin: 8px 0; }}
-        #sidebar a {{ color: #bdc3c7; text-decoration: none; transition: 0.2s; display: block; padding: 10px; border-radius: 6px; font-size: 0.95em; }}
-        #sidebar a:hover {{ color: white; background-color: #34495e; transform: translateX(5px); }}
-        #sidebar a.active {{ color: white; background-color: #3498db; font-weight: bold; }}
-        
-        /* Content Styles */
-        #content-wrapper {{ flex-grow: 1; overflow-y: auto; position: relative; }}
-        #content {{ max-width: 960px; margin: 40px auto; padding: 40px; background-color: white; box-shadow: 0 0 20px rgba(0,0,0,0.05); border-radius: 8px; min-height: 80vh; }}
-        
-        /* Typography */
-        h1 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 15px; font-size: 2.2em; margin-top: 0; }}
-        h2 {{ color: #34495e; margin-top: 40px; border-bottom: 1px solid #eee; padding-bottom: 8px; }}
-        h3 {{ color: #2980b9; margin-top: 30px; }}
-        h4 {{ color: #7f8c8d; margin-top: 20px; }}
-        p {{ line-height: 1.6; color: #333; }}
-        
-        /* Elements */
-        pre {{ background-color: #282c34; color: #abb2bf; padding: 20px; border-radius: 8px; overflow-x: auto; font-size: 0.9em; box-shadow: inset 0 0 10px rgba(0,0,0,0.2); }}
-        code {{ font-family: 'Consolas', 'Monaco', monospace; }}
-        a {{ color: #3498db; text-decoration: none; font-weight: 500; }}
-        a:hover {{ text-decoration: underline; }}
-        blockquote {{ border-left: 4px solid #3498db; margin: 20px 0; padding: 15px 20px; color: #555; background-color: #f8fbff; border-radius: 0 4px 4px 0; }}
-        ul, ol {{ padding-left: 25px; line-height: 1.6; }}
-        li {{ margin-bottom: 5px; }}
-        
-        /* Scrollbar */
-        ::-webkit-scrollbar {{ width: 8px; height: 8px; }}
-        ::-webkit-scrollbar-track {{ background: #f1f1f1; }}
-        ::-webkit-scrollbar-thumb {{ background: #bdc3c7; border-radius: 4px; }}
-        ::-webkit-scrollbar-thumb:hover {{ background: #95a5a6; }}
-    </style>
 </head>
 <body>
     {sidebar}
@@ -140,42 +177,72 @@ def get_page_template(title, content, sidebar):
 </html>
     """
 
-def generate_dashboard():
-    md_files = glob.glob(os.path.join(ROOT_DIR, "**/*.md"), recursive=True)
-    # Sort files
-    md_files.sort(key=lambda x: (0 if "Index.md" in x else 1, os.path.basename(x)))
-    
-    print(f"Found {len(md_files)} md files.")
+def hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
 
-    # Generate individual pages
-    for filepath in md_files:
-        filename = os.path.basename(filepath)
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"Error reading {filename}: {e}")
-            continue
-            
-        html_content = parse_markdown(content, filename)
-        sidebar = get_sidebar_html(md_files, filename)
-        
-        full_html = get_page_template(
-            title=filename.replace('.md', ''),
-            content=html_content,
-            sidebar=sidebar
-        )
-        
-        output_filename = get_html_filename(filename)
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_html)
-            
-        print(f"Generated: {output_filename}")
-
-    # Generate Index Page (Landing Page)
-    index_sidebar = get_sidebar_html(md_files, "index.html")
+def get_generator_hash(engine=DEFAULT_ENGINE, shared_nav=False, minify=False):
+    # Every page depends on the template (this file), the markdown engine, the flavour picked,
+    # whether the sidebar is inlined or loaded from nav.js and whether the output is minified
+    options = f"{engine}:{'shared' if shared_nav else 'inline'}{':min' if minify else ''}"
+    digest = hashlib.sha1(options.encode('utf-8'))
+    for path in (os.path.abspath(__file__), os.path.abspath(markdown_engine.__file__)):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def get_nav_hash(md_files):
+    # The sidebar lists every page, so adding/removing/renaming a file invalidates all pages
+    names = "\n".join(os.path.basename(p) for p in md_files)
+    return hash_bytes(names.encode('utf-8'))
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def mark_search_pending():
+    """
+    Flags the saved manifest before the search index is patched. Its doc ids and shards describe the
+    index as it was, so if the build dies before saving its own manifest the next one reindexes.
+    """
+    manifest = load_manifest()
+    if manifest and not manifest.get("search_pending"):
+        manifest["search_pending"] = True
+        save_manifest(manifest)
+
+def get_entry_outputs(entry, precompress=False):
+    """
+    Every file under OUTPUT_DIR that a manifest entry contributes to: its output, the output's .gz
+    and the search index files holding the page. Shards are shared between pages, so they are listed
+    under each page indexed in them. Paths are relative to OUTPUT_DIR, with '/' separators.
+    """
+    outputs = [entry["output"]]
+    if precompress:
+        outputs.append(entry["output"] + GZIP_SUFFIX)
+    if "doc" in entry:
+        search_prefix = os.path.relpath(SEARCH_DIR, OUTPUT_DIR).replace(os.sep, '/') + "/"
+        outputs.append(search_prefix + search_index.DOCS_FILE)
+        outputs.extend(search_prefix + shard + ".json" for shard in entry["shards"])
+    return outputs
+
+def is_up_to_date(entry, source_hash):
+    """A page can be skipped when its source is unchanged and its output is still on disk."""
+    if not entry or entry.get("source") != source_hash:
+        return False
+    return os.path.exists(os.path.join(OUTPUT_DIR, entry["output"]))
+
+def get_index_content(md_files):
     index_content = """
     <h1>FishingGame Project Dashboard</h1>
     <p>Welcome to the project documentation center.</p>
@@ -189,14 +256,477 @@ def generate_dashboard():
         dname = fname.replace('.md', '').replace('_', ' ')
         index_content += f'<li><a href="{hname}">{dname}</a></li>'
     index_content += "</ul>"
-    
-    index_html = get_page_template("Dashboard Home", index_content, index_sidebar)
-    with open(os.path.join(OUTPUT_DIR, "index.html"), 'w', encoding='utf-8') as f:
-        f.write(index_html)
-        
-    print(f"Generated: index.html")
+    return index_content
+
+def render_page(filepath, content, sidebar, engine=DEFAULT_ENGINE):
+    """Renders one page; sidebar is the shared fragment from build_sidebar_html()."""
+    filename = os.path.basename(filepath)
+    html_content = parse_markdown(content, engine)
+    return get_page_template(
+        title=filename.replace('.md', ''),
+        content=html_content,
+        sidebar=mark_active_link(sidebar, get_html_filename(filename))
+    )
+
+# Set once per worker process so the sidebar isn't pickled with every task
+_worker_sidebar = None
+_worker_engine = DEFAULT_ENGINE
+
+def _init_render_worker(sidebar, engine):
+    global _worker_sidebar, _worker_engine
+    _worker_sidebar = sidebar
+    _worker_engine = engine
+
+def _render_task(task):
+    filepath, content = task
+    return render_page(filepath, content, _worker_sidebar, _worker_engine)
+
+def render_pages(tasks, sidebar, jobs=DEFAULT_JOBS, engine=DEFAULT_ENGINE):
+    """Yields the rendered HTML of each (filepath, content) task, in task order."""
+    if jobs <= 1 or len(tasks) < POOL_MIN_TASKS:
+        for filepath, content in tasks:
+            yield render_page(filepath, content, sidebar, engine)
+        return
+
+    workers = min(jobs, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                             initargs=(sidebar, engine)) as pool:
+        yield from pool.map(_render_task, tasks, chunksize=chunksize)
+
+def is_source_dir(name):
+    # Hidden directories are skipped, as glob("**/*.md") skips them
+    return name not in EXCLUDED_DIRS and not name.startswith(".")
+
+def is_source_file(name):
+    return name.endswith(".md") and not name.startswith(".")
+
+def find_md_files():
+    md_files = []
+    for root, dirs, files in os.walk(ROOT_DIR):
+        dirs[:] = [d for d in dirs if is_source_dir(d)]
+        md_files.extend(os.path.join(root, name) for name in files if is_source_file(name))
+    # Sort files
+    md_files.sort(key=lambda x: (0 if "Index.md" in x else 1, os.path.basename(x), x))
+    return md_files
+
+def get_output_owners(md_files):
+    """output -> the source rendered into it. Outputs are named after the basename, so when two sources
+    share one the last in build order owns it, and incremental builds stick to that same owner."""
+    return {get_html_filename(os.path.basename(filepath)): filepath for filepath in md_files}
+
+def remove_output(output_filename):
+    """Deletes an output that no longer has a source, with its .gz."""
+    removed = False
+    for path in (os.path.join(OUTPUT_DIR, output_filename), os.path.join(OUTPUT_DIR, output_filename + GZIP_SUFFIX)):
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+    if removed:
+        print(f"Removed: {output_filename}")
+    return removed
+
+def get_source_key(filepath):
+    return os.path.relpath(filepath, ROOT_DIR).replace(os.sep, '/')
+
+def read_source(filepath):
+    """Returns (source_hash, text) of a markdown file."""
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+    return hash_bytes(raw), raw.decode('utf-8').replace('\r\n', '\n')
+
+def write_output(output_filename, text, writer=None):
+    """Writes an output atomically, unless it already holds exactly this text. Returns True if written."""
+    writer = writer or output_writer.OutputWriter()
+    if not writer.write(os.path.join(OUTPUT_DIR, output_filename), text):
+        return False
+    print(f"Generated: {output_filename}")
+    return True
+
+def _collapse_whitespace(match):
+    return "\n" if "\n" in match.group(0) else " "
+
+def minify_html(html):
+    """
+    Collapses every whitespace run outside <pre>, <textarea>, <script> and <style> to a single
+    newline or space. Browsers collapse such runs anyway, so the page renders the same; what goes
+    is the template's indentation.
+    """
+    parts = []
+    pos = 0
+    for match in PRESERVED_BLOCK_RE.finditer(html):
+        parts.append(WHITESPACE_RE.sub(_collapse_whitespace, html[pos:match.start()]))
+        parts.append(match.group(0))
+        pos = match.end()
+    parts.append(WHITESPACE_RE.sub(_collapse_whitespace, html[pos:]))
+    return "".join(parts).strip() + "\n"
+
+def compress_output(output_filename, writer=None):
+    """Writes <output>.gz next to an output at the highest level. Returns (size, compressed size)."""
+    path = os.path.join(OUTPUT_DIR, output_filename)
+    with open(path, 'rb') as f:
+        data = f.read()
+    # mtime=0 keeps the bytes reproducible, so an unchanged page gives an unchanged .gz
+    packed = gzip.compress(data, compresslevel=9, mtime=0)
+    (writer or output_writer.OutputWriter()).write(path + GZIP_SUFFIX, packed)
+    return len(data), len(packed)
+
+def print_size_report(sizes):
+    """sizes: output -> (rendered bytes, written bytes, gzip bytes or None)"""
+    if not sizes:
+        return
+    width = max(len(name) for name in sizes)
+    print(f"{'File':<{width}}  {'Rendered':>9}  {'Written':>9}  {'Gzip':>9}  Saved")
+    totals = [0, 0, 0]
+    for name in sorted(sizes):
+        rendered, written, packed = sizes[name]
+        final = written if packed is None else packed
+        totals[0] += rendered
+        totals[1] += written
+        totals[2] += final
+        print(f"{name:<{width}}  {rendered:>9}  {written:>9}  {'-' if packed is None else packed:>9}  "
+              f"{(1 - final / rendered) * 100 if rendered else 0:5.1f}%")
+    rendered, written, final = totals
+    print(f"{'Total':<{width}}  {rendered:>9}  {written:>9}  {final:>9}  "
+          f"{(1 - final / rendered) * 100 if rendered else 0:5.1f}%")
+
+class DashboardBuilder:
+    """
+    One dashboard build configuration plus the state of its last build (file list, sidebar,
+    manifest). Long-running callers such as the watcher keep an instance around, so a single
+    page edit only re-renders that page instead of starting a fresh build.
+    """
+
+    def __init__(self, engine=DEFAULT_ENGINE, shared_nav=False, jobs=DEFAULT_JOBS, minify=False, precompress=False):
+        self.engine = engine
+        self.shared_nav = shared_nav
+        self.jobs = jobs
+        self.minify = minify            # strip the indentation outside <pre> blocks from HTML outputs
+        self.precompress = precompress  # keep a .gz of every output for servers that send it as is
+        self.sizes = {}                 # output -> (rendered, written) bytes, for the size report
+        self.writer = output_writer.OutputWriter()
+        self.search = search_index.SearchIndex(SEARCH_DIR)
+        self.md_files = None
+        self.owners = {}
+        self.sidebar = None
+        self.manifest = None
+
+    def _reusable_pages(self, md_files, generator_hash, nav_hash, force=False):
+        """The manifest entries of the previous build that are still valid for this one."""
+        # Pages are only re-rendered when their source, the generator or the nav set changed
+        # (with a shared nav the pages don't embed the page set, so it only affects nav.js and the index)
+        old_manifest = None if force else (self.manifest or load_manifest())
+        nav_changed = old_manifest and old_manifest.get("nav") != nav_hash and not self.shared_nav
+        if old_manifest and (old_manifest.get("generator") != generator_hash or nav_changed):
+            print("Generator or page set changed, rebuilding all pages.")
+            old_manifest = None
+        return old_manifest["pages"] if old_manifest else {}
+
+    def _set_state(self, md_files, sidebar, generator_hash, nav_hash, pages):
+        self.md_files = md_files
+        self.owners = get_output_owners(md_files)
+        self.sidebar = sidebar
+        self.manifest = {
+            "version": MANIFEST_VERSION,
+            "generator": generator_hash,
+            "nav": nav_hash,
+            "precompress": self.precompress,
+            "pages": pages,
+        }
+
+    def _write(self, output_filename, text):
+        """Writes one output unless the file already has this content. Returns True if written."""
+        rendered = len(text.encode('utf-8'))
+        if self.minify and output_filename.endswith(".html"):
+            text = minify_html(text)
+        self.sizes[output_filename] = (rendered, len(text.encode('utf-8')))
+        return write_output(output_filename, text, self.writer)
+
+    def _post_process(self, written, pages=None):
+        """
+        Precompresses the outputs just written (and any output of `pages` that has no .gz yet) on a
+        thread pool, zlib releases the GIL while it works. Without --precompress, .gz files left from
+        an earlier build are removed so servers can't send stale bytes. Prints the size report.
+        """
+        if not self.precompress:
+            for output_filename in written:
+                stale = os.path.join(OUTPUT_DIR, output_filename + GZIP_SUFFIX)
+                if os.path.exists(stale):
+                    os.remove(stale)
+            if self.minify:
+                print_size_report({name: self.sizes[name] + (None,) for name in written if name in self.sizes})
+            return
+
+        targets = list(dict.fromkeys(written))
+        for entry in (pages or {}).values():
+            if not os.path.exists(os.path.join(OUTPUT_DIR, entry["output"] + GZIP_SUFFIX)):
+                targets.append(entry["output"])
+        targets = list(dict.fromkeys(targets))
+        if not targets:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, self.jobs)) as pool:
+            results = list(pool.map(lambda name: compress_output(name, self.writer), targets))
+        report = {}
+        for output_filename, (size, packed) in zip(targets, results):
+            rendered, _ = self.sizes.get(output_filename, (size, size))
+            report[output_filename] = (rendered, size, packed)
+        print_size_report(report)
+
+    def _index_pages(self, replaced, indexed):
+        """
+        Updates the search index in the same pass as the render. `replaced` are the manifest entries
+        of pages that were re-rendered or removed, `indexed` the (entry, filepath, content) of pages
+        to add; each entry records its doc id and shards so a later change patches just those.
+        """
+        removed = [(entry["doc"], entry["shards"]) for entry in replaced if entry and "doc" in entry]
+        added = [(entry["output"], get_page_title(os.path.basename(filepath)), search_index.term_counts(content))
+                 for entry, filepath, content in indexed]
+        if not removed and not added:
+            return
+        mark_search_pending()
+        self.manifest["search_pending"] = True
+        for (entry, _, _), (doc_id, shards) in zip(indexed, self.search.apply(removed, added)):
+            entry["doc"] = doc_id
+            entry["shards"] = shards
+        del self.manifest["search_pending"]
+
+    def _is_owner(self, filepath):
+        output_filename = get_html_filename(os.path.basename(filepath))
+        owner = self.owners.get(output_filename)
+        if owner == filepath:
+            return True
+        print(f"Skipped: {get_source_key(filepath)} (shadowed by {get_source_key(owner)}, both map to {output_filename})")
+        return False
+
+    def _remove_stale_outputs(self, old_pages, pages):
+        """Deletes the outputs of the last build that no entry of this one produces (deleted or shadowed sources)."""
+        current = {entry["output"] for entry in pages.values()}
+        stale = {entry["output"] for entry in old_pages.values()} - current
+        return [name for name in sorted(stale) if remove_output(name)]
+
+    def _write_index(self, pages, nav_hash):
+        index_sidebar = mark_active_link(self.sidebar, "index.html")
+        pages[INDEX_KEY] = {"source": nav_hash, "output": "index.html"}
+        return self._write("index.html", get_page_template("Dashboard Home", get_index_content(self.md_files), index_sidebar))
+
+    def _write_nav_script(self, pages, nav_hash):
+        pages[NAV_KEY] = {"source": nav_hash, "output": NAV_SCRIPT}
+        return self._write(NAV_SCRIPT, get_nav_script(self.md_files))
+
+    def _write_stylesheet(self, pages):
+        pages[STYLESHEET_KEY] = {"source": STYLESHEET, "output": STYLESHEET}
+        # Stylesheets of earlier templates are no longer referenced by any page
+        for path in glob.glob(os.path.join(OUTPUT_DIR, "site.*.css")) + glob.glob(os.path.join(OUTPUT_DIR, "site.*.css" + GZIP_SUFFIX)):
+            if os.path.basename(path) not in (STYLESHEET, STYLESHEET + GZIP_SUFFIX):
+                os.remove(path)
+        return self._write(STYLESHEET, SITE_CSS)
+
+    def load(self):
+        """Picks up the file list and the last manifest without rendering anything, see ensure_output()."""
+        md_files = find_md_files()
+        generator_hash = get_generator_hash(self.engine, self.shared_nav, self.minify)
+        nav_hash = get_nav_hash(md_files)
+        previous = self.manifest or load_manifest()
+        pages = dict(self._reusable_pages(md_files, generator_hash, nav_hash))
+        if not pages and previous:
+            # Nothing is reusable, but the old entries still own their search docs: kept without a
+            # source hash, every page counts as stale and replaces its doc when it is re-rendered
+            pages = {key: dict(entry, source=None) for key, entry in previous["pages"].items()}
+        sidebar = SHARED_SIDEBAR_HTML if self.shared_nav else build_sidebar_html(md_files)
+        self._set_state(md_files, sidebar, generator_hash, nav_hash, pages)
+
+    def build(self, force=False):
+        """Incremental build of the whole dashboard. Returns the output files written."""
+        md_files = find_md_files()
+        print(f"Found {len(md_files)} md files.")
+        last_manifest = self.manifest or load_manifest()
+
+        generator_hash = get_generator_hash(self.engine, self.shared_nav, self.minify)
+        nav_hash = get_nav_hash(md_files)
+        old_pages = self._reusable_pages(md_files, generator_hash, nav_hash, force)
+        pages = {}
+        written = []
+        skipped = 0
+        self.writer = output_writer.OutputWriter()
+
+        # The index only depends on the sources, so it stays incremental even when the previous
+        # build's pages are not reusable (template or page set changed)
+        previous = None if force else (self.manifest or load_manifest())
+        reindex = not previous or previous.get("search_pending") or not self.search.exists()
+        if reindex:
+            self.search.reset()
+        sources = []
+        self.owners = get_output_owners(md_files)
+
+        # Collect the pages that need rendering
+        tasks = []
+        for filepath in md_files:
+            if not self._is_owner(filepath):
+                continue
+            source_key = get_source_key(filepath)
+            try:
+                source_hash, content = read_source(filepath)
+            except Exception as e:
+                print(f"Error reading {os.path.basename(filepath)}: {e}")
+                continue
+
+            sources.append((source_key, source_hash, filepath, content))
+            if is_up_to_date(old_pages.get(source_key), source_hash):
+                pages[source_key] = old_pages[source_key]
+                skipped += 1
+                continue
+
+            tasks.append((source_key, source_hash, filepath, content))
+
+        # The sidebar is built once per build, pages only get their active link marked
+        sidebar = SHARED_SIDEBAR_HTML if self.shared_nav else build_sidebar_html(md_files)
+        self._set_state(md_files, sidebar, generator_hash, nav_hash, pages)
+
+        # Generate individual pages, results come back in task order whatever the worker count
+        rendered = render_pages([(filepath, content) for _, _, filepath, content in tasks],
+                                sidebar, self.jobs, self.engine)
+        for (source_key, source_hash, filepath, _), full_html in zip(tasks, rendered):
+            output_filename = get_html_filename(os.path.basename(filepath))
+            pages[source_key] = {"source": source_hash, "output": output_filename}
+            # A re-render that comes out byte-identical (e.g. a template edit that doesn't touch
+            # this page) leaves the file and its mtime alone
+            if self._write(output_filename, full_html):
+                written.append(output_filename)
+
+        # Pages whose source is unchanged keep their index entries; edited, new and deleted ones are patched in
+        previous_pages = {} if reindex else previous["pages"]
+        replaced = [entry for key, entry in previous_pages.items() if key not in pages]
+        indexed = []
+        for source_key, source_hash, filepath, content in sources:
+            entry, before = pages[source_key], previous_pages.get(source_key)
+            if before and "doc" in before and before["source"] == source_hash and before["output"] == entry["output"]:
+                entry["doc"], entry["shards"] = before["doc"], before["shards"]
+            else:
+                replaced.append(before)
+                indexed.append((entry, filepath, content))
+        self._index_pages(replaced, indexed)
+
+        # Generate Index Page (Landing Page), it only depends on the nav set
+        if is_up_to_date(old_pages.get(INDEX_KEY), nav_hash):
+            pages[INDEX_KEY] = old_pages[INDEX_KEY]
+            skipped += 1
+        elif self._write_index(pages, nav_hash):
+            written.append("index.html")
+
+        # The stylesheet only changes with the template, which also rebuilds every page
+        if is_up_to_date(old_pages.get(STYLESHEET_KEY), STYLESHEET):
+            pages[STYLESHEET_KEY] = old_pages[STYLESHEET_KEY]
+            skipped += 1
+        elif self._write_stylesheet(pages):
+            written.append(STYLESHEET)
+
+        if self.shared_nav:
+            if is_up_to_date(old_pages.get(NAV_KEY), nav_hash):
+                pages[NAV_KEY] = old_pages[NAV_KEY]
+                skipped += 1
+            elif self._write_nav_script(pages, nav_hash):
+                written.append(NAV_SCRIPT)
+
+        if last_manifest:
+            self._remove_stale_outputs(last_manifest["pages"], pages)
+            if last_manifest.get("precompress") and not self.precompress:
+                # Unchanged pages keep their output, but their .gz must not outlive --precompress
+                self._post_process([entry["output"] for entry in pages.values()])
+        self._post_process(written, pages)
+        save_manifest(self.manifest)
+
+        print(f"Up to date: {skipped} files skipped; outputs {self.writer.summary()}.")
+        return written
+
+    def update(self, changed_paths, page_set_changed=False):
+        """
+        Re-renders only the given markdown files with the sidebar of the last build.
+        Falls back to build() on the first call or when files were added or removed,
+        since those change the nav. Returns the output files written.
+        """
+        if self.manifest is None or page_set_changed:
+            return self.build()
+
+        known = set(self.md_files)
+        pages = self.manifest["pages"]
+        written = []
+        changed = False
+        for filepath in changed_paths:
+            if filepath not in known or not self._is_owner(filepath):
+                continue
+            source_key = get_source_key(filepath)
+            try:
+                source_hash, content = read_source(filepath)
+            except Exception as e:
+                print(f"Error reading {os.path.basename(filepath)}: {e}")
+                continue
+            # Saving without editing fires events too
+            if is_up_to_date(pages.get(source_key), source_hash):
+                continue
+
+            output_filename = get_html_filename(os.path.basename(filepath))
+            old_entry = pages.get(source_key)
+            pages[source_key] = {"source": source_hash, "output": output_filename}
+            self._index_pages([old_entry], [(pages[source_key], filepath, content)])
+            changed = True
+            if self._write(output_filename, render_page(filepath, content, self.sidebar, self.engine)):
+                written.append(output_filename)
+
+        if changed:
+            self._post_process(written)
+            save_manifest(self.manifest)
+        return written
+
+    def ensure_output(self, output_filename):
+        """
+        Renders one output file on demand if it is missing or stale (used by the dev server,
+        which starts from load() instead of a full build). Returns True if it was written.
+        """
+        if self.manifest is None:
+            self.load()
+        pages = self.manifest["pages"]
+        nav_hash = self.manifest["nav"]
+
+        if output_filename == "index.html":
+            if is_up_to_date(pages.get(INDEX_KEY), nav_hash):
+                return False
+            wrote = self._write_index(pages, nav_hash)
+        elif output_filename == STYLESHEET:
+            if is_up_to_date(pages.get(STYLESHEET_KEY), STYLESHEET):
+                return False
+            wrote = self._write_stylesheet(pages)
+        elif output_filename == NAV_SCRIPT and self.shared_nav:
+            if is_up_to_date(pages.get(NAV_KEY), nav_hash):
+                return False
+            wrote = self._write_nav_script(pages, nav_hash)
+        else:
+            owner = self.owners.get(output_filename)
+            return bool(owner) and bool(self.update([owner]))
+
+        self._post_process([output_filename] if wrote else [])
+        save_manifest(self.manifest)
+        return wrote
+
+def generate_dashboard(force=False, jobs=DEFAULT_JOBS, engine=DEFAULT_ENGINE, shared_nav=False, minify=False, precompress=False):
+    DashboardBuilder(engine, shared_nav, jobs, minify, precompress).build(force)
     print(f"All files are in: {OUTPUT_DIR}")
 
-if __name__ == "__main__":
-    generate_dashboard()
+def main():
+    parser = argparse.ArgumentParser(description="Generate the HTML dashboard from the Markdown docs.")
+    parser.add_argument("--force", action="store_true", help="ignore the build manifest and rebuild every page")
+    parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS,
+                        help=f"number of render processes (default: CPU count; 1, or fewer than "
+                             f"{POOL_MIN_TASKS} changed pages, renders in-process)")
+    parser.add_argument("--markdown", choices=markdown_engine.ENGINES, default=DEFAULT_ENGINE,
+                        help="markdown flavour: standard HTML, compat (old markup) or legacy (old regex chain, the default)")
+    parser.add_argument("--shared-nav", action="store_true",
+                        help="load the sidebar from one shared nav.js instead of inlining it in every page")
+    parser.add_argument("--minify", action="store_true", help="collapse the whitespace outside <pre> blocks in pages")
+    parser.add_argument("--precompress", action="store_true",
+                        help="also write a .gz of every changed output (gzip level 9) and print a size report")
+    args = parser.parse_args()
+    generate_dashboard(force=args.force, jobs=args.jobs, engine=args.markdown, shared_nav=args.shared_nav,
+                       minify=args.minify, precompress=args.precompress)
 
+if __name__ == "__main__":
+    main()
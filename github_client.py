@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+GitHub REST API 客户端 - 仅使用 Python 内置模块
+连接复用（keep-alive 连接池）、ETag 条件请求、5xx/限流自动重试、解析 X-RateLimit-* 响应头。
+只有幂等请求会在 5xx 或发出后断线时重试；POST/PATCH 只在确定没有发出去、或被限流拒绝时重试，
+避免服务器已经执行过（建了提交、建了仓库）还再执行一次。
+base_url 可以是 http:// 地址，便于对本地的 mock_github_server.py 做测试和测速。
+"""
+
+import json
+import time
+import base64
+import queue
+import select
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+# 这些状态码值得重试（服务器临时错误）；服务器可能已经执行了请求，所以只对幂等方法重试
+RETRY_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# 连接被对端关闭（通常是空闲的 keep-alive 连接过期），换一个新连接立即重试
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                           ConnectionResetError, BrokenPipeError)
+
+
+class GitHubResponse:
+    """一次 API 调用的结果"""
+
+    def __init__(self, status, data, headers=None, from_cache=False, sent=0, received=0, attempts=1):
+        self.status = status
+        self.data = data
+        self.headers = headers or {}
+        self.from_cache = from_cache  # 服务器返回 304，数据来自本地 ETag 缓存
+        self.sent = sent              # 请求正文字节数
+        self.received = received      # 响应正文字节数（最后一次尝试）
+        self.attempts = attempts      # 包括重试在内的发送次数
+
+
+class GitHubClient:
+    def __init__(self, token, username=None, base_url="https://api.github.com",
+                 timeout=10, max_retries=3, backoff=0.5, max_wait=60, pool_size=8):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_wait = max_wait  # 限流时最多等待的秒数，超过就直接返回错误
+
+        # 认证头只构建一次
+        if username:
+            auth = "Basic " + base64.b64encode((username + ":" + token).encode()).decode()
+        else:
+            auth = "token " + token
+        self.default_headers = {
+            "Authorization": auth,
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "qhphysics-docs-deployer",
+        }
+
+        self.pool = queue.LifoQueue(maxsize=pool_size)  # 空闲连接
+        self.etags = {}                                  # GET 路径 -> (ETag, 数据)
+        self.lock = threading.Lock()
+        self.rate_limit = {}
+        self.request_count = 0
+        self.connection_count = 0
+
+    # ------------------------------------------------------------------
+    # 连接池
+    # ------------------------------------------------------------------
+    def _new_connection(self):
+        with self.lock:
+            self.connection_count += 1
+        if self.scheme == "http":
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self):
+        while True:
+            try:
+                conn = self.pool.get_nowait()
+            except queue.Empty:
+                return self._new_connection()
+            # 空闲时被对端关闭的连接此时已可读（EOF）；先丢掉，免得请求发出去才发现断线
+            if conn.sock is not None and not select.select([conn.sock], [], [], 0)[0]:
+                return conn
+            conn.close()
+
+    def _release(self, conn):
+        try:
+            self.pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ------------------------------------------------------------------
+    # 限流
+    # ------------------------------------------------------------------
+    def _update_rate_limit(self, headers):
+        info = {}
+        for key in ("limit", "remaining", "reset", "used"):
+            value = headers.get("x-ratelimit-" + key)
+            if value is not None and value.isdigit():
+                info[key] = int(value)
+        if "x-ratelimit-resource" in headers:
+            info["resource"] = headers["x-ratelimit-resource"]
+        if info:
+            with self.lock:
+                self.rate_limit = info
+
+    def _retry_delay(self, status, headers, attempt, idempotent=True):
+        """需要重试时返回等待秒数，不需要重试时返回 None"""
+        retry_after = headers.get("retry-after")
+        rate_limited = status == 429 or (status == 403 and (
+            retry_after is not None or headers.get("x-ratelimit-remaining") == "0"))
+
+        # 被限流的请求服务器没有执行，任何方法都可以重试；5xx 只重试幂等请求
+        if not rate_limited and (status not in RETRY_STATUSES or not idempotent):
+            return None
+        if retry_after is not None and retry_after.isdigit():
+            # 次级限流：服务器给出了等待时间
+            delay = int(retry_after)
+        elif rate_limited and headers.get("x-ratelimit-remaining") == "0" and headers.get("x-ratelimit-reset", "").isdigit():
+            # 主限流：等到配额重置
+            delay = max(0, int(headers["x-ratelimit-reset"]) - time.time()) + 1
+        else:
+            delay = self.backoff * (2 ** attempt)
+        return delay if delay <= self.max_wait else None
+
+    # ------------------------------------------------------------------
+    # 请求
+    # ------------------------------------------------------------------
+    def request(self, method, path, data=None, headers=None, cache=True, idempotent=None):
+        """
+        发送请求并返回 GitHubResponse。网络错误在重试用尽后返回 status 0，
+        与原先 make_github_request 的约定一致。cache=False 时不发条件请求也不记录 ETag。
+        idempotent 默认按方法判断；内容寻址的 POST（上传 blob）重复执行结果相同，可以传 True。
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        body = json.dumps(data).encode() if data is not None else None
+        request_headers = dict(self.default_headers)
+        if body is not None:
+            request_headers["Content-Type"] = "application/json"
+        if headers:
+            request_headers.update(headers)
+
+        cached = self.etags.get(path) if method == "GET" and cache else None
+        if cached:
+            request_headers["If-None-Match"] = cached[0]
+
+        attempt = 0
+        while True:
+            conn = self._acquire()
+            sent = False
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=request_headers)
+                sent = True
+                response = conn.getresponse()
+                raw = response.read()
+                response_headers = {k.lower(): v for k, v in response.getheaders()}
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                # 请求发出后才断开时，服务器可能已经执行了它：非幂等请求不能盲目重发
+                if attempt >= self.max_retries or (sent and not idempotent):
+                    return GitHubResponse(0, {"error": str(e)}, sent=len(body or b""), attempts=attempt + 1)
+                if not isinstance(e, STALE_CONNECTION_ERRORS):
+                    time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+                continue
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            with self.lock:
+                self.request_count += 1
+            self._update_rate_limit(response_headers)
+
+            if response.status == 304 and cached:
+                return GitHubResponse(200, cached[1], response_headers, from_cache=True,
+                                      sent=len(body or b""), received=len(raw), attempts=attempt + 1)
+
+            delay = self._retry_delay(response.status, response_headers, attempt, idempotent)
+            if delay is not None and attempt < self.max_retries:
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            try:
+                payload = json.loads(raw.decode()) if raw else {}
+            except ValueError:
+                payload = {"error": raw.decode("utf-8", "replace")}
+
+            if cache and method == "GET" and response.status == 200 and "etag" in response_headers:
+                self.etags[path] = (response_headers["etag"], payload)
+            return GitHubResponse(response.status, payload, response_headers,
+                                  sent=len(body or b""), received=len(raw), attempts=attempt + 1)
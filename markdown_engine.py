@@ -0,0 +1,575 @@
+"""
+Single-pass Markdown renderer used by generate_dashboard.py.
+
+The document is scanned once by a compiled block regex whose alternatives
+tokenize it into fences, headers, list item runs, blockquotes, tables and
+paragraphs. The inline text of each block is escaped and lexed by one
+compiled regex as the block is emitted (a list run, a quote or a table in a
+single call, since no inline rule crosses a line), the HTML goes into one
+list buffer and the buffer is joined once. Fenced code never reaches the
+inline lexer and code spans are matched before any other inline rule, so in
+the standard flavour nothing is rewritten inside code.
+
+Two output flavours are available:
+    standard  - clean block HTML (<p>, nested lists, tables, <hr>, ...)
+    compat    - the markup of the old regex renderer (<br><br> paragraph
+                breaks, <b>, flat '* ' lists, fences and code spans as it
+                printed them), kept for golden-output checks
+
+render_legacy() is the previous chain of re.sub passes, the golden reference
+and the benchmark baseline. compat differs from it only where the old chain
+had bugs:
+    - text is HTML-escaped ('&', '<', '>'); legacy copied it through raw
+    - in fenced code only blank lines become <br><br>; legacy also ran its
+      bold, link, header, list and quote rules there
+
+Usage:
+    python markdown_engine.py --bench [files...]
+    python markdown_engine.py --golden [files...]
+"""
+
+import os
+import re
+import html
+import glob
+import time
+import argparse
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENGINES = ("standard", "compat", "legacy")
+
+# Tags that may appear as raw HTML inside Markdown; anything else (<T>, <float>...) is text
+HTML_TAGS = (
+    "a|abbr|b|br|code|del|details|div|em|font|hr|i|img|ins|kbd|mark|p|pre|s|small|span|"
+    "strong|sub|summary|sup|table|tbody|td|th|thead|tr|u|ul|ol|li|script|style|iframe|svg"
+)
+
+# Block scanner: one alternative per block kind, matched in MULTILINE mode from line starts.
+# Each alternative's outermost group closes last, so Match.lastgroup names the block. Blank
+# lines after a block are taken with it (outside its group) instead of costing a match of
+# their own; only blank lines at the very start of the document match 'blank'.
+_BLOCK_RE = re.compile(r"""
+    (?P<blank>(?:^[ \t]*(?:\n|\Z))+)
+  | (?:
+    ^(?P<header_mark>\#{1,6})[ \t]+(?P<header>[^\n]*)(?:\n|\Z)
+  | (?P<hr>^[ ]{0,3}(?:(?:\*[ \t]*){3,}|(?:-[ \t]*){3,}|(?:_[ \t]*){3,})(?:\n|\Z))
+  | (?P<item>^(?P<item_indent>[ \t]*)(?:
+        (?P<item_bullet>[*+-])(?:[ \t]+|(?=\n|\Z))
+        (?P<item_text>[^\n]*(?:\n(?P=item_indent)(?!(?:[*-][ \t]*){3,}(?:\n|\Z))[*+-](?:[ \t]+|(?=\n|\Z))[^\n]*)*)
+      | \d{1,9}[.)](?:[ \t]+|(?=\n|\Z))(?P<item_num_text>[^\n]*(?:\n(?P=item_indent)\d{1,9}[.)](?:[ \t]+|(?=\n|\Z))[^\n]*)*)
+        )(?:\n|\Z))
+  | (?P<fence>^[ ]{0,3}(?P<fence_mark>`{3,}|~{3,})[ \t]*(?P<fence_lang>[^`\s]*)[^\n]*(?:\n|\Z)
+        (?P<fence_body>(?:[^\n]*\n)*?)
+        (?:^[ ]{0,3}(?P=fence_mark)[`~]*[ \t]*(?:\n|\Z)|\Z))
+  | (?P<quote>(?:^[ ]{0,3}>[^\n]*(?:\n|\Z))+)
+  | (?P<table>^[^\n]*\|[^\n]*\n
+        [ \t]*\|?(?:[ \t]*:?-+:?[ \t]*\|)+[ \t]*(?::?-+:?[ \t]*)?(?:\n|\Z)
+        (?:^[^\n]*\|[^\n]*(?:\n|\Z))*)
+  | (?P<para>(?:^(?!
+            [ \t]*(?:\n|\Z)
+          | [ ]{0,3}(?:`{3}|~{3}|\#{1,6}[ \t]|>)
+          | [ \t]*(?:[*+-]|\d{1,9}[.)])[ \t]
+          | [ ]{0,3}(?:[*_-][ \t]*){3,}(?:\n|\Z)
+          | [^\n]*\|[^\n]*\n[ \t]*\|?[ \t]*:?-+:?[ \t]*\|
+        )[^\n]+(?:\n|\Z))+)
+  | (?P<text>[^\n]+(?:\n|\Z))
+    )(?:[ \t]*\n)*
+""", re.VERBOSE | re.MULTILINE)
+# The old renderer's rules, line-start anchored like its MULTILINE regexes. Tokens never
+# include their trailing newline; newline runs are tokens of their own (see _render_compat).
+_COMPAT_LINE_START = r'(?![ \t]*```|\*\ |>\ |\#{1,4}\ )'
+_COMPAT_BLOCK_RE = re.compile(r"""
+    (?P<c_blank>\n+)
+  | ^(?P<c_hmark>\#{1,4})\ (?P<c_head>[^\n]*)
+  | (?P<c_ul>^\*\ [^\n]*(?:\n\*\ [^\n]*)*)
+  | (?P<c_quote>^>\ [^\n]*(?:\n>\ [^\n]*)*)
+  | (?P<c_fence>^(?P<c_fence_indent>[ \t]*)```(?P<c_fence_info>[^\n]*\n?)
+        (?P<c_fence_body>(?:(?![ \t]*```)[^\n]*\n)*(?:(?![ \t]*```)[^\n]+\Z)?[ \t]*)
+        (?:```[^\n]*)?)
+  | (?P<c_text>^""" + _COMPAT_LINE_START + r"""[^\n]+(?:\n""" + _COMPAT_LINE_START + r"""[^\n]+)*)
+  | (?P<c_line>[^\n]+)
+""", re.VERBOSE | re.MULTILINE)
+
+# Marker of the next sibling inside a run of list items; an empty item is a bare marker
+_ITEM_SPLIT_RE = re.compile(r'\n[ \t]*(?:[*+-]|\d{1,9}[.)])(?:[ \t]+|(?=\n)|\Z)')
+
+_HEADER_CLOSE_RE = re.compile(r'(?:^|[ \t]+)#+[ \t]*$|[ \t]+$')
+_HEADER_TAGS = [None] + [(f'<h{n}>', f'</h{n}>\n') for n in range(1, 7)]
+_QUOTE_PREFIX_RE = re.compile(r'^[ ]{0,3}> ?', re.MULTILINE)
+_TABLE_CELL_RE = re.compile(r'\|(?<!\\\|)')
+
+# The inline lexer runs on already-escaped text: '<', '>' and bare '&' appear as entities.
+# Every alternative starts with a literal character, which lets the regex engine jump
+# straight to candidate positions, and ends in its own named group, so Match.lastgroup
+# says which rule matched. code_span and strong_run are the plain common cases of the rule
+# after them: trying them first saves that rule's per-character backtracking, and a strong_run
+# holds nothing the lexer would touch, so it is emitted as it is.
+_INLINE_RE = re.compile(r"""
+    `(?P<code_span>[^`\n]+)`(?!`)
+  | `(?P<code>`*)(?P<code_text>.+?)(?<!`)`(?P=code)(?!`)
+  | !\[(?P<img_alt>[^\]\n]*)\]\((?P<img_src>[^)\s]*)(?:\ +"[^"\n]*")?\)
+  | \[(?P<link_text>(?:[^\[\]\n]|\[[^\]\n]*\])*)\]\((?P<link_url>[^)\s]*)(?:\ +(?:"[^"\n]*"|'[^'\n]*'))?\)
+  | \*\*(?P<strong_run>[^*`\n\[&\\]+)\*\*
+  | \*\*(?P<strong>[^`\n]+?|(?:(?>`[^`\n]*`)|[^`\n]|`(?![^`\n]*`))+?)\*\*
+  | \*(?<![\w*]\*)(?P<em>[^\s*](?:[^*\n]*[^\s*])?)\*(?![\w*])
+  | &lt;(?:(?P<tag>/?(?i:""" + HTML_TAGS + r""")\b(?:(?!&[lg]t;)[^\n])*?|!--.*?--)&gt;
+        |(?P<autolink>https?://(?:(?!&gt;)[^\s])+)&gt;)
+  | \\(?P<escape>[\\`*_{}\[\]()#+\-.!|]|&[lg]t;|&amp;)
+""", re.VERBOSE)
+
+# Like CommonMark, '&' starting a valid entity is left alone
+_BARE_AMP_RE = re.compile(r'&(?!#?\w+;)')
+
+
+def escape_html(text):
+    if '&' in text:
+        text = _BARE_AMP_RE.sub('&amp;', text)
+    if '<' in text:
+        text = text.replace('<', '&lt;')
+    if '>' in text:
+        text = text.replace('>', '&gt;')
+    return text
+
+
+def escape_attr(text):
+    return html.escape(text, quote=True)
+
+
+def escape_code(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def md_link_to_html(url):
+    """Maps a link to a local Markdown file onto its generated page in the same output folder."""
+    path, sep, fragment = url.partition('#')
+    if path.endswith('.md'):
+        return os.path.basename(path)[:-3] + '.html' + sep + fragment
+    return None
+
+
+class MarkdownRenderer:
+    def __init__(self, compat=False):
+        self.compat = compat
+        tag = 'b' if compat else 'strong'
+        self._strong_open = f'<{tag}>'
+        self._strong_close = f'</{tag}>'
+
+    def render(self, text):
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+        if self.compat:
+            return ''.join(self._render_compat(text))
+        return ''.join(self._render_standard(text))
+
+    # ------------------------------------------------------------------
+    # Inline lexer
+    # ------------------------------------------------------------------
+    def _inline(self, text):
+        """Escapes and lexes the inline text of one block."""
+        if '&' in text or '<' in text or '>' in text:
+            return _INLINE_RE.sub(self._inline_token, escape_html(text))
+        if '*' in text or '`' in text or '[' in text or '\\' in text:
+            return _INLINE_RE.sub(self._inline_token, text)
+        return text
+
+    def _inline_inner(self, text):
+        if '*' in text or '`' in text or '[' in text or '&' in text or '\\' in text:
+            return _INLINE_RE.sub(self._inline_token, text)
+        return text
+
+    def _inline_token(self, m):
+        kind = m.lastgroup
+        if kind == 'strong_run':
+            return self._strong_open + m.group('strong_run') + self._strong_close
+        if kind == 'code_span' or kind == 'code_text':
+            if self.compat:
+                # The old renderer had no inline code: the backticks stay, the rules apply inside
+                ticks = '`' + (m.group('code') or '')
+                return ticks + self._inline_inner(m.group(kind)) + ticks
+            return '<code>' + m.group(kind).strip() + '</code>'
+        if kind == 'strong':
+            return self._strong_open + self._inline_inner(m.group('strong')) + self._strong_close
+        if kind == 'link_url':
+            if self.compat:
+                # The old rule took everything between the parentheses as the URL, title included
+                return self._link(self._inline_inner(m.group('link_text')), m.string[m.end('link_text') + 2:m.end() - 1])
+            return self._link(self._inline_inner(m.group('link_text')), m.group('link_url'))
+        if kind == 'img_src':
+            src = m.group('img_src').replace('"', '&quot;')
+            alt = m.group('img_alt').replace('"', '&quot;')
+            return f'<img src="{src}" alt="{alt}">'
+        if kind == 'em':
+            if self.compat:
+                return m.group()
+            return f'<em>{self._inline_inner(m.group("em"))}</em>'
+        if kind == 'tag':
+            # Raw HTML from the source, undo the escaping of its brackets
+            return '<' + m.group('tag') + '>'
+        if kind == 'autolink':
+            url = m.group('autolink')
+            return f'<a href="{url.replace(chr(34), "&quot;")}" target="_blank">{url}</a>'
+        if self.compat:
+            # The old renderer had no backslash escapes
+            return m.group()
+        return m.group('escape')
+
+    def _link(self, label, url):
+        href = url.replace('"', '&quot;')
+        local = md_link_to_html(href)
+        if self.compat:
+            # Old rule: *.md becomes a local page, everything else opens a new tab
+            if href.endswith('.md'):
+                return f'<a href="{local}">{label}</a>'
+            return f'<a href="{href}" target="_blank">{label}</a>'
+
+        if local is not None:
+            return f'<a href="{local}">{label}</a>'
+        if '://' in url or url.startswith('//') or url.startswith('mailto:'):
+            return f'<a href="{href}" target="_blank">{label}</a>'
+        return f'<a href="{href}">{label}</a>'
+
+    # ------------------------------------------------------------------
+    # Block tokenizer
+    # ------------------------------------------------------------------
+    def _render_standard(self, text):
+        out = []
+        inline = self._inline
+        lists = []          # stack of (indent, tag)
+        list_blank = False  # a blank line was seen inside the current list
+
+        def close_lists(indent=-1):
+            while lists and lists[-1][0] > indent:
+                out.append(f'</li></{lists.pop()[1]}>')
+            if not lists:
+                out.append('\n')
+
+        for m in _BLOCK_RE.finditer(text):
+            kind = m.lastgroup
+
+            if kind == 'blank':
+                if lists:
+                    list_blank = True
+                continue
+
+            if kind == 'item':
+                # A run of sibling items is one token
+                indent, bullet, item_text = m.group('item_indent', 'item_bullet', 'item_text')
+                indent = len(indent.expandtabs(4)) if '\t' in indent else len(indent)
+                if bullet:
+                    tag = 'ul'
+                else:
+                    tag = 'ol'
+                    item_text = m.group('item_num_text')
+                item_text = item_text.rstrip()
+                if item_text[:1].isspace():
+                    # An empty first item: strip its line only, the split needs the line break
+                    first, newline, rest = item_text.partition('\n')
+                    item_text = first.lstrip() + newline + rest
+                items = inline(item_text)
+                if '\n' in items:
+                    items = '</li><li>'.join(_ITEM_SPLIT_RE.split(items))
+                list_blank = m.end() != m.end('item')
+                if lists and lists[-1] == (indent, tag):
+                    # Next sibling, by far the most common case
+                    out.extend(('</li><li>', items))
+                    continue
+                if lists and indent < lists[-1][0]:
+                    close_lists(indent)
+                if lists and indent <= lists[-1][0]:
+                    if lists[-1][1] != tag:
+                        out.append(f'</li></{lists.pop()[1]}><{tag}>')
+                        lists.append((indent, tag))
+                    else:
+                        out.append('</li>')
+                else:
+                    out.append(f'<{tag}>')
+                    lists.append((indent, tag))
+                out.extend(('<li>', items))
+                continue
+
+            if lists:
+                # Text right under an item, or indented after a blank line, continues that item
+                if kind in ('para', 'text') and (not list_blank or m.group()[:1] in ' \t'):
+                    out.extend(('\n', inline(m.group(kind).strip())))
+                    list_blank = m.end() != m.end(kind)
+                    continue
+                close_lists()
+                list_blank = False
+
+            if kind == 'para' or kind == 'text':
+                out.extend(('<p>', inline(m.group(kind).strip()), '</p>\n'))
+            elif kind == 'header':
+                mark, header = m.group('header_mark', 'header')
+                if header.endswith(('#', ' ', '\t')):
+                    header = _HEADER_CLOSE_RE.sub('', header)
+                open_tag, close_tag = _HEADER_TAGS[len(mark)]
+                out.extend((open_tag, inline(header), close_tag))
+            elif kind == 'fence':
+                language = m.group('fence_lang')
+                css = f' class="language-{escape_attr(language)}"' if language else ''
+                body = m.group('fence_body')
+                if body.endswith('\n'):
+                    body = body[:-1]
+                out.append(f'<pre><code{css}>' + escape_code(body) + '</code></pre>\n')
+            elif kind == 'quote':
+                quote = inline(_QUOTE_PREFIX_RE.sub('', m.group('quote')).rstrip('\n'))
+                out.extend(('<blockquote>', quote.replace('\n', '<br>'), '</blockquote>\n'))
+            elif kind == 'table':
+                self._table(m.group('table'), out, inline)
+            elif kind == 'hr':
+                out.append('<hr>\n')
+
+        if lists:
+            close_lists()
+        return out
+
+    def _table(self, table, out, inline):
+        rows = table.rstrip('\n').split('\n')
+        # A plain str.split does when no cell has an escaped pipe
+        escaped_pipe = '\\|' in table
+
+        def cells(row):
+            row = row.strip()
+            if row[:1] == '|':
+                row = row[1:]
+            if row[-1:] == '|' and row[-2:] != '\\|':
+                row = row[:-1]
+            return [c.strip() for c in (_TABLE_CELL_RE.split(row) if escaped_pipe else row.split('|'))]
+
+        aligns = []
+        for spec in cells(rows[1]):
+            if spec.startswith(':') and spec.endswith(':'):
+                aligns.append(' style="text-align:center"')
+            elif spec.endswith(':'):
+                aligns.append(' style="text-align:right"')
+            else:
+                aligns.append('')
+
+        # Cells hold no newline and no inline rule crosses one, so the whole table is lexed at once
+        table_cells = [cells(row) for row in rows[:1] + rows[2:]]
+        lexed = inline('\n'.join(['\n'.join(row) for row in table_cells])).split('\n')
+        start = 0
+        for i, row in enumerate(table_cells):
+            end = start + len(row)
+            table_cells[i] = lexed[start:end]
+            start = end
+
+        if any(aligns):
+            def row_html(row, tag):
+                out.append('<tr>')
+                for col, cell in enumerate(row):
+                    align = aligns[col] if col < len(aligns) else ''
+                    out.extend((f'<{tag}{align}>', cell, f'</{tag}>'))
+                out.append('</tr>')
+
+            out.append('<table><thead>')
+            row_html(table_cells[0], 'th')
+            out.append('</thead><tbody>')
+            for row in table_cells[1:]:
+                row_html(row, 'td')
+            out.append('</tbody></table>\n')
+            return
+
+        # Without alignment the markup between cells is the same everywhere, so the header
+        # and the body are laid out with one join each
+        out.extend(('<table><thead><tr><th>', '</th><th>'.join(table_cells[0]), '</th></tr></thead>'))
+        if len(table_cells) > 1:
+            row_sep = '</td></tr><tr><td>'
+            body = row_sep.join(['</td><td>'.join(row) for row in table_cells[1:]])
+            out.extend(('<tbody><tr><td>', body, '</td></tr></tbody></table>\n'))
+        else:
+            out.append('<tbody></tbody></table>\n')
+
+    def _render_compat(self, text):
+        """Same markup as render_legacy(), minus the legacy bugs listed in the module docstring."""
+        out = []
+        inline = self._inline
+        pending = 0  # newlines between the previous block and the next one
+
+        for m in _COMPAT_BLOCK_RE.finditer(text):
+            kind = m.lastgroup
+            if kind == 'c_blank':
+                pending += m.end() - m.start()
+                continue
+
+            if pending:
+                # The old renderer turned every pair of newlines into <br><br>
+                out.append('<br><br>' * (pending // 2) + '\n' * (pending % 2))
+                pending = 0
+
+            if kind == 'c_text' or kind == 'c_line':
+                out.append(inline(m.group()))
+            elif kind == 'c_head':
+                level = len(m.group('c_hmark'))
+                out.extend((_HEADER_TAGS[level][0], inline(m.group('c_head')), f'</h{level}>'))
+            elif kind == 'c_ul':
+                # Consecutive '* ' lines collapse into one list, as with the old '</ul>\n<ul>' removal
+                lines = [line[2:] for line in m.group().split('\n')]
+                out.extend(('<ul><li>', '</li><li>'.join(map(inline, lines)), '</li></ul>'))
+            elif kind == 'c_quote':
+                lines = [line[2:] for line in m.group().split('\n')]
+                out.extend(('<blockquote>', '<br>'.join(map(inline, lines)), '</blockquote>'))
+            else:
+                # Everything between the backticks is code, info string and closing indent included;
+                # the old renderer's last pass turned blank lines in there into <br><br> too
+                body = escape_code(m.group('c_fence_info') + m.group('c_fence_body'))
+                if '\n\n' in body:
+                    body = body.replace('\n\n', '<br><br>')
+                out.append(m.group('c_fence_indent') + '<pre><code>' + body + '</code></pre>')
+
+        if pending:
+            out.append('<br><br>' * (pending // 2) + '\n' * (pending % 2))
+        return out
+
+
+def render_legacy(text):
+    """The original regex renderer: one whole-document re.sub per rule."""
+    out = text
+    # Headers
+    out = re.sub(r'^# (.*$)', r'<h1>\1</h1>', out, flags=re.MULTILINE)
+    out = re.sub(r'^## (.*$)', r'<h2>\1</h2>', out, flags=re.MULTILINE)
+    out = re.sub(r'^### (.*$)', r'<h3>\1</h3>', out, flags=re.MULTILINE)
+    out = re.sub(r'^#### (.*$)', r'<h4>\1</h4>', out, flags=re.MULTILINE)
+
+    # Bold
+    out = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', out)
+
+    # Lists
+    out = re.sub(r'^\* (.*$)', r'<ul><li>\1</li></ul>', out, flags=re.MULTILINE)
+    out = out.replace('</ul>\n<ul>', '')
+
+    # Blockquotes
+    out = re.sub(r'^> (.*$)', r'<blockquote>\1</blockquote>', out, flags=re.MULTILINE)
+    out = out.replace('</blockquote>\n<blockquote>', '<br>')
+
+    # Links
+    def replace_link(match):
+        link_text = match.group(1)
+        link_url = match.group(2)
+        if link_url.endswith('.md'):
+            return f'<a href="{os.path.basename(link_url).replace(".md", ".html")}">{link_text}</a>'
+        return f'<a href="{link_url}" target="_blank">{link_text}</a>'
+
+    out = re.sub(r'\[(.*?)\]\((.*?)\)', replace_link, out)
+
+    # Code blocks
+    out = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', out, flags=re.DOTALL)
+
+    # Paragraphs (simple)
+    out = re.sub(r'\n\n', '<br><br>', out)
+
+    return out
+
+
+_RENDERERS = {
+    "standard": MarkdownRenderer(compat=False).render,
+    "compat": MarkdownRenderer(compat=True).render,
+    "legacy": render_legacy,
+}
+
+
+def render(text, engine="standard"):
+    return _RENDERERS[engine](text)
+
+
+# ----------------------------------------------------------------------
+# Benchmark / golden check
+# ----------------------------------------------------------------------
+def default_corpus():
+    files = [os.path.join(ROOT_DIR, "complete_doc.md")]
+    files += sorted(glob.glob(os.path.join(ROOT_DIR, "KnowledgeBase", "**", "*.md"), recursive=True))
+    return files
+
+
+def load_corpus(paths):
+    docs = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                docs.append((path, f.read()))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Skipping {path}: {e}")
+    return docs
+
+
+def benchmark(docs, rounds=20):
+    total_bytes = sum(len(text.encode('utf-8')) for _, text in docs)
+    print(f"Corpus: {len(docs)} files, {total_bytes / 1024:.1f} KB, best of {rounds} rounds")
+    print(f"{'engine':<10} {'time/ms':>10} {'MB/s':>8} {'peak alloc/KB':>14}")
+    for engine in ENGINES:
+        renderer = _RENDERERS[engine]
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _, text in docs:
+                renderer(text)
+            best = min(best, time.perf_counter() - start)
+
+        # Largest amount of memory held at once while rendering a single document
+        peak = 0
+        tracemalloc.start()
+        for _, text in docs:
+            tracemalloc.reset_peak()
+            renderer(text)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        print(f"{engine:<10} {best * 1000:>10.2f} {total_bytes / best / 1e6:>8.2f} {peak / 1024:>14.1f}")
+
+
+def golden_check(docs, strict=False):
+    """
+    Compares compat output with the legacy renderer; returns the number of differing files.
+    With strict, files that differ only in HTML escaping count as differing too.
+    """
+    compat = _RENDERERS["compat"]
+    differing = 0
+    escaping_only = 0
+    for path, text in docs:
+        expected = render_legacy(text)
+        actual = compat(text)
+        if expected == actual:
+            continue
+        if not strict and html.unescape(expected) == html.unescape(actual):
+            # The legacy renderer never escaped '&', '<' or '>' in text
+            escaping_only += 1
+            continue
+        differing += 1
+        exp_lines = expected.split('\n')
+        act_lines = actual.split('\n')
+        for lineno, (a, b) in enumerate(zip(exp_lines, act_lines), 1):
+            if a != b:
+                break
+        else:
+            lineno = min(len(exp_lines), len(act_lines)) + 1
+            a = exp_lines[lineno - 1] if lineno <= len(exp_lines) else '<EOF>'
+            b = act_lines[lineno - 1] if lineno <= len(act_lines) else '<EOF>'
+        print(f"DIFF {os.path.relpath(path, ROOT_DIR)}:{lineno}")
+        print(f"  legacy: {a[:120]}")
+        print(f"  compat: {b[:120]}")
+    identical = len(docs) - differing - escaping_only
+    print(f"{identical}/{len(docs)} files identical to the legacy output, "
+          f"{escaping_only} differ only in HTML escaping, {differing} differ.")
+    return differing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown engine benchmark and golden-output check.")
+    parser.add_argument("files", nargs="*", help="Markdown files (default: complete_doc.md + KnowledgeBase)")
+    parser.add_argument("--bench", action="store_true", help="time every engine on the corpus")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--golden", action="store_true", help="diff compat output against the legacy renderer")
+    parser.add_argument("--strict", action="store_true", help="with --golden, count escaping-only differences too")
+    args = parser.parse_args()
+
+    docs = load_corpus(args.files or default_corpus())
+    if args.golden:
+        golden_check(docs, args.strict)
+    if args.bench or not args.golden:
+        benchmark(docs, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
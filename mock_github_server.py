@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+本地 GitHub API 替身 - 仅使用 Python 内置模块
+实现部署脚本用到的几个接口（/user、建仓库、查仓库、Pages、Git Data API），支持 keep-alive、ETag 和限流响应头，
+可以注入延迟和故障，用来测试 github_client.py / auto_deploy.py 而不碰真实 API。
+
+用法：
+  python mock_github_server.py --port 8765            # 启动服务
+  python auto_deploy.py user token --api-url http://127.0.0.1:8765
+  python mock_github_server.py --bench 200            # 对比 urllib 与 GitHubClient 的请求延迟
+"""
+
+import re
+import sys
+import json
+import time
+import base64
+import hashlib
+import argparse
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATE_LIMIT = 5000
+
+
+class MockGitHubState:
+    """服务端的内存状态，所有请求线程共享"""
+
+    def __init__(self, latency=0.0, fail_every=0, throttle_every=0):
+        self.latency = latency              # 每个请求额外的处理延迟（秒）
+        self.fail_every = fail_every        # 每第 N 个请求返回 502
+        self.throttle_every = throttle_every  # 每第 N 个请求返回 403 + Retry-After（次级限流）
+        self.lock = threading.Lock()
+        self.repos = {}    # "owner/name" -> 仓库信息
+        self.pages = {}    # "owner/name" -> Pages 信息
+        self.git = {}      # "owner/name" -> MockGitRepository
+        self.request_count = 0
+        self.connections = 0
+        self.remaining = RATE_LIMIT
+        self.reset_at = int(time.time()) + 3600
+
+
+class MockGitRepository:
+    """
+    一个仓库的 Git Data API 对象库（blob / tree / commit / ref），只保存在内存里。
+    blob 的 sha 与 git 一致；tree 和 commit 的 sha 只保证内容相同时相同。
+    目录树按完整路径平铺保存，与 ?recursive=1 的返回相同。
+    """
+
+    def __init__(self):
+        self.blobs = {}    # sha -> bytes
+        self.trees = {}    # sha -> [{"path", "mode", "type", "sha"}]
+        self.commits = {}  # sha -> {"tree", "parents", "message"}
+        self.refs = {}     # "heads/main" -> commit sha
+        self.blob_uploads = 0
+
+    @staticmethod
+    def object_sha(kind, payload):
+        return hashlib.sha1(kind.encode() + b" " + str(len(payload)).encode() + b"\0" + payload).hexdigest()
+
+    def add_tree(self, entries):
+        entries = sorted(entries, key=lambda e: e["path"])
+        sha = self.object_sha("tree", json.dumps(entries, sort_keys=True).encode())
+        self.trees[sha] = entries
+        return sha
+
+    def add_commit(self, message, tree, parents):
+        commit = {"message": message, "tree": {"sha": tree}, "parents": [{"sha": p} for p in parents]}
+        sha = self.object_sha("commit", json.dumps(commit, sort_keys=True).encode())
+        self.commits[sha] = dict(commit, sha=sha)
+        return sha
+
+    def handle(self, method, subpath, body):
+        """返回 (状态码, 数据)"""
+        parts = subpath.strip("/").split("/")
+        if parts[0] == "contents" and method == "PUT":
+            # 只支持往空仓库写第一个文件（部署脚本用它初始化空仓库）
+            path = "/".join(parts[1:])
+            data = base64.b64decode(body.get("content", ""))
+            blob = self.object_sha("blob", data)
+            self.blobs[blob] = data
+            tree = self.add_tree([{"path": path, "mode": "100644", "type": "blob", "sha": blob}])
+            parents = [self.refs["heads/main"]] if "heads/main" in self.refs else []
+            self.refs["heads/main"] = self.add_commit(body.get("message", ""), tree, parents)
+            return 201, {"content": {"path": path, "sha": blob}, "commit": {"sha": self.refs["heads/main"]}}
+        if parts[0] != "git":
+            return 404, {"message": "Not Found"}
+
+        kind, rest = parts[1], parts[2:]
+        if not self.refs and method == "POST":
+            return 409, {"message": "Git Repository is empty."}
+
+        if kind == "blobs" and method == "POST":
+            data = base64.b64decode(body["content"]) if body.get("encoding") == "base64" else body["content"].encode()
+            sha = self.object_sha("blob", data)
+            self.blobs[sha] = data
+            self.blob_uploads += 1
+            return 201, {"sha": sha}
+        if kind == "trees" and method == "POST":
+            entries = list(self.trees.get(body.get("base_tree"), []))
+            for entry in body["tree"]:
+                if entry["sha"] not in self.blobs:
+                    return 422, {"message": "Tree entry sha not found: " + entry["sha"]}
+                entries = [e for e in entries if e["path"] != entry["path"]] + [entry]
+            return 201, {"sha": self.add_tree(entries)}
+        if kind == "trees" and method == "GET" and rest and rest[0] in self.trees:
+            return 200, {"sha": rest[0], "tree": self.trees[rest[0]], "truncated": False}
+        if kind == "commits" and method == "POST":
+            if body["tree"] not in self.trees or any(p not in self.commits for p in body.get("parents", [])):
+                return 422, {"message": "Invalid tree or parent"}
+            return 201, {"sha": self.add_commit(body["message"], body["tree"], body.get("parents", []))}
+        if kind == "commits" and method == "GET" and rest and rest[0] in self.commits:
+            return 200, self.commits[rest[0]]
+
+        ref = "/".join(rest)
+        if kind == "ref" and method == "GET":
+            if not self.refs:
+                return 409, {"message": "Git Repository is empty."}
+            if ref in self.refs:
+                return 200, {"ref": "refs/" + ref, "object": {"sha": self.refs[ref], "type": "commit"}}
+        if kind == "refs" and method == "POST":
+            self.refs[body["ref"][len("refs/"):]] = body["sha"]
+            return 201, {"ref": body["ref"], "object": {"sha": body["sha"], "type": "commit"}}
+        if kind == "refs" and method == "PATCH" and ref in self.refs:
+            if body["sha"] not in self.commits:
+                return 422, {"message": "Object does not exist"}
+            self.refs[ref] = body["sha"]
+            return 200, {"ref": "refs/" + ref, "object": {"sha": body["sha"], "type": "commit"}}
+        return 404, {"message": "Not Found"}
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 允许 keep-alive
+    disable_nagle_algorithm = True  # 响应头和正文分两次写出，不关 Nagle 时复用的连接每次会多等 40ms 的延迟确认
+
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    # ------------------------------------------------------------------
+    # 响应
+    # ------------------------------------------------------------------
+    def send_json(self, status, data, extra_headers=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        state = self.server.state
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Limit", str(RATE_LIMIT))
+        self.send_header("X-RateLimit-Remaining", str(state.remaining))
+        self.send_header("X-RateLimit-Reset", str(state.reset_at))
+        self.send_header("X-RateLimit-Used", str(RATE_LIMIT - state.remaining))
+        self.send_header("X-RateLimit-Resource", "core")
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_get(self, data):
+        """GET 响应带 ETag；If-None-Match 命中时返回 304 且不扣配额"""
+        etag = '"' + hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest() + '"'
+        if self.path == "/user":
+            extra = {"ETag": etag, "X-OAuth-Scopes": "repo, workflow",
+                     "GitHub-Authentication-Token-Expiration": "2099-01-01 00:00:00 UTC"}
+        else:
+            extra = {"ETag": etag}
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.state.lock:
+                self.server.state.remaining += 1
+            self.send_json(304, None, extra)
+        else:
+            self.send_json(200, data, extra)
+
+    # ------------------------------------------------------------------
+    # 请求分发
+    # ------------------------------------------------------------------
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length).decode())
+        except ValueError:
+            return None
+
+    def authorized_user(self):
+        auth = self.headers.get("Authorization", "")
+        if auth.startswith("Basic "):
+            try:
+                user, _, password = base64.b64decode(auth[6:]).decode().partition(":")
+            except ValueError:
+                return None
+            # 以 bad 开头的 token 模拟无效/已撤销的 token
+            return None if password.startswith("bad") else user
+        if auth.startswith("token ") or auth.startswith("Bearer "):
+            return "mock-user"
+        return None
+
+    def handle_request(self, method):
+        state = self.server.state
+        body = self.read_body()
+        with state.lock:
+            state.request_count += 1
+            count = state.request_count
+            state.remaining = max(0, state.remaining - 1)
+        if state.latency:
+            time.sleep(state.latency)
+
+        if state.fail_every and count % state.fail_every == 0:
+            self.send_json(502, {"message": "Server Error"})
+            return
+        if state.throttle_every and count % state.throttle_every == 0:
+            self.send_json(403, {"message": "You have exceeded a secondary rate limit."}, {"Retry-After": "1"})
+            return
+
+        user = self.authorized_user()
+        if user is None:
+            self.send_json(401, {"message": "Bad credentials"})
+            return
+
+        path = self.path.split("?", 1)[0]
+        repo_match = re.match(r"^/repos/([^/]+)/([^/]+)(/.*)?$", path)
+
+        if method == "GET" and path == "/user":
+            self.send_get({"login": user, "id": 1, "type": "User", "name": "Mock User", "public_repos": len(state.repos)})
+        elif method == "GET" and path == "/rate_limit":
+            self.send_get({"resources": {"core": {"limit": RATE_LIMIT, "remaining": state.remaining}}})
+        elif method == "POST" and path == "/user/repos":
+            name = (body or {}).get("name")
+            key = user + "/" + str(name)
+            with state.lock:
+                if not name or key in state.repos:
+                    self.send_json(422, {"message": "Repository creation failed.",
+                                         "errors": [{"message": "name already exists on this account"}]})
+                    return
+                state.repos[key] = {"name": name, "full_name": key, "private": bool(body.get("private")),
+                                    "default_branch": "main"}
+                state.git[key] = MockGitRepository()
+            self.send_json(201, state.repos[key])
+        elif repo_match:
+            key = repo_match.group(1) + "/" + repo_match.group(2)
+            if key not in state.repos:
+                self.send_json(404, {"message": "Not Found"})
+            else:
+                self.handle_repo(method, key, repo_match.group(3) or "", body)
+        else:
+            self.send_json(404, {"message": "Not Found"})
+
+    def handle_repo(self, method, key, subpath, body):
+        state = self.server.state
+        body = body or {}
+        if subpath == "":
+            if method == "GET":
+                self.send_get(state.repos[key])
+            else:
+                self.send_json(405, {"message": "Method Not Allowed"})
+        elif subpath == "/pages":
+            if method == "POST":
+                with state.lock:
+                    if key in state.pages:
+                        self.send_json(409, {"message": "GitHub Pages is already enabled."})
+                        return
+                    state.pages[key] = {"status": None, "source": body.get("source")}
+                self.send_json(201, state.pages[key])
+            elif method == "GET" and key in state.pages:
+                # 像真实的 Pages 一样，构建状态要经过几次查询才变成 built
+                with state.lock:
+                    page = state.pages[key]
+                    page["status"] = {None: "building", "building": "built"}.get(page["status"], page["status"])
+                self.send_get(page)
+            else:
+                self.send_json(404, {"message": "Not Found"})
+        elif subpath == "/pages/builds/latest" and method == "GET" and key in state.pages:
+            # 每次推送到 main 都会触发一次新构建：queued -> building -> built
+            with state.lock:
+                page = state.pages[key]
+                head = state.git[key].refs.get("heads/main")
+                build = page.get("latest")
+                if build is None or build["commit"] != head:
+                    build = page["latest"] = {"status": "queued", "commit": head}
+                else:
+                    build["status"] = {"queued": "building", "building": "built"}.get(build["status"], build["status"])
+                build = dict(build)
+            self.send_get(build)
+        elif subpath.startswith("/git/") or subpath.startswith("/contents/"):
+            with state.lock:
+                status, data = state.git[key].handle(method, subpath, body)
+            if method == "GET" and status == 200:
+                self.send_get(data)
+            else:
+                self.send_json(status, data)
+        else:
+            self.send_json(404, {"message": "Not Found"})
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PATCH(self):
+        self.handle_request("PATCH")
+
+    def do_PUT(self):
+        self.handle_request("PUT")
+
+    def do_DELETE(self):
+        self.handle_request("DELETE")
+
+
+def start_server(host="127.0.0.1", port=0, quiet=True, **options):
+    """在后台线程启动替身服务器，返回 (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), MockGitHubHandler)
+    server.daemon_threads = True
+    server.state = MockGitHubState(**options)
+    server.quiet = quiet
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://" + host + ":" + str(server.server_address[1])
+
+
+def bench(count, latency):
+    """同样的 GET 请求：每次新建连接的 urllib 与复用连接的 GitHubClient 各跑 count 次"""
+    from github_client import GitHubClient
+
+    server, base_url = start_server(latency=latency)
+    auth = "Basic " + base64.b64encode(b"bench:token").decode()
+
+    def urllib_get(path):
+        req = urllib.request.Request(base_url + path, headers={"Authorization": auth})
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return json.loads(response.read().decode())
+
+    def timed(label, fn):
+        before = server.state.connections
+        started = time.perf_counter()
+        for _ in range(count):
+            fn()
+        elapsed = time.perf_counter() - started
+        print("  %-28s %8.2f ms/请求  %4d 个连接" % (label, elapsed / count * 1000,
+                                                   server.state.connections - before))
+
+    print("请求数: " + str(count) + "，服务端延迟: " + str(latency * 1000) + " ms\n")
+    timed("urllib（每次新连接）", lambda: urllib_get("/user"))
+
+    client = GitHubClient("token", username="bench", base_url=base_url)
+    timed("GitHubClient（keep-alive）", lambda: client.request("GET", "/user", cache=False))
+    timed("GitHubClient（ETag 304）", lambda: client.request("GET", "/user"))
+    client.close()
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 GitHub API 替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求额外延迟的秒数")
+    parser.add_argument("--fail-every", type=int, default=0, help="每第 N 个请求返回 502")
+    parser.add_argument("--throttle-every", type=int, default=0, help="每第 N 个请求返回 403 次级限流")
+    parser.add_argument("--bench", type=int, metavar="N", help="不启动服务，直接跑 N 次请求的延迟对比")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench, args.latency)
+        return
+
+    server = ThreadingHTTPServer((args.host, args.port), MockGitHubHandler)
+    server.state = MockGitHubState(args.latency, args.fail_every, args.throttle_every)
+    server.quiet = False
+    print("Mock GitHub API: http://" + args.host + ":" + str(args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n已停止")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
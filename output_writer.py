@@ -0,0 +1,66 @@
+"""
+Atomic, skip-if-identical file writes shared by the generators (generate_dashboard.py,
+search_index.py, fight_analysis.py, update_physics_doc.py).
+
+A file is only rewritten when its content differs from what is on disk: the sizes are compared
+first, and only when they match are the existing bytes read and compared. Changed files are
+written to a temporary file in the same directory and moved into place with os.replace(), so
+a crash mid-build never leaves a half-written output and an unchanged output keeps its mtime
+(no watcher event, no diff).
+"""
+
+import os
+import threading
+
+def encode_text(text, encoding='utf-8'):
+    # The same bytes open(path, 'w') writes: '\n' becomes the platform line separator
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode(encoding)
+
+def has_content(path, data):
+    """True if the file at `path` holds exactly `data`."""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+def replace_file(path, data):
+    """Writes `data` to a temporary sibling of `path` and renames it over `path`."""
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class OutputWriter:
+    """Writes outputs that changed and counts written vs skipped files; safe to share between threads."""
+
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def write(self, path, data, encoding='utf-8'):
+        """Writes `data` (str or bytes) to `path` unless it is already there. Returns True if written."""
+        if isinstance(data, str):
+            data = encode_text(data, encoding)
+        changed = not has_content(path, data)
+        if changed:
+            replace_file(path, data)
+        with self._lock:
+            if changed:
+                self.written += 1
+            else:
+                self.skipped += 1
+        return changed
+
+    def summary(self):
+        return f"{self.written} written, {self.skipped} unchanged"
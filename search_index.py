@@ -0,0 +1,180 @@
+"""
+Full-text search index for the dashboard, built by generate_dashboard.py and read by site_search.js.
+
+Text is tokenized into lower-case ASCII words of two or more characters, and CJK runs into
+overlapping character bigrams (a lone CJK character is kept as a unigram), so Chinese queries
+match without a dictionary. The inverted index lives in html/search/ as
+
+    docs.json       [[href, title], ...]; a document's id is its position (null = free slot)
+    <shard>.json    {token: [doc, count, doc, count, ...]} for every token in the shard
+
+Shards are keyed by token prefix: the first two characters of an ASCII word ("ph" for physics),
+or for CJK tokens the block of 64 code points their first character falls in ("u7240" for 物).
+A query only fetches the shards of its own tokens, and every token sharing a prefix sits in one
+file, so the last word of a query can be completed as a prefix.
+
+Updates are incremental: only the shards holding tokens of the pages that changed are read,
+patched and rewritten.
+
+    python search_index.py 摩擦力 jitter        # query the built index from the command line
+"""
+
+import os
+import re
+import sys
+import json
+from collections import Counter
+
+import output_writer
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(ROOT_DIR, "html", "search")
+DOCS_FILE = "docs.json"
+
+# Kana, CJK ideographs (with extension A and compatibility forms) and Hangul syllables
+CJK_CHARS = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+TOKEN_RE = re.compile(f"[a-z0-9_]+|[{CJK_CHARS}]+")
+ASCII_WORD_MIN = 2
+CJK_SHARD_MASK = 0x3f   # CJK tokens are sharded by blocks of 64 code points
+
+def tokenize(text):
+    """Yields the index tokens of `text` in order (site_search.js tokenizes queries the same way)."""
+    for match in TOKEN_RE.finditer(text.lower()):
+        run = match.group(0)
+        if run[0] < "\x80":
+            if len(run) >= ASCII_WORD_MIN:
+                yield run
+        elif len(run) == 1:
+            yield run
+        else:
+            for i in range(len(run) - 1):
+                yield run[i:i + 2]
+
+def term_counts(text):
+    return Counter(tokenize(text))
+
+def shard_key(token):
+    if token[0] < "\x80":
+        return token[:2]
+    return f"u{ord(token[0]) & ~CJK_SHARD_MASK:04x}"
+
+def dump_json(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=isinstance(value, dict))
+
+class SearchIndex:
+    """The sharded index in `directory`; apply() patches it for a set of changed pages."""
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self.writer = output_writer.OutputWriter()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, name, default):
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def _write(self, name, value):
+        # Patched shards often come out unchanged (a page edit that keeps its word counts)
+        self.writer.write(self._path(name), dump_json(value).encode('utf-8'))
+
+    def exists(self):
+        return os.path.exists(self._path(DOCS_FILE))
+
+    def reset(self):
+        """Drops the whole index, for builds that re-render (and so re-add) every page."""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(self._path(name))
+
+    def apply(self, removed, added):
+        """
+        removed: [(doc id, shard keys)] of pages that are gone or about to be re-added.
+        added:   [(href, title, term counts)] of pages rendered in this build.
+        Returns [(doc id, shard keys)] for `added`, to be kept in the build manifest.
+        """
+        if not removed and not added:
+            return []
+        os.makedirs(self.directory, exist_ok=True)
+        docs = self._read(DOCS_FILE, [])
+
+        gone = set()
+        touched = set()
+        for doc_id, shards in removed:
+            if doc_id is not None and doc_id < len(docs):
+                docs[doc_id] = None
+                gone.add(doc_id)
+                touched.update(shards)
+
+        # New pages fill the lowest free slots, so a re-rendered page usually keeps its id
+        free = [i for i, doc in enumerate(docs) if doc is None]
+        free.reverse()
+        postings = {}   # shard -> token -> [(doc, count)]
+        result = []
+        for href, title, counts in added:
+            doc_id = free.pop() if free else len(docs)
+            if doc_id == len(docs):
+                docs.append(None)
+            docs[doc_id] = [href, title]
+            gone.discard(doc_id)
+            shards = set()
+            for token, count in counts.items():
+                key = shard_key(token)
+                shards.add(key)
+                postings.setdefault(key, {}).setdefault(token, []).append((doc_id, count))
+            touched.update(shards)
+            result.append((doc_id, sorted(shards)))
+        replaced = gone | {doc_id for doc_id, _ in result}
+
+        for key in sorted(touched):
+            name = key + ".json"
+            shard = self._read(name, {})
+            for token in list(shard):
+                flat = shard[token]
+                kept = [x for i in range(0, len(flat), 2) if flat[i] not in replaced for x in flat[i:i + 2]]
+                if kept:
+                    shard[token] = kept
+                else:
+                    del shard[token]
+            for token, entries in postings.get(key, {}).items():
+                flat = shard.setdefault(token, [])
+                for doc_id, count in entries:
+                    flat += [doc_id, count]
+            if shard:
+                self._write(name, shard)
+            elif os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+
+        while docs and docs[-1] is None:
+            docs.pop()
+        self._write(DOCS_FILE, docs)
+        return result
+
+    def search(self, query, limit=20):
+        """Pages containing every query token, best first: [(score, href, title)]."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        docs = self._read(DOCS_FILE, [])
+        scores = None
+        for token in tokens:
+            flat = self._read(shard_key(token) + ".json", {}).get(token, [])
+            found = {flat[i]: flat[i + 1] for i in range(0, len(flat), 2)}
+            scores = found if scores is None else {d: scores[d] + c for d, c in found.items() if d in scores}
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, *docs[doc_id]) for doc_id, score in ranked if doc_id < len(docs) and docs[doc_id]]
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python search_index.py <query words>")
+        sys.exit(1)
+    for score, href, title in SearchIndex().search(" ".join(sys.argv[1:])):
+        print(f"{score:>5}  {title}  ({href})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+// Full-text search over the index generate_dashboard.py writes to html/search/ (see search_index.py).
+// Only docs.json and the shards holding the query's tokens are fetched, each at most once per page load.
+// Usage: SiteSearch.search('摩擦力 jitter').then(results => ...)  ->  [{ href, title, score }]
+(function () {
+    const BASE = 'html/search/';
+    // Must match search_index.py: CJK ranges, minimum ASCII word length and CJK shard blocks
+    const TOKEN_RE = /[a-z0-9_]+|[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+/g;
+    const ASCII_WORD_MIN = 2;
+    const CJK_SHARD_MASK = 0x3f;
+    const cache = {};
+
+    function fetchJson(name) {
+        if (!cache[name]) {
+            // A missing shard just means no token with that prefix exists
+            cache[name] = fetch(BASE + name)
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+        return cache[name];
+    }
+
+    function tokenize(text) {
+        const tokens = [];
+        for (const run of text.toLowerCase().match(TOKEN_RE) || []) {
+            if (run.charCodeAt(0) < 0x80) {
+                if (run.length >= ASCII_WORD_MIN) tokens.push(run);
+            } else if (run.length === 1) {
+                tokens.push(run);
+            } else {
+                for (let i = 0; i < run.length - 1; i++) tokens.push(run.slice(i, i + 2));
+            }
+        }
+        return tokens;
+    }
+
+    function shardKey(token) {
+        const code = token.charCodeAt(0);
+        if (code < 0x80) return token.slice(0, 2);
+        return 'u' + (code & ~CJK_SHARD_MASK).toString(16).padStart(4, '0');
+    }
+
+    // doc id -> count for one token; the last token of a query still being typed matches as a prefix
+    function postings(shard, token, prefix) {
+        const found = new Map();
+        if (!shard) return found;
+        const add = flat => {
+            for (let i = 0; i < flat.length; i += 2) found.set(flat[i], (found.get(flat[i]) || 0) + flat[i + 1]);
+        };
+        if (prefix) {
+            for (const key in shard) if (key.startsWith(token)) add(shard[key]);
+        } else if (shard[token]) {
+            add(shard[token]);
+        }
+        return found;
+    }
+
+    function search(query, limit = 20) {
+        const tokens = [...new Set(tokenize(query))];
+        if (!tokens.length) return Promise.resolve([]);
+        const typing = !/\s$/.test(query);
+        const shards = tokens.map(token => fetchJson(shardKey(token) + '.json'));
+        return Promise.all([fetchJson('docs.json'), ...shards]).then(([docs, ...loaded]) => {
+            if (!docs) return [];
+            let scores = null;
+            tokens.forEach((token, i) => {
+                const found = postings(loaded[i], token, typing && i === tokens.length - 1);
+                if (scores === null) {
+                    scores = found;
+                } else {
+                    for (const [doc, score] of scores) {
+                        if (found.has(doc)) scores.set(doc, score + found.get(doc));
+                        else scores.delete(doc);
+                    }
+                }
+            });
+            return [...scores]
+                .filter(([doc]) => docs[doc])
+                .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+                .slice(0, limit)
+                .map(([doc, score]) => ({ href: docs[doc][0], title: docs[doc][1], score: score }));
+        });
+    }
+
+    window.SiteSearch = { base: BASE, search: search, tokenize: tokenize };
+})();
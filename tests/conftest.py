@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# The scripts live flat at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generate_dashboard
+import mock_github_server
+
+
+@pytest.fixture
+def server():
+    """A mock GitHub API on a local port; `server.state` holds its data."""
+    server, base_url = mock_github_server.start_server()
+    server.base_url = base_url
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def docs(tmp_path, monkeypatch):
+    """A docs tree with two pages; the dashboard builder reads and writes only inside it."""
+    output = tmp_path / "html"
+    output.mkdir()
+    monkeypatch.setattr(generate_dashboard, "ROOT_DIR", str(tmp_path))
+    monkeypatch.setattr(generate_dashboard, "OUTPUT_DIR", str(output))
+    monkeypatch.setattr(generate_dashboard, "MANIFEST_PATH", str(output / ".build_manifest.json"))
+    monkeypatch.setattr(generate_dashboard, "SEARCH_DIR", str(output / "search"))
+    (tmp_path / "spring.md").write_text("# Spring\n\nspring damping\n", encoding="utf-8")
+    (tmp_path / "friction.md").write_text("# Friction\n\nspring friction\n", encoding="utf-8")
+    return tmp_path
@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+import analyze_jitter
+from analyze_jitter import FieldStats, FlipCounter, LogAnalysis, iter_chunks, scan
+
+
+def test_field_stats_std_at_large_mean():
+    # Timestamps around 1e9 with ±0.5 jitter: the unshifted sum of squares (~1e18 per value)
+    # would cancel every digit of a 0.25 variance
+    values = [1e9 + 0.5, 1e9 - 0.5] * 500
+    stats = FieldStats()
+    stats.update(values[:3])
+    stats.update(values[3:])
+    assert stats.count == 1000
+    assert stats.mean == 1e9
+    assert math.isclose(stats.std, 0.5, rel_tol=1e-9)
+    assert math.isclose(stats.rms, 1e9, rel_tol=1e-12)
+    assert stats.p2p == 1.0
+
+
+def test_flip_counter_counts_sign_changes():
+    counter = FlipCounter()
+    counter.update([1.0, 2.0, 3.0, 2.5, 2.0, 4.0])
+    assert counter.flips == 2
+    assert counter.points == 6
+    assert counter.severity == pytest.approx(2 / 6 * 100)
+
+
+def test_flip_counter_ignores_steps_within_epsilon():
+    counter = FlipCounter()
+    # Rising, a tiny dip, a plateau, then rising again: no direction change counts
+    counter.update([1.0, 2.0, 2.0 - 1e-7, 2.0 - 1e-7, 3.0])
+    assert counter.flips == 0
+    # A plateau between a rise and a fall still counts the fall as one flip
+    counter.update([3.0, 3.0, 1.0])
+    assert counter.flips == 1
+
+
+def test_flip_counter_carries_state_across_updates():
+    values = [0.0, 1.0, 0.5, 0.7, 0.7, 0.2, 0.9]
+    whole = FlipCounter()
+    whole.update(values)
+    pieces = FlipCounter()
+    for k in range(0, len(values), 2):
+        pieces.update(values[k:k + 2])
+    assert (pieces.flips, pieces.points) == (whole.flips, whole.points) == (4, 7)
+
+
+def test_iter_chunks_cuts_on_line_boundaries(monkeypatch):
+    monkeypatch.setattr(analyze_jitter, "CHUNK_SIZE", 10)
+    buffer = b"LineLen:1\nLineLen:22\nLineLen:333\nx\n" + b"a" * 25 + b"\nLineLen:-4"
+    chunks = list(iter_chunks(buffer))
+    assert b"".join(buffer[start:end] for start, end in chunks) == buffer
+    for start, end in chunks[:-1]:
+        assert buffer[end - 1:end] == b"\n"
+    # Lines longer than a chunk are kept whole
+    assert chunks == [(0, 10), (10, 21), (21, 33), (33, 35), (35, 61), (61, 71)]
+
+
+@pytest.mark.parametrize("fields", [(), None])
+def test_scan_gives_the_same_result_for_any_chunk_size(monkeypatch, fields):
+    buffer = b"".join(b"t=%d LineLen:%s Speed: %s\n" % (k, str(v).encode(), str(-v).encode())
+                      for k, v in enumerate([1, 2, 3, 2, 1, 1.5, 1.5, 0.5, 4e1]))
+    full = LogAnalysis("log")
+    scan(buffer, full, fields)
+    monkeypatch.setattr(analyze_jitter, "CHUNK_SIZE", 16)
+    chunked = LogAnalysis("log")
+    scan(buffer, chunked, fields)
+    assert full.flips["LineLen"].to_json() == chunked.flips["LineLen"].to_json()
+    assert full.flips["LineLen"].flips == 4
+    assert {name: stats.to_json() for name, stats in full.stats.items()} == \
+        {name: stats.to_json() for name, stats in chunked.stats.items()}
+    assert list(full.stats) == (["LineLen"] if fields == () else ["t", "LineLen", "Speed"])
@@ -0,0 +1,190 @@
+import io
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import auto_deploy
+import credentials
+from github_client import GitHubClient
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.setattr(credentials, "CACHE_PATH", str(tmp_path / "credentials_cache.json"))
+    root = tmp_path / "site"
+    (root / "html").mkdir(parents=True)
+    (root / "index.html").write_text("<h1>Home</h1>\n", encoding="utf-8")
+    (root / "html" / "a.html").write_text("<p>page</p>\n", encoding="utf-8")
+    (root / "html" / "b.html").write_text("<p>page</p>\n", encoding="utf-8")
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    return root
+
+
+def deploy(server, root):
+    client = GitHubClient("token", username="tester", base_url=server.base_url)
+    deployer = auto_deploy.GitHubAutoDeployer("tester", "token", repo_name="docs", api_url=server.base_url,
+                                              api_push=True, root_dir=str(root), client=client)
+    before = server.state.request_count
+    try:
+        assert deployer.deploy()
+    finally:
+        client.close()
+    api_events = [e for e in deployer.profiler.events if e["kind"] == "api"]
+    return deployer, api_events, server.state.request_count - before
+
+
+def remote_files(server):
+    repo = server.state.git["tester/docs"]
+    tree = repo.trees[repo.commits[repo.refs["heads/main"]]["tree"]["sha"]]
+    return {entry["path"]: repo.blobs[entry["sha"]] for entry in tree}
+
+
+def test_api_deploy_publishes_tree(server, site):
+    _, api_events, requests = deploy(server, site)
+    assert remote_files(server) == {
+        "index.html": b"<h1>Home</h1>\n",
+        "html/a.html": b"<p>page</p>\n",
+        "html/b.html": b"<p>page</p>\n",
+    }
+    # Identical files share one blob
+    assert server.state.git["tester/docs"].blob_uploads == 2
+    # Create and look up the repo (2), read the empty remote and seed it (2), read the new head's
+    # ref, commit and tree (3), two blobs, tree, commit and ref update (5), Pages (1), verify (1),
+    # and the token check
+    assert len(api_events) == 15
+    assert [e["step"] for e in api_events if e["name"] == "GET /user"] == ["check_token"]
+    assert requests == len(api_events)
+
+
+def test_api_redeploy_uploads_only_changes(server, site):
+    deploy(server, site)
+    repo = server.state.git["tester/docs"]
+    uploads = repo.blob_uploads
+
+    (site / "html" / "a.html").write_text("<p>edited</p>\n", encoding="utf-8")
+    (site / "html" / "b.html").unlink()
+    _, api_events, requests = deploy(server, site)
+    assert remote_files(server) == {"index.html": b"<h1>Home</h1>\n", "html/a.html": b"<p>edited</p>\n"}
+    assert repo.blob_uploads == uploads + 1
+    assert sum(1 for e in api_events if e["name"].endswith("/git/blobs")) == 1
+    # The token check is answered from the credentials cache this time
+    assert requests == len(api_events)
+
+    # Nothing changed: the remote tree is read, nothing is written
+    _, api_events, _ = deploy(server, site)
+    assert not [e for e in api_events if "/git/" in e["name"] and not e["name"].startswith("GET ")]
+    assert repo.blob_uploads == uploads + 1
+
+
+def test_changed_paths_include_renumbered_search_index(tmp_path, monkeypatch):
+    # A reindex (e.g. --force) keeps every source and output but renumbers the search docs
+    search = tmp_path / "html" / "search"
+    search.mkdir(parents=True)
+    for name in ("docs.json", "ph.json", "sp.json"):
+        (search / name).write_text("{}", encoding="utf-8")
+    (tmp_path / "html" / "a.html").write_text("a", encoding="utf-8")
+    (tmp_path / "html" / "b.html").write_text("b", encoding="utf-8")
+    (tmp_path / "a.md").write_text("a", encoding="utf-8")
+    (tmp_path / "b.md").write_text("b", encoding="utf-8")
+    monkeypatch.setattr(auto_deploy, "ROOT_DIR", str(tmp_path))
+    monkeypatch.setattr(auto_deploy.generate_dashboard, "OUTPUT_DIR", str(tmp_path / "html"))
+    monkeypatch.setattr(auto_deploy.generate_dashboard, "SEARCH_DIR", str(search))
+
+    def manifest(a_doc, b_doc):
+        return {"generator": "g", "nav": "n", "pages": {
+            "a.md": {"source": "1", "output": "a.html", "doc": a_doc, "shards": ["ph"]},
+            "b.md": {"source": "2", "output": "b.html", "doc": b_doc, "shards": ["sp"]},
+        }}
+
+    deployer = auto_deploy.GitHubAutoDeployer("tester", "token", client=object())
+    assert deployer.get_changed_paths(manifest(0, 1), manifest(0, 1)) == ([], [])
+    changed, removed = deployer.get_changed_paths(manifest(1, 0), manifest(0, 1))
+    assert set(changed) == {"html/a.html", "a.md", "html/b.html", "b.md",
+                            "html/search/docs.json", "html/search/ph.json", "html/search/sp.json"}
+    assert removed == []
+
+
+def test_setup_remote_keeps_remote_tracking_ref(site):
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=site, capture_output=True, text=True)
+
+    git("remote", "add", "origin", "https://example.com/old.git")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "init")
+    git("update-ref", "refs/remotes/origin/main", "HEAD")
+
+    deployer = auto_deploy.GitHubAutoDeployer("tester", "token", repo_name="docs", root_dir=str(site), client=object())
+    assert deployer.setup_remote()
+    assert git("remote", "get-url", "origin").stdout.strip() == "https://github.com/tester/docs.git"
+    assert git("rev-parse", "--verify", "--quiet", "refs/remotes/origin/main").returncode == 0
+    assert deployer.count_push_objects("refs/remotes/origin/main") == (0, 0)
+
+
+def test_push_code_records_every_git_command(site, tmp_path):
+    remote = tmp_path / "remote.git"
+    subprocess.run(["git", "init", "-q", "--bare", str(remote)], check=True)
+    for args in (["config", "user.name", "t"], ["config", "user.email", "t@t"], ["remote", "add", "origin", str(remote)]):
+        subprocess.run(["git", *args], cwd=site, check=True)
+
+    deployer = auto_deploy.GitHubAutoDeployer("tester", "token", repo_name="docs", root_dir=str(site), client=object())
+    assert deployer.push_code()
+    names = [e["name"] for e in deployer.profiler.events if e["kind"] == "command"]
+    assert [name.split(" -")[0] for name in names[:5]] == ["git add", "git status", "git commit", "git branch",
+                                                           "git push"]
+
+
+def test_batch_token_check_is_profiled(server, site, tmp_path):
+    manifest = tmp_path / "sites.json"
+    manifest.write_text(json.dumps({"sites": [{"repo": "docs", "root": "site", "mode": "api"}]}), encoding="utf-8")
+    profile = tmp_path / "profile.jsonl"
+    batch = auto_deploy.BatchDeployer("tester", "token", str(manifest), api_url=server.base_url,
+                                      profile_path=str(profile))
+    assert batch.run()
+    events = [json.loads(line) for line in profile.read_text(encoding="utf-8").splitlines()]
+    api_events = [e for e in events if e["kind"] == "api"]
+    assert [(e["site"], e["step"]) for e in api_events if e["name"] == "GET /user"] == [(None, "check_token")]
+    assert len(api_events) == batch.client.request_count == server.state.request_count
+
+
+def test_sites_sharing_a_repository_share_its_lock(site, tmp_path):
+    other = tmp_path / "other"
+    other.mkdir()
+    subprocess.run(["git", "init", "-q"], cwd=other, check=True)
+    deployers = [auto_deploy.GitHubAutoDeployer("tester", "token", repo_name=name, root_dir=str(root),
+                                                client=object())
+                 for name, root in (("a", site), ("b", site / "html"), ("c", other))]
+    locks = [deployer.repository_lock() for deployer in deployers]
+    assert locks[0] is locks[1]
+    assert locks[0] is not locks[2]
+
+    # Both sites rewrite the same .git/config; serialized, neither hits config.lock
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert all(pool.map(lambda d: all(d.prepare_local() for _ in range(5)), deployers[:2]))
+    remote = subprocess.run(["git", "remote", "get-url", "origin"], cwd=site, capture_output=True, text=True)
+    assert remote.stdout.strip() in ("https://github.com/tester/a.git", "https://github.com/tester/b.git")
+
+
+def test_site_stdout_passthroughs(capsys):
+    stream = io.StringIO()
+    stdout = auto_deploy.SiteStdout(stream)
+    assert stdout.encoding == stream.encoding
+    assert stdout.isatty() is False
+    with pytest.raises(io.UnsupportedOperation):
+        stdout.fileno()
+
+    real = auto_deploy.SiteStdout(sys.__stdout__)
+    assert real.encoding == sys.__stdout__.encoding
+    assert real.fileno() == sys.__stdout__.fileno()
+    assert real.isatty() == sys.__stdout__.isatty()
+
+    buffer = io.StringIO()
+    token = auto_deploy.SITE_OUTPUT.set(buffer)
+    try:
+        real.write("site output")
+        assert real.isatty() is False
+        assert real.encoding == sys.__stdout__.encoding
+    finally:
+        auto_deploy.SITE_OUTPUT.reset(token)
+    assert buffer.getvalue() == "site output"
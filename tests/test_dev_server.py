@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+
+import dev_server
+import generate_dashboard
+
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b" ")[1], body
+
+
+async def open_events(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {dev_server.EVENTS_PATH} HTTP/1.1\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    # Headers, then the retry line
+    while await reader.readline() != b"\r\n":
+        pass
+    assert await reader.readline() == b"retry: 1000\n"
+    await reader.readline()
+    return reader, writer
+
+
+async def next_event(reader):
+    line = await asyncio.wait_for(reader.readline(), 5)
+    assert line.startswith(b"data: ")
+    return json.loads(line[len(b"data: "):])
+
+
+def test_stale_page_is_rendered_and_reloaded(docs, monkeypatch):
+    monkeypatch.setattr(dev_server, "OUTPUT_DIR", str(docs / "html"))
+    builder = generate_dashboard.DashboardBuilder(jobs=1)
+    builder.build()
+
+    async def scenario():
+        server = dev_server.LiveReloadServer(builder)
+        http_server = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = http_server.sockets[0].getsockname()[1]
+        async with http_server:
+            # A tab has the page open and listens for reloads
+            status, body = await get(port, "/spring.html")
+            assert status == b"200"
+            assert b"spring damping" in body
+            events, events_writer = await open_events(port)
+
+            # The source changes and the page is requested before any rebuild (e.g. from a second tab)
+            (docs / "spring.md").write_text("# Spring\n\nspring stiffness\n", encoding="utf-8")
+            status, body = await get(port, "/spring.html")
+            assert status == b"200"
+            assert b"spring stiffness" in body
+            assert b"spring stiffness" in (docs / "html" / "spring.html").read_bytes()
+            assert await next_event(events) == ["spring.html"]
+
+            # Up to date now: served as is, no further event
+            status, _ = await get(port, "/spring.html")
+            assert status == b"200"
+            assert len(server.clients) == 1
+            assert server.clients.copy().pop().empty()
+            events_writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_renders_run_in_the_executor_one_at_a_time(docs):
+    builder = generate_dashboard.DashboardBuilder(jobs=1)
+    server = dev_server.LiveReloadServer(builder)
+    running = []
+    overlaps = []
+
+    def render(name):
+        overlaps.append(len(running))
+        running.append(name)
+        try:
+            time.sleep(0.05)
+            return name
+        finally:
+            running.remove(name)
+
+    async def scenario():
+        loop_ticks = 0
+
+        async def tick():
+            nonlocal loop_ticks
+            while True:
+                loop_ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(tick())
+        results = await asyncio.gather(*(server.run_build(render, name) for name in "abc"))
+        ticker.cancel()
+        return results, loop_ticks
+
+    results, loop_ticks = asyncio.run(scenario())
+    assert results == ["a", "b", "c"]
+    assert overlaps == [0, 0, 0]
+    # The event loop kept running while the renders blocked their thread
+    assert loop_ticks > 10
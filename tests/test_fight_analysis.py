@@ -0,0 +1,118 @@
+import importlib.util
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+import fight_analysis
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADER = "time,ratio,friction,lineDrainSpeed,outLen,smoothedForce"
+ROWS = [
+    # friction 0.5 for t 0-1, 0.8 for t 2-3, back to 0.5 for t 4-6
+    (0.0, 0.9, 0.5, 1.0, 10.0, 1.0),
+    (1.0, 1.1, 0.5, -1.0, 10.5, 1.0),
+    (2.0, 0.9, 0.8, 1.0, 11.0, 1.0),
+    (3.0, 1.1, 0.8, -1.0, 11.5, 1.0),
+    (4.0, 0.9, 0.5, 1.0, 12.0, 1.0),
+    (6.0, 1.1, 0.5, -1.0, 12.5, 1.0),
+]
+
+
+def write_session(path, rows=ROWS, header=HEADER):
+    path.write_text("\n".join([header] + [",".join(map(str, row)) for row in rows]) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def run_main(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["fight_analysis.py", *args])
+    with pytest.raises(SystemExit) as exit_info:
+        fight_analysis.main()
+    return exit_info.value.code
+
+
+def test_friction_duration_spans_first_to_last_row(tmp_path):
+    session = fight_analysis.load_session(write_session(tmp_path / "fight_session_100000.csv"), use_cache=False)
+    # Rows at 0.5 run from t=0 to t=6; its two segments only last 1s + 2s
+    assert session.friction_duration(0.5) == 6.0
+    assert session.friction_duration(0.8) == 1.0
+    with pytest.raises(KeyError):
+        session.friction_duration(0.9)
+
+
+def test_unmatched_friction_is_skipped(tmp_path, monkeypatch, capsys):
+    path = write_session(tmp_path / "fight_session_100000.csv")
+    assert run_main(monkeypatch, path, "--report", "outlen_corr", "--report", "drain_corr", "--friction", "0.9",
+                    "--no-cache", "--out-dir", str(tmp_path)) == 0
+    out = capsys.readouterr().out
+    assert "[Skipped] outlen_corr" in out and "[Skipped] drain_corr" in out
+    assert not list(tmp_path.glob("fight_analysis_*"))
+
+
+def test_report_file_has_no_trailing_newline(tmp_path, monkeypatch):
+    path = write_session(tmp_path / "fight_session_100000.csv")
+    assert run_main(monkeypatch, path, "--report", "rate", "--no-cache", "--out-dir", str(tmp_path)) == 0
+    text = (tmp_path / "fight_analysis_100000_rate.txt").read_text(encoding="utf-8")
+    assert text == "\n".join(fight_analysis.load_session(path, use_cache=False).rate())
+
+
+def test_interrupted_cache_rewrite_is_not_read(tmp_path, monkeypatch):
+    path = write_session(tmp_path / "fight_session_100000.csv", header=HEADER.replace("smoothedForce", "force2"))
+    data_path, header_path = fight_analysis.cache_paths(path)
+    fight_analysis.load_session(path)
+    assert fight_analysis.read_cache(path, os.stat(path))[0]["columns"] == ["time", "ratio", "friction",
+                                                                          "lineDrainSpeed", "outLen"]
+    with open(header_path, encoding="utf-8") as f:
+        stale_header = f.read()
+
+    # A run needing one more column rewrites the array, then fails before the new header is written
+    def fail(path, value):
+        raise OSError(28, "No space left on device")
+    with monkeypatch.context() as m:
+        m.setattr(fight_analysis, "write_json", fail)
+        fight_analysis.load_session(path, overrides={"smoothedForce": "force2"})
+    assert np.load(data_path).shape == (6, len(ROWS))
+    assert not os.path.exists(header_path)
+
+    # The old header must not describe the new array, even if it is put back
+    assert fight_analysis.read_cache(path, os.stat(path)) is None
+    with open(header_path, "w", encoding="utf-8") as f:
+        f.write(stale_header)
+    assert fight_analysis.read_cache(path, os.stat(path)) is None
+
+    # so the next run parses the text again
+    session = fight_analysis.load_session(path)
+    assert not session.from_cache
+    assert list(session.friction) == [row[2] for row in ROWS]
+    assert list(session.ratio) == [row[1] for row in ROWS]
+    assert list(session.column("outLen")) == [row[4] for row in ROWS]
+
+
+def layout(lines):
+    """A report's lines with every number blanked out."""
+    return [re.sub(r"-?\d+(?:\.\d+)?", "#", line) for line in lines]
+
+
+@pytest.mark.parametrize("window, report", [
+    (1.0, "fight_analysis_174505_outlen_corr.txt"),
+    (2.0, "fight_analysis_174505_outlen_corr_2s.txt"),
+])
+def test_outlen_corr_layout_matches_committed_report(tmp_path, window, report):
+    t = np.arange(0, 40, 1 / 30)
+    rows = [(round(x, 4), 1.0 + 0.1 * np.sin(7 * x), 1.1772, 1.0, round(0.5 * x + 0.3 * np.sin(x), 4), 1.0)
+            for x in t]
+    session = fight_analysis.load_session(write_session(tmp_path / "fight_session_100000.csv", rows),
+                                          use_cache=False)
+    with open(os.path.join(ROOT, report), encoding="utf-8") as f:
+        expected = f.read().split("\n")
+    assert layout(fight_analysis.build_report(session, "outlen_corr", window)) == layout(expected)
+
+
+def test_missing_numpy_raises_import_error(monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    spec = importlib.util.spec_from_file_location("fight_analysis_without_numpy", fight_analysis.__file__)
+    with pytest.raises(ImportError, match="needs NumPy"):
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
@@ -0,0 +1,65 @@
+import inspect
+import json
+import os
+
+import generate_dashboard
+import watch_dashboard
+
+
+def search_docs(root):
+    return json.loads((root / "html" / "search" / "docs.json").read_text(encoding="utf-8"))
+
+
+def test_engine_change_replaces_search_docs(docs):
+    generate_dashboard.DashboardBuilder(engine="legacy").build()
+    assert sorted(doc[0] for doc in search_docs(docs)) == ["friction.html", "spring.html"]
+
+    # The dev server path: a new generator, one page rendered on demand, then a normal build
+    builder = generate_dashboard.DashboardBuilder(engine="standard")
+    builder.load()
+    assert builder.ensure_output("spring.html")
+    assert sorted(doc[0] for doc in search_docs(docs) if doc) == ["friction.html", "spring.html"]
+
+    generate_dashboard.DashboardBuilder(engine="standard").build()
+    assert sorted(doc[0] for doc in search_docs(docs) if doc) == ["friction.html", "spring.html"]
+    hits = [href for _, href, _ in builder.search.search("spring")]
+    assert sorted(hits) == ["friction.html", "spring.html"]
+
+
+def test_small_batches_render_in_process(monkeypatch):
+    tasks = [(f"page{k}.md", f"# Page {k}\n\ntext\n") for k in range(3)]
+    sidebar = generate_dashboard.build_sidebar_html([path for path, _ in tasks])
+    expected = [generate_dashboard.render_page(path, content, sidebar) for path, content in tasks]
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started for a small batch")
+    with monkeypatch.context() as m:
+        m.setattr(generate_dashboard, "ProcessPoolExecutor", no_pool)
+        assert list(generate_dashboard.render_pages(tasks, sidebar, jobs=4)) == expected
+
+    monkeypatch.setattr(generate_dashboard, "POOL_MIN_TASKS", 2)
+    assert list(generate_dashboard.render_pages(tasks, sidebar, jobs=2)) == expected
+
+
+def test_jobs_default_is_shared(monkeypatch):
+    default = inspect.signature(generate_dashboard.generate_dashboard).parameters["jobs"].default
+    assert default == generate_dashboard.DEFAULT_JOBS
+    monkeypatch.setattr("sys.argv", ["generate_dashboard.py"])
+    calls = []
+    monkeypatch.setattr(generate_dashboard, "generate_dashboard", lambda **kwargs: calls.append(kwargs))
+    generate_dashboard.main()
+    assert calls[0]["jobs"] == generate_dashboard.DEFAULT_JOBS
+    assert generate_dashboard.DashboardBuilder().jobs == generate_dashboard.DEFAULT_JOBS
+
+
+def test_watcher_watches_what_the_builder_builds(docs, monkeypatch):
+    for path in ["Third/lib/readme.md", "html/stale.md", "tests/fixtures/sample.md", ".cache/notes.md",
+                 "KnowledgeBase/QnA/answer.md", "KnowledgeBase/notes.txt"]:
+        (docs / path).parent.mkdir(parents=True, exist_ok=True)
+        (docs / path).write_text("# Doc\n", encoding="utf-8")
+    monkeypatch.setattr(watch_dashboard, "WATCH_DIR", str(docs))
+
+    built = generate_dashboard.find_md_files()
+    assert sorted(os.path.relpath(path, docs) for path in built) == [
+        os.path.join("KnowledgeBase", "QnA", "answer.md"), "friction.md", "spring.md"]
+    assert sorted(watch_dashboard.get_md_snapshot()) == sorted(built)
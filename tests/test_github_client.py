@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from github_client import GitHubClient
+
+
+def make_client(server):
+    return GitHubClient("token", username="tester", base_url=server.base_url, backoff=0.01)
+
+
+def test_etag_reuse(server):
+    client = make_client(server)
+    first = client.request("GET", "/user")
+    second = client.request("GET", "/user")
+    assert first.status == second.status == 200
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.data == first.data
+    assert server.state.request_count == 2
+
+
+def test_get_retried_on_5xx(server):
+    client = make_client(server)
+    server.state.fail_every = 1
+    failed = client.request("GET", "/user", cache=False)
+    assert failed.status == 502
+    assert failed.attempts == client.max_retries + 1
+
+    server.state.fail_every = 2
+    client.request("GET", "/user", cache=False)             # request 2k + 1 succeeds
+    retried = client.request("GET", "/user", cache=False)   # 502, then a retry that succeeds
+    assert retried.status == 200
+    assert retried.attempts == 2
+
+
+def test_post_not_retried_on_5xx(server):
+    client = make_client(server)
+    server.state.fail_every = 1
+    response = client.request("POST", "/user/repos", {"name": "docs"})
+    assert response.status == 502
+    assert response.attempts == 1
+    assert server.state.request_count == 1
+
+
+def test_content_addressed_post_retried(server):
+    client = make_client(server)
+    assert client.request("POST", "/user/repos", {"name": "docs"}).status == 201
+    assert client.request("PUT", "/repos/tester/docs/contents/.nojekyll", {"message": "init", "content": ""}).status == 201
+    server.state.fail_every = server.state.request_count + 1
+    response = client.request("POST", "/repos/tester/docs/git/blobs", {"content": "aGk=", "encoding": "base64"},
+                              idempotent=True)
+    assert response.status == 201
+    assert response.attempts == 2
+
+
+def test_connections_reused(server):
+    client = make_client(server)
+    for _ in range(10):
+        assert client.request("GET", "/rate_limit", cache=False).status == 200
+    assert client.connection_count == 1
+    assert server.state.connections == 1
+    assert client.request_count == 10
+
+
+def test_counters_are_exact_across_threads(server):
+    client = make_client(server)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(lambda _: client.request("GET", "/rate_limit", cache=False).status, range(80)))
+    assert statuses == [200] * 80
+    assert client.request_count == server.state.request_count == 80
+    assert client.connection_count == server.state.connections
@@ -0,0 +1,57 @@
+import glob
+import os
+
+import markdown_engine
+import generate_dashboard
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "markdown")
+
+SAMPLE = """# Title
+
+Some **bold** text and a [doc](KnowledgeBase/Other.md) link.
+
+* one
+* two
+
+> quoted
+> twice
+
+## Next
+[site](https://example.com)
+"""
+
+def test_compat_matches_legacy_on_shared_rules():
+    assert markdown_engine.golden_check([("sample.md", SAMPLE)], strict=True) == 0
+
+def test_golden_check_counts_differences():
+    # Legacy ran its bold rule inside fenced code, compat leaves the fence alone
+    assert markdown_engine.golden_check([("fence.md", "```\n**x**\n```\n")]) == 1
+    # Escaping is the one difference that is expected, strict counts it too
+    assert markdown_engine.golden_check([("amp.md", "a & b\n")]) == 0
+    assert markdown_engine.golden_check([("amp.md", "a & b\n")], strict=True) == 1
+
+def test_compat_matches_legacy_on_fixtures():
+    docs = markdown_engine.load_corpus(sorted(glob.glob(os.path.join(FIXTURES, "*.md"))))
+    assert len(docs) == 3
+    # Info strings, blank lines and indents of fences and links in code spans print as they did
+    assert markdown_engine.golden_check(docs) == 0
+    # A '&' in one file and a quoted link title in another are escaped, legacy copied them raw
+    assert markdown_engine.golden_check(docs, strict=True) == 2
+
+def test_default_engine_is_legacy():
+    assert generate_dashboard.parse_markdown(SAMPLE) == markdown_engine.render_legacy(SAMPLE)
+
+def test_standard_engine_escapes_and_protects_code():
+    html = markdown_engine.render("a < b & **c**\n\n```\n**x** [l](y.md)\n```\n", "standard")
+    assert html == "<p>a &lt; b &amp; <strong>c</strong></p>\n<pre><code>**x** [l](y.md)</code></pre>\n"
+
+def test_empty_last_list_item_keeps_slots_aligned():
+    html = markdown_engine.MarkdownRenderer().render("1. `a`\n2. \n\nafter\n")
+    assert html == "<ol><li><code>a</code></li><li></li></ol>\n<p>after</p>\n"
+
+def test_bare_marker_is_an_empty_item():
+    render = markdown_engine.MarkdownRenderer().render
+    assert render("- a\n-") == "<ul><li>a</li><li></li></ul>\n"
+    assert render("-\n- a\n") == "<ul><li></li><li>a</li></ul>\n"
+    # It does not interrupt a paragraph
+    assert render("text\n-\n") == "<p>text\n-</p>\n"
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from search_index import SearchIndex, shard_key, term_counts, tokenize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE = "Spring 摩擦力 damping_K2 a 物 x9 カタカナ 한국어 PhysX3.4 中文mixed英文 ŠKODA ok 𠀀字"
+
+
+def test_tokenize_ascii_words():
+    assert list(tokenize("The Spring-damper, k=2 and a_b X")) == ["the", "spring", "damper", "and", "a_b"]
+
+
+def test_tokenize_cjk_bigrams():
+    assert list(tokenize("摩擦力")) == ["摩擦", "擦力"]
+    # A lone CJK character is kept as a unigram
+    assert list(tokenize("力 学")) == ["力", "学"]
+
+
+def test_tokenize_mixed_ascii_and_cjk():
+    assert list(tokenize("PhysX物理引擎v2")) == ["physx", "物理", "理引", "引擎", "v2"]
+    assert list(tokenize("鱼速度optimization优化")) == ["鱼速", "速度", "optimization", "优化"]
+
+
+def index_pages(directory, *pages):
+    return SearchIndex(str(directory)).apply([], [(href, title, term_counts(text)) for href, title, text in pages])
+
+
+def read_shard(directory, token):
+    with open(directory / (shard_key(token) + ".json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_apply_adds_and_searches(tmp_path):
+    index = SearchIndex(str(tmp_path))
+    result = index_pages(tmp_path, ("spring.html", "Spring", "spring damping spring"),
+                         ("friction.html", "Friction", "friction spring 摩擦力"))
+    assert [doc_id for doc_id, _ in result] == [0, 1]
+    assert result[1][1] == sorted({shard_key(t) for t in ["friction", "spring", "摩擦", "擦力"]})
+    assert index.search("spring") == [(2, "spring.html", "Spring"), (1, "friction.html", "Friction")]
+    assert index.search("摩擦 spring") == [(2, "friction.html", "Friction")]
+    assert index.search("missing") == []
+
+
+def test_apply_removes_pages_and_empty_shards(tmp_path):
+    index = SearchIndex(str(tmp_path))
+    (spring, _), (friction, friction_shards) = index_pages(
+        tmp_path, ("spring.html", "Spring", "spring damping"), ("friction.html", "Friction", "friction spring"))
+
+    index.apply([(friction, friction_shards)], [])
+    assert index.search("spring") == [(1, "spring.html", "Spring")]
+    assert read_shard(tmp_path, "spring") == {"spring": [spring, 1]}
+    # The "fr" shard held only the removed page, so it is deleted; trailing free slots are trimmed
+    assert not (tmp_path / "fr.json").exists()
+    assert json.loads((tmp_path / "docs.json").read_text(encoding="utf-8")) == [["spring.html", "Spring"]]
+
+
+def test_apply_reuses_free_slots_and_rewrites_only_touched_shards(tmp_path):
+    index = SearchIndex(str(tmp_path))
+    (a, a_shards), (b, b_shards), _ = index_pages(
+        tmp_path, ("a.html", "A", "alpha spring"), ("b.html", "B", "beta spring"), ("c.html", "C", "gamma"))
+    gamma_mtime = os.stat(tmp_path / "ga.json").st_mtime_ns
+
+    # Re-rendering b: its old postings go, the new ones take the same id
+    index = SearchIndex(str(tmp_path))
+    [(new_b, new_shards)] = index.apply([(b, b_shards)], [("b.html", "B", term_counts("beta beta delta"))])
+    assert new_b == b
+    assert new_shards == ["be", "de"]
+    assert read_shard(tmp_path, "spring") == {"spring": [a, 1]}
+    assert read_shard(tmp_path, "beta") == {"beta": [b, 2]}
+    assert index.search("delta") == [(1, "b.html", "B")]
+    assert os.stat(tmp_path / "ga.json").st_mtime_ns == gamma_mtime
+    # The spring shard changed, the beta shard too; the docs list did not
+    assert index.writer.written == 3
+    assert index.writer.skipped == 1
+
+
+def test_apply_with_nothing_to_do_writes_nothing(tmp_path):
+    assert SearchIndex(str(tmp_path / "search")).apply([], []) == []
+    assert not (tmp_path / "search").exists()
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs Node.js")
+def test_site_search_tokenizer_matches_python():
+    script = """
+        const fs = require('fs'), vm = require('vm');
+        const window = {};
+        vm.runInNewContext(fs.readFileSync(process.argv[1], 'utf8'), { window });
+        process.stdout.write(JSON.stringify(window.SiteSearch.tokenize(process.argv[2])));
+    """
+    result = subprocess.run(["node", "-e", script, os.path.join(ROOT, "site_search.js"), SAMPLE],
+                            capture_output=True, check=True, encoding="utf-8")
+    assert json.loads(result.stdout) == list(tokenize(SAMPLE))
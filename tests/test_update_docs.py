@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+import output_writer
+import update_docs
+from update_docs import UpdateError, commit_updates, load_manifest, plan_updates, replace_section
+
+DOC = "# Title\n\n<!-- BEGIN SECTION: force -->\nold\n<!-- END SECTION: force -->\n\ntail\n"
+
+
+def write_bytes(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_replace_section_keeps_markers_and_surroundings():
+    text = replace_section(DOC, "force", "new\nlines\n")
+    assert text == "# Title\n\n<!-- BEGIN SECTION: force -->\n\nnew\nlines\n\n<!-- END SECTION: force -->\n\ntail\n"
+
+
+def test_replace_section_tolerates_marker_spacing():
+    text = "  <!--BEGIN   SECTION:force   -->\nold\n<!-- END SECTION:  force-->"
+    assert replace_section(text, "force", "new").endswith("\nnew\n\n<!-- END SECTION:  force-->")
+
+
+@pytest.mark.parametrize("text, problem", [
+    ("no markers\n", "found 0 and 0"),
+    ("<!-- BEGIN SECTION: force -->\nold\n", "found 1 and 0"),
+    ("<!-- BEGIN SECTION: force -->\n<!-- BEGIN SECTION: force -->\n<!-- END SECTION: force -->\n", "found 2 and 1"),
+    ("<!-- END SECTION: force -->\nold\n<!-- BEGIN SECTION: force -->\n", "END marker comes before BEGIN"),
+    # A marker inside a line is not a marker line
+    ("text <!-- BEGIN SECTION: force -->\nold\n<!-- END SECTION: force -->\n", "found 0 and 1"),
+])
+def test_replace_section_rejects_bad_markers(text, problem):
+    with pytest.raises(UpdateError, match=problem):
+        replace_section(text, "force", "new")
+
+
+def test_replace_section_does_not_match_longer_names():
+    text = DOC.replace("force", "force-drive")
+    with pytest.raises(UpdateError, match="found 0 and 0"):
+        replace_section(text, "force", "new")
+
+
+def test_append_creates_a_missing_section():
+    text = replace_section("# Title\n", "force", "new", append=True)
+    assert text == "# Title\n\n<!-- BEGIN SECTION: force -->\n\nnew\n\n<!-- END SECTION: force -->\n"
+    assert replace_section(text, "force", "newer") == text.replace("new\n", "newer\n")
+
+
+def test_crlf_and_bom_are_preserved(tmp_path):
+    path = write_bytes(tmp_path / "doc.md", b"\xef\xbb\xbf" + DOC.replace("\n", "\r\n").encode("utf-8"))
+    changes = plan_updates([(path, "force", "new\nlines", False)])
+    commit_updates(changes)
+    data = (tmp_path / "doc.md").read_bytes()
+    assert data.startswith(b"\xef\xbb\xbf# Title\r\n")
+    assert b"<!-- BEGIN SECTION: force -->\r\n\r\nnew\r\nlines\r\n\r\n<!-- END SECTION: force -->\r\n" in data
+    assert b"\n" not in data.replace(b"\r\n", b"")
+
+
+def test_manifest_rejects_markers_in_content(tmp_path):
+    manifest = tmp_path / "patches.json"
+    manifest.write_text(json.dumps({"updates": [
+        {"file": "doc.md", "section": "force", "content": "<!-- END SECTION: force -->"},
+        {"file": "doc.md", "section": "force"},
+    ]}), encoding="utf-8")
+    with pytest.raises(UpdateError) as error:
+        load_manifest(str(manifest))
+    assert str(error.value).splitlines() == [
+        "update #1: new content must not contain section markers",
+        "update #2: needs exactly one of 'content' and 'content_file'",
+    ]
+
+
+def test_section_updated_twice_is_rejected(tmp_path):
+    path = write_bytes(tmp_path / "doc.md", DOC.encode("utf-8"))
+    with pytest.raises(UpdateError, match="section 'force' is updated twice"):
+        plan_updates([(path, "force", "a", False), (path, "force", "b", False)])
+
+
+def test_one_bad_update_plans_nothing(tmp_path):
+    good = write_bytes(tmp_path / "good.md", DOC.encode("utf-8"))
+    bad = write_bytes(tmp_path / "bad.md", b"no markers\n")
+    with pytest.raises(UpdateError) as error:
+        plan_updates([(good, "force", "new", False), (bad, "force", "new", False),
+                      (str(tmp_path / "missing.md"), "force", "new", False)])
+    assert len(str(error.value).splitlines()) == 2
+    assert (tmp_path / "good.md").read_text(encoding="utf-8") == DOC
+
+
+def test_failed_write_rolls_back_earlier_files(tmp_path, monkeypatch):
+    first = write_bytes(tmp_path / "a.md", DOC.encode("utf-8"))
+    second = write_bytes(tmp_path / "b.md", DOC.encode("utf-8"))
+    changes = plan_updates([(first, "force", "new", False), (second, "force", "new", False)])
+    assert list(changes) == [first, second]
+
+    write = output_writer.OutputWriter.write
+
+    def fail_on_second(self, path, data, encoding='utf-8'):
+        if path == second:
+            raise OSError(28, "No space left on device")
+        return write(self, path, data, encoding)
+    monkeypatch.setattr(output_writer.OutputWriter, "write", fail_on_second)
+
+    with pytest.raises(OSError):
+        commit_updates(changes)
+    assert (tmp_path / "a.md").read_text(encoding="utf-8") == DOC
+    assert (tmp_path / "b.md").read_text(encoding="utf-8") == DOC
+
+
+def test_display_name_on_another_drive(monkeypatch):
+    def relpath(path, start):
+        raise ValueError("path is on mount 'D:', start on mount 'C:'")
+    monkeypatch.setattr(update_docs.os.path, "relpath", relpath)
+    assert update_docs.display_name("D:\\docs\\doc.md") == "D:\\docs\\doc.md"
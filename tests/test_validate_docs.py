@@ -0,0 +1,138 @@
+import json
+import os
+
+import pytest
+
+import validate_docs
+from validate_docs import CACHE_FILE, DocValidator, PathExistenceCache
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "index.html").write_text('<a href="docs/guide.html">Guide</a>', encoding="utf-8")
+    (tmp_path / "docs" / "guide.html").write_text('<a href="../index.html">Home</a>', encoding="utf-8")
+    return tmp_path
+
+
+def run(site):
+    """One validator run; returns it with the names of the files it actually re-checked."""
+    validator = DocValidator(site, quiet=True)
+    checked = []
+    collect_facts = validator.collect_all_facts
+
+    def collect_all_facts():
+        records, all_facts = collect_facts()
+        checked.extend(sorted(all_facts))
+        return records, all_facts
+
+    validator.collect_all_facts = collect_all_facts
+    ok = validator.validate_all()
+    return ok, validator, checked
+
+
+def test_unchanged_files_reuse_cached_results(site):
+    assert run(site)[0]
+    assert (site / CACHE_FILE).exists()
+
+    ok, validator, checked = run(site)
+    assert ok
+    assert checked == []
+    assert validator.link_count == 0
+
+
+def test_cached_errors_are_replayed(site):
+    (site / "index.html").write_text('<a href="missing.html">x</a>', encoding="utf-8")
+    ok, first, _ = run(site)
+    assert not ok
+
+    ok, second, checked = run(site)
+    assert not ok
+    assert checked == []
+    assert second.errors == first.errors
+
+
+def test_edited_source_is_rechecked(site):
+    run(site)
+    (site / "index.html").write_text('<a href="docs/missing.html">Guide</a>', encoding="utf-8")
+
+    ok, validator, checked = run(site)
+    assert checked == ["index.html"]
+    assert not ok
+    assert any("docs/missing.html" in error for error in validator.errors)
+
+
+def test_touched_but_identical_source_reuses_cache(site):
+    run(site)
+    stat = (site / "index.html").stat()
+    os.utime(site / "index.html", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert run(site)[2] == []
+
+
+def test_removed_link_target_invalidates_cache(site):
+    run(site)
+    (site / "docs" / "guide.html").unlink()
+
+    ok, validator, checked = run(site)
+    assert checked == ["index.html"]
+    assert not ok
+    assert any("docs/guide.html" in error for error in validator.errors)
+
+
+def test_created_link_target_invalidates_cache(site):
+    (site / "index.html").write_text('<a href="docs/new.html">New</a>', encoding="utf-8")
+    assert not run(site)[0]
+
+    (site / "docs" / "new.html").write_text("<p>new</p>", encoding="utf-8")
+    ok, _, checked = run(site)
+    assert "index.html" in checked
+    assert ok
+
+
+def test_rules_change_discards_cache(site, monkeypatch):
+    run(site)
+    monkeypatch.setattr(validate_docs, "get_rules_hash", lambda: "changed")
+    assert run(site)[2] == ["docs/guide.html", "index.html"]
+
+
+def test_no_cache_neither_reads_nor_writes(site):
+    validator = DocValidator(site, quiet=True, use_cache=False)
+    assert validator.validate_all()
+    assert not (site / CACHE_FILE).exists()
+
+
+def test_cache_records_link_targets(site):
+    run(site)
+    cache = json.loads((site / CACHE_FILE).read_text(encoding="utf-8"))
+    assert cache["files"]["index.html"]["targets"] == {"docs/guide.html": True}
+    assert cache["files"]["docs/guide.html"]["targets"] == {"index.html": True}
+
+
+def test_path_existence_cache(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "a" / "b" / "page.html").write_text("", encoding="utf-8")
+    cache = PathExistenceCache(tmp_path)
+
+    assert cache.exists("a/b/page.html")
+    assert cache.exists("a/b")
+    assert cache.exists("a/./b/../b/page.html")
+    assert not cache.exists("a/b/other.html")
+    # A missing parent directory is not mistaken for a listing that merely lacks the name
+    assert not cache.exists("a/missing/page.html")
+    assert not cache.exists("missing/b/page.html")
+    assert cache.exists(str(tmp_path / "a" / "b" / "page.html"))
+
+
+def test_path_existence_cache_lists_each_directory_once(tmp_path, monkeypatch):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "one.html").write_text("", encoding="utf-8")
+    (tmp_path / "a" / "two.html").write_text("", encoding="utf-8")
+    cache = PathExistenceCache(tmp_path)
+    scanned = []
+    scandir = os.scandir
+    monkeypatch.setattr(validate_docs.os, "scandir", lambda path: scanned.append(path) or scandir(path))
+
+    for name in ("a/one.html", "a/two.html", "a/three.html", "a/one.html"):
+        cache.exists(name)
+    assert sorted(scanned) == sorted([str(tmp_path), str(tmp_path / "a")])
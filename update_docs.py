@@ -0,0 +1,206 @@
+"""
+Batch, all-or-nothing updates of marked sections in the docs, followed by one incremental dashboard build.
+
+A section is the text between a pair of marker comments, which no markdown engine renders:
+
+    <!-- BEGIN SECTION: force-drive -->
+    ...replaced by the update...
+    <!-- END SECTION: force-drive -->
+
+The manifest (JSON) lists the updates; paths are relative to the manifest's directory:
+
+    {"updates": [
+        {"file": "DeepDive_PhysicsKernel.md", "section": "force-drive", "content_file": "patches/force.md"},
+        {"file": "Spring_Analysis.md", "section": "constants", "content": "...", "append": true}
+    ]}
+
+Every update is validated and applied in memory first (the file exists, the section's markers occur
+exactly once and in order, the new content carries no markers, no section is targeted twice); one bad
+entry and nothing is written. Changed files are then written atomically and skipped when identical (see
+output_writer.py); if a write fails, the files already written are restored. Finally the dashboard is
+rebuilt once, re-rendering only the pages that changed, instead of once per patched file.
+
+    python update_docs.py patches.json
+    python update_docs.py --dry-run patches.json
+    python update_docs.py --no-build patches.json
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+
+import markdown_engine
+import generate_dashboard
+import output_writer
+
+MARKER = "<!-- {} SECTION: {} -->"
+MARKER_RE = re.compile(r"<!--\s*(?:BEGIN|END)\s+SECTION:")
+
+class UpdateError(Exception):
+    pass
+
+def display_name(filepath):
+    """`filepath` relative to the docs root, or as given when it is on another drive (Windows)."""
+    try:
+        return os.path.relpath(filepath, generate_dashboard.ROOT_DIR)
+    except ValueError:
+        return filepath
+
+def marker_pattern(kind, section):
+    """One whole marker line, tolerant of indentation and spacing inside the comment."""
+    return re.compile(rf"^[ \t]*<!--\s*{kind}\s+SECTION:\s*{re.escape(section)}\s*-->[ \t]*(?:\r?\n|\Z)", re.M)
+
+def read_text(path):
+    # newline='' keeps CRLF files CRLF; a BOM survives as U+FEFF and is written back unchanged
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+def replace_section(text, section, content, append=False):
+    """Returns `text` with the body of `section` replaced by `content`."""
+    newline = "\r\n" if "\r\n" in text else "\n"
+    body = newline + content.strip("\n").replace("\r\n", "\n").replace("\n", newline) + newline + newline
+    begins = list(marker_pattern("BEGIN", section).finditer(text))
+    ends = list(marker_pattern("END", section).finditer(text))
+    if not begins and not ends and append:
+        separator = "" if not text or text.endswith(newline + newline) else newline if text.endswith(newline) else newline * 2
+        return (text + separator + MARKER.format("BEGIN", section) + newline + body
+                + MARKER.format("END", section) + newline)
+    if len(begins) != 1 or len(ends) != 1:
+        raise UpdateError(f"section '{section}' needs exactly one BEGIN and one END marker "
+                          f"(found {len(begins)} and {len(ends)})")
+    begin, end = begins[0], ends[0]
+    if end.start() < begin.end():
+        raise UpdateError(f"section '{section}': END marker comes before BEGIN")
+    return text[:begin.end()] + body + text[end.start():]
+
+def load_manifest(path):
+    """Returns [(file, section, content, append)], everything resolved and read; raises UpdateError."""
+    try:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise UpdateError(f"cannot read manifest {path}: {e}")
+    updates = manifest.get("updates") if isinstance(manifest, dict) else manifest
+    if not isinstance(updates, list):
+        raise UpdateError("manifest must be a list of updates or an object with an 'updates' list")
+
+    base = os.path.dirname(os.path.abspath(path))
+    resolved = []
+    errors = []
+    for number, entry in enumerate(updates, 1):
+        try:
+            if not isinstance(entry, dict) or not entry.get("file") or not entry.get("section"):
+                raise UpdateError("needs 'file' and 'section'")
+            if ("content" in entry) == ("content_file" in entry):
+                raise UpdateError("needs exactly one of 'content' and 'content_file'")
+            if "content" in entry:
+                content = entry["content"]
+            else:
+                content_path = os.path.join(base, entry["content_file"])
+                try:
+                    content = read_text(content_path)
+                except OSError as e:
+                    raise UpdateError(f"cannot read {entry['content_file']}: {e.strerror}")
+                except UnicodeDecodeError:
+                    raise UpdateError(f"{entry['content_file']} is not UTF-8")
+            if not isinstance(content, str):
+                raise UpdateError("'content' must be a string")
+            if MARKER_RE.search(content):
+                raise UpdateError("new content must not contain section markers")
+            resolved.append((os.path.normpath(os.path.join(base, entry["file"])), entry["section"].strip(),
+                             content.lstrip("\ufeff"), bool(entry.get("append"))))
+        except UpdateError as e:
+            errors.append(f"update #{number}: {e}")
+    if errors:
+        raise UpdateError("\n".join(errors))
+    return resolved
+
+def plan_updates(updates):
+    """Applies every update in memory. Returns {file: (old text, new text)}; raises UpdateError listing every problem."""
+    texts = {}
+    seen = set()
+    errors = []
+    for filepath, section, content, append in updates:
+        name = display_name(filepath)
+        key = (os.path.normcase(filepath), section)
+        if key in seen:
+            errors.append(f"{name}: section '{section}' is updated twice")
+            continue
+        seen.add(key)
+        if filepath not in texts:
+            try:
+                text = read_text(filepath)
+            except OSError as e:
+                errors.append(f"{name}: {e.strerror}")
+                continue
+            except UnicodeDecodeError:
+                errors.append(f"{name}: not UTF-8")
+                continue
+            texts[filepath] = (text, text)
+        old, new = texts[filepath]
+        try:
+            texts[filepath] = (old, replace_section(new, section, content, append))
+        except UpdateError as e:
+            errors.append(f"{name}: {e}")
+    if errors:
+        raise UpdateError("\n".join(errors))
+    return {filepath: pair for filepath, pair in texts.items() if pair[0] != pair[1]}
+
+def commit_updates(changes):
+    """Writes the changed files; if one fails, the ones already written get their old text back."""
+    writer = output_writer.OutputWriter()
+    done = []
+    try:
+        for filepath, (old, new) in changes.items():
+            writer.write(filepath, new.encode('utf-8'))
+            done.append(filepath)
+    except OSError:
+        for filepath in done:
+            output_writer.replace_file(filepath, changes[filepath][0].encode('utf-8'))
+        raise
+    return done
+
+def main():
+    parser = argparse.ArgumentParser(description="Replace marked sections of several docs, then rebuild the dashboard once.")
+    parser.add_argument("manifest", help="JSON list of {file, section, content | content_file[, append]}")
+    parser.add_argument("--dry-run", action="store_true", help="validate and list the files that would change")
+    parser.add_argument("--no-build", action="store_true", help="don't rebuild the dashboard afterwards")
+    parser.add_argument("--markdown", choices=markdown_engine.ENGINES, default=generate_dashboard.DEFAULT_ENGINE,
+                        help="markdown flavour, as in generate_dashboard.py")
+    parser.add_argument("--shared-nav", action="store_true", help="as in generate_dashboard.py")
+    parser.add_argument("--minify", action="store_true", help="as in generate_dashboard.py")
+    parser.add_argument("--precompress", action="store_true", help="as in generate_dashboard.py")
+    args = parser.parse_args()
+
+    try:
+        updates = load_manifest(args.manifest)
+        changes = plan_updates(updates)
+    except UpdateError as e:
+        print(f"[Error] nothing written:\n{e}")
+        sys.exit(1)
+
+    print(f"{len(updates)} update(s), {len(changes)} file(s) changed.")
+    if args.dry_run or not changes:
+        for filepath in changes:
+            print(f"Would update: {display_name(filepath)}")
+        return
+
+    try:
+        written = commit_updates(changes)
+    except OSError as e:
+        print(f"[Error] write failed, changes rolled back: {e}")
+        sys.exit(1)
+    for filepath in written:
+        print(f"Updated: {display_name(filepath)}")
+
+    if args.no_build or not any(path.endswith(".md") for path in written):
+        return
+    # One incremental build: only pages whose source hash changed are re-rendered
+    builder = generate_dashboard.DashboardBuilder(engine=args.markdown, shared_nav=args.shared_nav,
+                                                 minify=args.minify, precompress=args.precompress)
+    builder.build()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 
 import os
 
+from output_writer import OutputWriter
+
 content = r"""# 物理仿真内核深度解析 (Deep Dive: Physics Kernel)
 
 基于对核心代码的静态分析，本类文档详细拆解了 FishingGame 项目中自定义物理引擎的实现原理。该系统混合了 **Verlet 积分（软体/绳索）** 与 **刚体动力学（Rigidbody）**，通过自定义求解器实现高频交互。
@@ -104,8 +106,8 @@ content = r"""# 物理仿真内核深度解析 (Deep Dive: Physics Kernel)
 
 target_file = r"G:\Copilot_OutPut\FishingGame\DeepDive_PhysicsKernel.md"
 
-with open(target_file, "w", encoding="utf-8") as f:
-    f.write(content)
-
-print(f"Updated {target_file}")
+if OutputWriter().write(target_file, content):
+    print(f"Updated {target_file}")
+else:
+    print(f"Unchanged {target_file}")
 
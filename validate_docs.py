@@ -6,7 +6,12 @@
 import os
 import re
 import sys
+import json
+import hashlib
+import argparse
 from pathlib import Path
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
 
 # 颜色输出
 class Colors:
@@ -28,100 +33,348 @@ def print_success(msg):
 def print_info(msg):
     print(f"{Colors.BLUE}ℹ️  {msg}{Colors.END}")
 
+class PathExistenceCache:
+    """
+    按目录缓存的文件存在性查询：每个目录只 scandir 一次，之后的查询都是集合查找，
+    代替每个链接一次的 Path.exists() 系统调用。
+    """
+
+    def __init__(self, base_path):
+        self.base_path = os.path.abspath(base_path)
+        self.listings = {}
+
+    def _listing(self, directory):
+        listing = self.listings.get(directory)
+        if listing is None:
+            try:
+                with os.scandir(directory) as entries:
+                    listing = {os.path.normcase(entry.name) for entry in entries}
+            except OSError:
+                listing = set()
+            self.listings[directory] = listing
+        return listing
+
+    def exists(self, path):
+        path = os.path.normpath(os.path.join(self.base_path, path))
+        directory, name = os.path.split(path)
+        if not name:
+            return os.path.exists(path)
+        # 逐级确认父目录存在，避免缺失的父目录被误判
+        if directory != self.base_path and not self.exists(directory):
+            return False
+        return os.path.normcase(name) in self._listing(directory)
+
+
+# 递归检查时跳过的目录（版本库、第三方代码、缓存）
+EXCLUDED_DIRS = {'.git', 'Third', 'node_modules', '__pycache__'}
+CACHE_FILE = '.validate_cache.json'
+CACHE_VERSION = 1
+
+
+def hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def get_rules_hash():
+    """规则写在本文件里，本文件改动后缓存全部失效"""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hash_bytes(f.read())
+
+
+def find_html_files(base_path):
+    """递归查找所有 HTML 文件（跳过 EXCLUDED_DIRS）"""
+    html_files = []
+    for root, dirs, files in os.walk(base_path):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS)
+        for file in sorted(files):
+            if file.endswith('.html'):
+                html_files.append(Path(root) / file)
+    return html_files
+
+
+class HtmlFacts:
+    """一个 HTML 文件解析一次后得到的事实记录，所有规则共享"""
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name          # 相对 base_path 的路径，用于输出
+        self.hrefs = []           # 所有标签的 href 属性，按出现顺序
+        self.classes = set()
+        self.ids = set()
+        self.style_text = ''      # <style> 内的 CSS
+        self.script_text = ''     # <script> 内的 JS
+        self.error = None         # 读取或解析失败时的异常
+
+
+class HtmlFactParser(HTMLParser):
+    """流式解析：在回调里直接填充 HtmlFacts，不保留文档树"""
+
+    def __init__(self, facts):
+        super().__init__(convert_charrefs=True)
+        self.facts = facts
+        self.raw_tag = None
+        self.style_parts = []
+        self.script_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if value is None:
+                continue
+            if name == 'href':
+                self.facts.hrefs.append(value)
+            elif name == 'class':
+                self.facts.classes.update(value.split())
+            elif name == 'id':
+                self.facts.ids.add(value)
+        if tag in ('style', 'script'):
+            self.raw_tag = tag
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.raw_tag = None
+
+    def handle_endtag(self, tag):
+        if tag == self.raw_tag:
+            self.raw_tag = None
+
+    def handle_data(self, data):
+        if self.raw_tag == 'style':
+            self.style_parts.append(data)
+        elif self.raw_tag == 'script':
+            self.script_parts.append(data)
+
+    def close(self):
+        super().close()
+        self.facts.style_text = ''.join(self.style_parts)
+        self.facts.script_text = ''.join(self.script_parts)
+
+
+def collect_facts(job):
+    """线程池任务：每个 HTML 文件只读取一次、解析一次"""
+    html_file, name, content = job
+    facts = HtmlFacts(html_file, name)
+    try:
+        if content is None:
+            with open(html_file, 'rb') as f:
+                content = f.read()
+        parser = HtmlFactParser(facts)
+        parser.feed(content.decode('utf-8'))
+        parser.close()
+    except Exception as e:
+        facts.error = e
+    return facts
+
+
+class RuleResult:
+    """一条规则对一个文件的检查结果，可以写入缓存并原样重放"""
+
+    def __init__(self, targets):
+        self.errors = []
+        self.warnings = []
+        self.successes = []
+        self.targets = targets  # 该文件依赖的路径 -> 检查时是否存在（整个文件的规则共享）
+
+    def to_json(self):
+        return {"errors": self.errors, "warnings": self.warnings, "successes": self.successes}
+
+
 class DocValidator:
-    def __init__(self, base_path='.'):
+    def __init__(self, base_path='.', quiet=False, jobs=None, use_cache=True):
         self.base_path = Path(base_path)
+        self.quiet = quiet
+        self.jobs = jobs
+        self.use_cache = use_cache
+        self.cache_path = self.base_path / CACHE_FILE
         self.errors = []
         self.warnings = []
+        self.path_cache = PathExistenceCache(self.base_path)
+        self.link_results = {}  # (源目录, 链接) -> 是否存在，同一目录下重复的链接（如导航栏）只解析一次
+        self.link_count = 0
+
+        # HTML 规则：(标题, 函数(facts, result))，对已解析好的事实逐文件运行。
+        # 新增检查只需 add_rule()，不会再多一次全量读取和解析。
+        self.html_rules = []
+        self.add_rule("检查 HTML 文件中的链接...", self.check_html_links)
+        self.add_rule("检查 modal/overlay 是否正确隐藏...", self.check_modal_visibility)
+        self.add_rule("检查 markdown 文件引用...", self.check_markdown_references)
+
+    def add_rule(self, title, rule):
+        self.html_rules.append((title, rule))
+
+    def success(self, msg):
+        """成功信息只在非静默模式下逐条输出"""
+        if not self.quiet:
+            print_success(msg)
+
+    def target_exists(self, result, path):
+        """查询路径是否存在，并把它记为该文件的依赖（存在性变化时缓存失效）"""
+        exists = self.path_cache.exists(path)
+        result.targets[os.path.normpath(path).replace(os.sep, '/')] = exists
+        return exists
 
     def validate_all(self):
         """运行所有检查"""
         print(f"\n{Colors.BLUE}🔍 开始文档自测...{Colors.END}\n")
 
-        self.check_html_links()
-        self.check_modal_visibility()
+        records, all_facts = self.collect_all_facts()
+        for index, (title, rule) in enumerate(self.html_rules):
+            print_info(title if index == 0 else "\n" + title)
+            for name, record in records.items():
+                facts = all_facts.get(name)
+                if facts is not None:
+                    # 文件有变化：运行规则并记录结果
+                    result = RuleResult(record["targets"])
+                    rule(facts, result)
+                    record["rules"][title] = result.to_json()
+                self.replay(record["rules"].get(title))
+
+        cached = len(records) - len(all_facts)
+        print_info(f"共 {len(records)} 个文件，其中 {cached} 个未变化使用缓存结果；"
+                   f"本次检查了 {self.link_count} 个链接（{len(self.link_results)} 个不重复）")
+        if self.use_cache:
+            self.save_cache(records)
+
         self.check_file_names()
-        self.check_markdown_references()
 
         self.print_summary()
 
         # 返回是否有错误（用于 git hook）
         return len(self.errors) == 0
 
-    def check_html_links(self):
-        """检查 HTML 文件中的链接是否指向存在的文件"""
-        print_info("检查 HTML 文件中的链接...")
-
-        html_files = list(self.base_path.glob('*.html'))
-
-        for html_file in html_files:
+    def replay(self, rule_result):
+        if not rule_result:
+            return
+        self.errors.extend(rule_result["errors"])
+        self.warnings.extend(rule_result["warnings"])
+        for msg in rule_result["successes"]:
+            self.success(msg)
+
+    def load_cache(self):
+        if not self.use_cache:
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != CACHE_VERSION or cache.get("rules") != get_rules_hash():
+            return {}
+        return cache.get("files", {})
+
+    def save_cache(self, records):
+        tmp_path = str(self.cache_path) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "rules": get_rules_hash(), "files": records},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.cache_path)
+
+    def is_cache_valid(self, entry):
+        """缓存结果可用的条件：依赖的路径的存在性都没有变化"""
+        return all(self.path_cache.exists(path) == exists for path, exists in entry["targets"].items())
+
+    def collect_all_facts(self):
+        """
+        递归收集所有 HTML 文件。内容（大小/修改时间相同，或内容哈希相同）和依赖路径都没变的文件
+        直接复用缓存结果；其余文件并行读取并解析。
+        返回 (文件名 -> 缓存记录, 文件名 -> 需要重新检查的 HtmlFacts)。
+        """
+        cache = self.load_cache()
+        records = {}
+        jobs = []
+        for html_file in find_html_files(self.base_path):
+            name = html_file.relative_to(self.base_path).as_posix()
             try:
-                with open(html_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                # 查找所有 href 属性
-                links = re.findall(r'href=["\'](.*?)["\']', content)
-
-                for link in links:
-                    # 跳过外部链接和 # 链接
-                    if link.startswith('http') or link.startswith('#'):
-                        continue
-
-                    # 解析文件路径
-                    file_path = self.base_path / link
-
-                    if not file_path.exists():
-                        self.errors.append(
-                            f"[{html_file.name}] 链接指向不存在的文件: {link}"
-                        )
-                    else:
-                        print_success(f"{html_file.name}: 链接正常 {link}")
-
+                stat = html_file.stat()
+                entry = cache.get(name)
+                content = None
+                if entry and (entry["size"], entry["mtime"]) != (stat.st_size, stat.st_mtime_ns):
+                    with open(html_file, 'rb') as f:
+                        content = f.read()
+                    if hash_bytes(content) != entry["hash"]:
+                        entry = None
+                if entry and self.is_cache_valid(entry):
+                    entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime_ns
+                    records[name] = entry
+                    continue
+                if content is None:
+                    with open(html_file, 'rb') as f:
+                        content = f.read()
             except Exception as e:
-                self.errors.append(f"[{html_file.name}] 读取失败: {str(e)}")
-
-    def check_modal_visibility(self):
+                self.errors.append(f"[{name}] 读取失败: {str(e)}")
+                continue
+
+            records[name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": hash_bytes(content),
+                             "targets": {}, "rules": {}}
+            jobs.append((html_file, name, content))
+
+        all_facts = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for facts in pool.map(collect_facts, jobs):
+                if facts.error is not None:
+                    # 读取失败的文件不写入缓存，下次重新检查
+                    self.errors.append(f"[{facts.name}] 读取失败: {str(facts.error)}")
+                    del records[facts.name]
+                    continue
+                all_facts[facts.name] = facts
+        return records, all_facts
+
+    def check_html_links(self, facts, result):
+        """检查 HTML 文件中的链接是否指向存在的文件"""
+        source_dir = os.path.relpath(facts.path.parent, self.base_path)
+        reported = set()
+        for link in facts.hrefs:
+            # 跳过外部链接和 # 链接
+            if link.startswith('http') or link.startswith('#'):
+                continue
+            self.link_count += 1
+
+            # 解析文件路径（相对于 HTML 文件所在目录）
+            key = (source_dir, link)
+            exists = self.link_results.get(key)
+            if exists is None:
+                exists = self.link_results[key] = self.target_exists(result, os.path.join(source_dir, link))
+            else:
+                result.targets[os.path.normpath(os.path.join(source_dir, link)).replace(os.sep, '/')] = exists
+
+            if not exists:
+                if link not in reported:
+                    reported.add(link)
+                    result.errors.append(f"[{facts.name}] 链接指向不存在的文件: {link}")
+            else:
+                result.successes.append(f"{facts.name}: 链接正常 {link}")
+
+    def check_modal_visibility(self, facts, result):
         """检查 modal 和 overlay 是否正确隐藏"""
-        print_info("\n检查 modal/overlay 是否正确隐藏...")
-
-        html_files = list(self.base_path.glob('*.html'))
-        modal_issues = {}
-
-        for html_file in html_files:
-            try:
-                with open(html_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                # 检查是否有 note-editor 或 note-overlay
-                if 'note-editor' in content or 'note-overlay' in content:
-                    # 检查 CSS 中是否有 display: none
-                    has_editor_hidden = bool(re.search(
-                        r'\.note-editor\s*\{[^}]*display:\s*none',
-                        content
-                    ))
-
-                    has_overlay_hidden = bool(re.search(
-                        r'\.note-overlay\s*\{[^}]*display:\s*none',
-                        content
-                    ))
-
-                    if has_editor_hidden and has_overlay_hidden:
-                        print_success(f"{html_file.name}: modal 正确隐藏")
-                    else:
-                        issues = []
-                        if not has_editor_hidden:
-                            issues.append("note-editor 没有 display: none")
-                        if not has_overlay_hidden:
-                            issues.append("note-overlay 没有 display: none")
-
-                        modal_issues[html_file.name] = issues
-
-            except Exception as e:
-                self.warnings.append(f"[{html_file.name}] 检查 modal 时出错: {str(e)}")
-
-        for file_name, issues in modal_issues.items():
-            for issue in issues:
-                self.errors.append(f"[{file_name}] {issue}")
+        # 检查是否有 note-editor 或 note-overlay（元素的 class/id 或 CSS 规则；脚本里的说明文字不算）
+        names = facts.classes | facts.ids
+        mentioned = any(
+            token in names or token in facts.style_text
+            for token in ('note-editor', 'note-overlay')
+        )
+        if not mentioned:
+            return
+
+        # 检查 CSS 中是否有 display: none
+        has_editor_hidden = bool(re.search(r'\.note-editor\s*\{[^}]*display:\s*none', facts.style_text))
+        has_overlay_hidden = bool(re.search(r'\.note-overlay\s*\{[^}]*display:\s*none', facts.style_text))
+
+        if has_editor_hidden and has_overlay_hidden:
+            result.successes.append(f"{facts.name}: modal 正确隐藏")
+            return
+        if not has_editor_hidden:
+            result.errors.append(f"[{facts.name}] note-editor 没有 display: none")
+        if not has_overlay_hidden:
+            result.errors.append(f"[{facts.name}] note-overlay 没有 display: none")
+
+    def check_markdown_references(self, facts, result):
+        """检查 HTML 中的 fetch 请求是否指向存在的 markdown 文件"""
+        source_dir = os.path.relpath(facts.path.parent, self.base_path)
+        # 查找 fetch 请求（相对于 HTML 文件所在目录）
+        for md_file in re.findall(r"fetch\(['\"]([^'\"]+\.md)['\"]", facts.script_text):
+            if not self.target_exists(result, os.path.join(source_dir, md_file)):
+                result.errors.append(f"[{facts.name}] fetch 指向不存在的文件: {md_file}")
+            else:
+                result.successes.append(f"{facts.name}: 正确加载 {md_file}")
 
     def check_file_names(self):
         """检查文件名一致性（特别是 QHPhysics vs XunPhysics）"""
@@ -137,7 +390,7 @@ class DocValidator:
                 f"发现旧命名文件: {', '.join(old_qhphysics)} (应该使用 XunPhysics)"
             )
         else:
-            print_success("文件名命名规范（使用 XunPhysics）")
+            self.success("文件名命名规范（使用 XunPhysics）")
 
         # 检查对应文件是否成对存在
         html_files = set(f.replace('.html', '') for f in file_names if f.endswith('.html'))
@@ -145,34 +398,7 @@ class DocValidator:
 
         # 特殊处理：某些 HTML 文件加载 markdown，应该检查 fetch 指向
         # 例如 XunPhysics_Architecture.html 应该加载 complete_doc.md
-        print_success("文件名一致性检查完成")
-
-    def check_markdown_references(self):
-        """检查 HTML 中的 fetch 请求是否指向存在的 markdown 文件"""
-        print_info("\n检查 markdown 文件引用...")
-
-        html_files = list(self.base_path.glob('*.html'))
-
-        for html_file in html_files:
-            try:
-                with open(html_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                # 查找 fetch 请求
-                fetches = re.findall(r"fetch\(['\"]([^'\"]+\.md)['\"]", content)
-
-                for md_file in fetches:
-                    md_path = self.base_path / md_file
-
-                    if not md_path.exists():
-                        self.errors.append(
-                            f"[{html_file.name}] fetch 指向不存在的文件: {md_file}"
-                        )
-                    else:
-                        print_success(f"{html_file.name}: 正确加载 {md_file}")
-
-            except Exception as e:
-                self.warnings.append(f"[{html_file.name}] 检查 markdown 引用时出错: {str(e)}")
+        self.success("文件名一致性检查完成")
 
     def print_summary(self):
         """打印总结"""
@@ -203,7 +429,13 @@ class DocValidator:
 
 
 def main():
-    validator = DocValidator()
+    parser = argparse.ArgumentParser(description='文档自测脚本 - 检查常见的文档问题')
+    parser.add_argument('-q', '--quiet', action='store_true', help='只输出错误、警告和总结')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行读取文件的线程数（默认自动）')
+    parser.add_argument('--no-cache', action='store_true', help=f'忽略并且不写入 {CACHE_FILE}，全部重新检查')
+    args = parser.parse_args()
+
+    validator = DocValidator(quiet=args.quiet, jobs=args.jobs, use_cache=not args.no_cache)
     success = validator.validate_all()
 
     # 返回状态码用于 git hook
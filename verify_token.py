@@ -4,98 +4,94 @@
 """
 
 import sys
-import urllib.request
-import urllib.error
-import json
-import base64
+import time
 
-def verify_token(username, token):
-    """验证 token 是否有效"""
+import credentials
+
+def verify_token(username, token, refresh=False, api_url=credentials.DEFAULT_API_URL):
+    """验证 token 是否有效（一小时内验证过的直接使用缓存结果）"""
     print("验证 GitHub Token...")
     print("用户名: " + username)
     print("Token: " + token[:20] + "..." + token[-10:])
     print()
 
-    # 尝试获取用户信息
-    url = "https://api.github.com/user"
-
-    try:
-        # 使用 token 作为密码的 Basic Auth
-        auth_string = base64.b64encode((username + ":" + token).encode()).decode()
+    info = credentials.validate_token(username, token, api_url=api_url, refresh=refresh)
+    if info.from_cache:
+        age = int(time.time() - info.checked_at)
+        print("（使用 " + str(age // 60) + " 分钟前的验证结果，加 --refresh 重新验证）")
+        print()
 
-        req = urllib.request.Request(
-            url,
-            headers={
-                "Authorization": "Basic " + auth_string,
-                "Accept": "application/vnd.github.v3+json"
-            }
-        )
+    if info.status == 0:
+        print("❌ 请求失败: " + info.message)
+        return False
 
-        with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
+    if info.valid:
+        print("✓ Token 有效！")
+        print()
+        print("用户信息:")
+        print("  登录: " + (info.login or "N/A"))
+        print("  名称: " + (info.name or "N/A"))
+        print("  公开仓库: " + str(info.public_repos))
+        print()
 
-            print("✓ Token 有效！")
-            print()
-            print("用户信息:")
-            print("  登录: " + data.get("login", "N/A"))
-            print("  名称: " + data.get("name", "N/A"))
-            print("  公开仓库: " + str(data.get("public_repos", 0)))
+        # 检查作用域
+        print("Token 作用域:")
+        if info.scopes is not None:
+            print("  " + ", ".join(info.scopes) if info.scopes else "  (无作用域)")
+        else:
+            print("  (无法获取作用域信息)")
+
+        if info.expires_at is not None:
+            print("过期时间: " + time.strftime("%Y-%m-%d %H:%M", time.localtime(info.expires_at)))
+        remaining = info.remaining_requests()
+        if remaining is not None:
+            print("剩余 API 配额: " + str(remaining) + "/" + str(info.rate_limit.get("limit", "?")))
+
+        problem = info.problem()
+        if problem:
             print()
+            print("⚠️  " + problem)
+        return True
 
-            # 检查作用域
-            print("Token 作用域:")
-            if "X-OAuth-Scopes" in response.headers:
-                scopes = response.headers["X-OAuth-Scopes"]
-                print("  " + scopes if scopes else "  (无作用域)")
-            else:
-                print("  (无法获取作用域信息)")
-
-            return True
-
-    except urllib.error.HTTPError as e:
-        print("❌ Token 验证失败！")
-        print("错误代码: " + str(e.code))
-
-        try:
-            error_data = json.loads(e.read().decode())
-            print("错误信息: " + str(error_data.get("message", "")))
-        except:
-            pass
-
-        print()
-        print("可能的原因：")
-        if e.code == 401:
-            print("  1. Token 无效或已过期")
-            print("  2. Token 格式错误")
-        elif e.code == 403:
-            print("  1. Token 权限不足")
-            print("  2. Token 已被撤销")
-            print("  3. API 速率限制")
+    print("❌ Token 验证失败！")
+    if info.expired:
+        print("错误信息: Token 已过期")
+    else:
+        print("错误代码: " + str(info.status))
+        if info.message:
+            print("错误信息: " + str(info.message))
 
-        print()
-        print("解决方案：")
-        print("  1. 访问: https://github.com/settings/tokens")
-        print("  2. 生成新的 Personal Access Token")
-        print("  3. 勾选 'repo' 权限")
-        print("  4. 复制新 Token 重试")
+    print()
+    print("可能的原因：")
+    if info.status == 401 or info.expired:
+        print("  1. Token 无效或已过期")
+        print("  2. Token 格式错误")
+    elif info.status == 403:
+        print("  1. Token 权限不足")
+        print("  2. Token 已被撤销")
+        print("  3. API 速率限制")
 
-        return False
+    print()
+    print("解决方案：")
+    print("  1. 访问: https://github.com/settings/tokens")
+    print("  2. 生成新的 Personal Access Token")
+    print("  3. 勾选 'repo' 权限")
+    print("  4. 复制新 Token 重试")
 
-    except Exception as e:
-        print("❌ 请求失败: " + str(e))
-        return False
+    return False
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
+    args = [arg for arg in sys.argv[1:] if arg != "--refresh"]
+    if len(args) < 2:
         print("使用方法:")
-        print("  python verify_token.py <username> <token>")
+        print("  python verify_token.py <username> <token> [--refresh]")
         sys.exit(1)
 
-    username = sys.argv[1]
-    token = sys.argv[2]
+    username = args[0]
+    token = args[1]
 
-    if verify_token(username, token):
+    if verify_token(username, token, refresh="--refresh" in sys.argv):
         sys.exit(0)
     else:
         sys.exit(1)
@@ -1,18 +1,42 @@
 import time
 import os
-import subprocess
 import sys
+import errno
+import argparse
+import traceback
+import select
+import struct
+import ctypes
+import ctypes.util
+
+import generate_dashboard
+import markdown_engine
 
 # Configuration
 WATCH_DIR = os.path.dirname(os.path.abspath(__file__))
-GENERATOR_SCRIPT = os.path.join(WATCH_DIR, "generate_dashboard.py")
+DEBOUNCE_SECONDS = 0.15   # a burst of saves is reported once this long after the last event
+MAX_DELAY_SECONDS = 1.0   # ...but never later than this after the first one
+POLL_INTERVAL = 2         # fallback watcher only
+
+CREATED, MODIFIED, DELETED = "created", "modified", "deleted"
+RESCAN = "rescan"         # the kernel queue overflowed, anything may have changed
+
+# The builder decides what is a doc (generate_dashboard.find_md_files); the watcher follows it
+is_watched_dir = generate_dashboard.is_source_dir
+is_watched_file = generate_dashboard.is_source_file
+
+def walk_watched_dirs(top):
+    """os.walk() that prunes the directories the builder never searches."""
+    for root, dirs, files in os.walk(top):
+        dirs[:] = [d for d in dirs if is_watched_dir(d)]
+        yield root, dirs, files
 
 def get_md_snapshot():
     """Returns a dictionary of filename -> mtime for all .md files."""
     snapshot = {}
-    for root, dirs, files in os.walk(WATCH_DIR):
+    for root, dirs, files in walk_watched_dirs(WATCH_DIR):
         for file in files:
-            if file.endswith(".md"):
+            if is_watched_file(file):
                 full_path = os.path.join(root, file)
                 try:
                     snapshot[full_path] = os.path.getmtime(full_path)
@@ -20,55 +44,212 @@ def get_md_snapshot():
                     pass
     return snapshot
 
+class PollingWatcher:
+    """Fallback for platforms without inotify: compares mtime snapshots every POLL_INTERVAL."""
+    name = "polling"
+
+    def __init__(self):
+        self.snapshot = get_md_snapshot()
+
+    def wait_for_changes(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            current = get_md_snapshot()
+            changes = {}
+            for path, mtime in current.items():
+                if path not in self.snapshot:
+                    changes[path] = CREATED
+                elif mtime != self.snapshot[path]:
+                    changes[path] = MODIFIED
+            for path in self.snapshot:
+                if path not in current:
+                    changes[path] = DELETED
+            self.snapshot = current
+            if changes:
+                return changes
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Blocks in the kernel until something changes, so an idle watcher costs no CPU."""
+    name = "inotify"
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                  | IN_DELETE_SELF | IN_MOVE_SELF)
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.dirs = {}  # watch descriptor -> directory path
+        for root, dirs, files in walk_watched_dirs(WATCH_DIR):
+            self.watch_dir(root)
+
+    def watch_dir(self, path):
+        wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            # The directory may already be gone again; running out of watches is worth a warning
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                print(f"[Warning] inotify watch limit reached, not watching {path}")
+            return False
+        self.dirs[wd] = path
+        return True
+
+    def watch_new_tree(self, top, changes):
+        """Watches a directory created or moved into the tree and reports the docs already in it."""
+        for root, dirs, files in walk_watched_dirs(top):
+            self.watch_dir(root)
+            for file in files:
+                if is_watched_file(file):
+                    changes[os.path.join(root, file)] = CREATED
+
+    def read_events(self, changes):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                changes[WATCH_DIR] = RESCAN
+                continue
+            if mask & self.IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                continue
+            path = os.path.join(parent, name)
+
+            if mask & self.IN_ISDIR:
+                if not is_watched_dir(name):
+                    continue
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self.watch_new_tree(path, changes)
+                elif mask & self.IN_MOVED_FROM:
+                    # The docs below it are gone, but we no longer know their names
+                    changes[path] = RESCAN
+                continue
+            if not is_watched_file(name):
+                continue
+
+            if mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                changes[path] = DELETED
+            elif mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                changes[path] = CREATED
+            elif changes.get(path) != CREATED:
+                # IN_CLOSE_WRITE; keep a file created in the same burst reported as new
+                changes[path] = MODIFIED
+
+    def wait_for_changes(self):
+        changes = {}
+        while not changes:
+            select.select([self.fd], [], [])
+            self.read_events(changes)
+
+        # Coalesce the rest of the burst (editors often write, rename and touch in quick succession)
+        deadline = time.monotonic() + MAX_DELAY_SECONDS
+        while True:
+            timeout = min(DEBOUNCE_SECONDS, deadline - time.monotonic())
+            if timeout <= 0 or not select.select([self.fd], [], [], timeout)[0]:
+                return changes
+            self.read_events(changes)
+
+    def close(self):
+        os.close(self.fd)
+
+def create_watcher():
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError) as e:
+        # AttributeError: libc without inotify symbols
+        print(f"[Info] inotify unavailable ({e}), falling back to polling every {POLL_INTERVAL}s")
+        return PollingWatcher()
+
+def describe_change(path, kind):
+    if kind == RESCAN:
+        return f"Rescan needed: {os.path.relpath(path, WATCH_DIR)}"
+    return f"{kind.capitalize()}: {os.path.relpath(path, WATCH_DIR)}"
+
+def rebuild(builder, changes):
+    """Re-renders just the edited pages; a new, deleted or moved doc changes the nav, so that builds everything."""
+    page_set_changed = any(kind != MODIFIED for kind in changes.values())
+    return builder.update(list(changes), page_set_changed=page_set_changed)
+
 def main():
+    parser = argparse.ArgumentParser(description="Rebuild the dashboard whenever a Markdown doc changes.")
+    parser.add_argument("--markdown", choices=markdown_engine.ENGINES, default=generate_dashboard.DEFAULT_ENGINE,
+                        help="markdown flavour, as in generate_dashboard.py")
+    parser.add_argument("--shared-nav", action="store_true", help="as in generate_dashboard.py")
+    parser.add_argument("--minify", action="store_true", help="as in generate_dashboard.py")
+    parser.add_argument("--precompress", action="store_true", help="as in generate_dashboard.py")
+    args = parser.parse_args()
+
     print(f"==================================================")
     print(f"   FishingGame Doc Watcher Started")
     print(f"   Watching: {WATCH_DIR}")
     print(f"   Target:   generate_dashboard.py")
     print(f"==================================================")
-    
-    last_snapshot = get_md_snapshot()
-    
+
+    # The generator is imported once and its state stays warm between rebuilds
+    builder = generate_dashboard.DashboardBuilder(engine=args.markdown, shared_nav=args.shared_nav,
+                                                 minify=args.minify, precompress=args.precompress)
+    builder.build()
+
+    watcher = create_watcher()
+    print(f"Using {watcher.name} watcher.")
+
     try:
         while True:
-            time.sleep(2) # Check every 2 seconds
-            
-            current_snapshot = get_md_snapshot()
-            
-            needs_update = False
-            
-            # Check for modified or new files
-            for file, mtime in current_snapshot.items():
-                if file not in last_snapshot:
-                    print(f"[Change Detected] New file: {os.path.basename(file)}")
-                    needs_update = True
-                    break
-                elif mtime != last_snapshot[file]:
-                    print(f"[Change Detected] Modified: {os.path.basename(file)}")
-                    needs_update = True
-                    break
-            
-            # Check for deleted files
-            if not needs_update and len(current_snapshot) != len(last_snapshot):
-                print(f"[Change Detected] File deleted.")
-                needs_update = True
-
-            if needs_update:
-                print(">> Regenerating Dashboard...", end=" ")
-                # Run the generator
-                result = subprocess.run([sys.executable, GENERATOR_SCRIPT], capture_output=True, text=True)
-                if result.returncode == 0:
-                    print("SUCCESS!")
-                else:
-                    print("FAILED!")
-                    print(result.stderr)
-                
-                last_snapshot = current_snapshot
-                print("--------------------------------------------------")
+            changes = watcher.wait_for_changes()
+            for path, kind in sorted(changes.items()):
+                print(f"[Change Detected] {describe_change(path, kind)}")
+
+            print(">> Regenerating Dashboard...")
+            started = time.perf_counter()
+            try:
+                written = rebuild(builder, changes)
+            except Exception:
+                # Keep watching; the next save gets another try
+                print("FAILED!")
+                traceback.print_exc()
+            else:
+                print(f"SUCCESS! {len(written)} file(s) written in {(time.perf_counter() - started) * 1000:.0f} ms")
+            print("--------------------------------------------------")
 
     except KeyboardInterrupt:
         print("\nWatcher stopped by user.")
+    finally:
+        watcher.close()
 
 if __name__ == "__main__":
     main()
-